@@ -3,4 +3,15 @@ Load all methods that are made accessible as the API.
 """
 
 from .custom_formatter import CustomFormatter
-from .setup import setup
+from .setup import register_parser, setup, setup_many
+
+
+def probe(*args, **kwargs):
+    """Get a formatter for any document class by measuring it with LaTeX.
+
+    See :func:`rsmf.measurement.probe`, which is only imported when it is called.
+    """
+    # pylint: disable=import-outside-toplevel
+    from .measurement import probe as _probe
+
+    return _probe(*args, **kwargs)
@@ -3,6 +3,13 @@ Abstract base class for all formatters.
 """
 
 import abc
+import contextlib
+import copy
+import functools
+import inspect
+import os
+import threading
+import time
 import warnings
 
 import matplotlib as mpl
@@ -10,19 +17,227 @@ import matplotlib.pyplot as plt
 
 from .fontsizes import DEFAULT_FONTSIZES_10
 
+# The feature modules are imported by the methods that use them, which keeps import rsmf fast
+# pylint: disable=import-outside-toplevel
+
+_UNCACHED_RCPARAMS = {
+    "backend",
+    "backend_fallback",
+    "date.epoch",
+    "docstring.hardcopy",
+    "figure.max_open_warning",
+    "figure.raise_window",
+    "interactive",
+    "savefig.directory",
+    "timezone",
+    "tk.window_focus",
+    "toolbar",
+}
+"""rcParams that configure the session rather than the figures and are not restored by
+:meth:`AbstractFormatter.activate`."""
+
+
+def _current_rc():
+    """The active rcParams that configure figures, see :data:`_UNCACHED_RCPARAMS`."""
+    return {key: value for key, value in mpl.rcParams.items() if key not in _UNCACHED_RCPARAMS}
+
+
+_SETTINGS = frozenset(
+    [
+        "print_dpi",
+        "pgf_precision",
+        "pgf_simplify",
+        "preview_dpi",
+        "preview_cache_dir",
+        "report",
+        "profiler",
+        "snapshot_dir",
+        "figure_cache_dir",
+        "tex_cache_dir",
+        "tex_cache_max_bytes",
+        "image_dir",
+    ]
+)
+"""Attributes that configure how one user saves figures, which shared formatters refuse to
+change, see :meth:`AbstractFormatter.interned`."""
+
+_INTERNED = {}
+_INTERNED_INSTANCES = {}
+_INTERNED_LOCK = threading.Lock()
+
 
 class AbstractFormatter(abc.ABC):
     """
     Base class for formatter implementations.
     """
 
+    # pylint: disable=too-many-public-methods
+
+    font_family = "sans-serif"
+    """Font family of the document's text, one of "serif", "sans-serif" or "monospace"."""
+
+    print_dpi = 300
+    """Resolution in dots per inch to which raster data is downsampled by
+    :meth:`imshow` and :meth:`pcolormesh`."""
+
+    pgf_precision = 0.01
+    """Precision in points of the lengths written to PGF files. Lengths are rounded to the
+    corresponding number of decimals, which makes the files smaller and faster to typeset.
+    Set it to None to keep matplotlib's precision."""
+
+    pgf_simplify = None
+    """Largest deviation in points of simplified paths from the original ones in PGF files,
+    e.g. 0.1. Vertices that change a path by less are dropped. Defaults to None, which keeps
+    matplotlib's ``path.simplify_threshold``."""
+
+    preview_dpi = 192
+    """Resolution in dots per inch of the PNGs rendered by :meth:`preview`."""
+
+    preview_cache_dir = None
+    """Directory in which previews are cached, see :meth:`preview`. Defaults to
+    :data:`rsmf.preview.CACHE_DIR`."""
+
+    report = None
+    """:class:`rsmf.report.Report` in which every saved figure is recorded, if set."""
+
+    profiler = None
+    """:class:`rsmf.profiler.Profiler` that writes flamegraphs of slow figures, if set."""
+
+    snapshot_dir = None
+    """Directory in which a snapshot of every saved figure is stored, if set, see
+    :meth:`rerender`. Lazy figures whose outputs are copied from the cache are built for
+    their snapshots."""
+
+    figure_cache_dir = None
+    """Directory in which lazy figures cache their outputs, see :meth:`figure`. Defaults to
+    :data:`rsmf.lazy.CACHE_DIR`."""
+
+    tex_cache_dir = None
+    """Directory of a typesetting cache shared among processes, see :meth:`share_tex_cache`."""
+
+    tex_cache_max_bytes = None
+    """Size limit of the shared typesetting cache in bytes. None uses
+    :data:`rsmf.texcache.DEFAULT_MAX_BYTES`."""
+
+    image_dir = None
+    """Directory in which the raster images of PGF figures are shared, see :meth:`share_images`."""
+
+    _rc = None
+
+    _shared = False
+
     def __init__(self):
         """Sets up the plotting environment."""
         if not hasattr(self, "_fontsizes"):
             self._fontsizes = DEFAULT_FONTSIZES_10
 
+        self.activate()
+
+    @classmethod
+    def interned(cls, *args, **kwargs):
+        """Get the formatter for a configuration, shared among all equal configurations.
+
+        The first call for a configuration creates the formatter, which also activates it.
+        Later calls with arguments that lead to an equal formatter return the same instance,
+        together with its cached state like the rcParams computed on activation. The returned
+        formatter is not activated again, call :meth:`activate` to switch to it.
+
+        As the formatter is shared by everyone using the configuration, its settings like
+        :attr:`snapshot_dir` or :attr:`report` can not be changed. Use :meth:`copy` to get a
+        formatter of one's own that can.
+
+        Args:
+            *args: Passed on to the constructor.
+            **kwargs: Passed on to the constructor.
+
+        Returns:
+            AbstractFormatter: The shared formatter.
+        """
+        arguments = inspect.signature(cls).bind(*args, **kwargs)
+        arguments.apply_defaults()
+        key = (cls, _freeze(arguments.arguments))
+
+        with _INTERNED_LOCK:
+            if key not in _INTERNED:
+                formatter = cls(*args, **kwargs)
+                # Different arguments can describe the same configuration, e.g. a fontsize of
+                # 10 and the corresponding Fontsizes
+                formatter = _INTERNED_INSTANCES.setdefault(formatter, formatter)
+                formatter._shared = True  # pylint: disable=protected-access
+                _INTERNED[key] = formatter
+
+            return _INTERNED[key]
+
+    def copy(self):
+        """Get a copy of the formatter whose settings can be changed on their own.
+
+        The copy keeps the cached state of the formatter, so it is cheap to create also from
+        the shared formatters of :meth:`interned`.
+
+        Returns:
+            AbstractFormatter: The copy, which is not shared.
+        """
+        formatter = copy.copy(self)
+        formatter.__dict__.pop("_shared", None)
+
+        return formatter
+
+    def __setattr__(self, name, value):
+        if self._shared and name in _SETTINGS:
+            raise AttributeError(
+                f"The formatter is shared by all documents with the same configuration, its "
+                f"{name} can not be changed. Change the {name} of formatter.copy() instead."
+            )
+
+        super().__setattr__(name, value)
+
+    def _configuration(self):
+        """The values that determine the output of the formatter.
+
+        Formatters of the same class with equal configurations compare equal and have the
+        same hash.
+
+        Returns:
+            Tuple: The configuration.
+        """
+        return (self.columnwidth, self.wide_columnwidth, self.fontsizes, self.font_family)
+
+    def __eq__(self, other):
+        if not isinstance(other, AbstractFormatter):
+            return NotImplemented
+
+        return type(self) is type(other) and self._configuration() == other._configuration()
+
+    def __hash__(self):
+        return hash((type(self), self._configuration()))
+
+    def activate(self):
+        """Make the settings of this formatter the active matplotlib configuration.
+
+        This is done automatically when the formatter is created. Call it again when
+        switching between several formatters or when setting up a fresh process. The
+        resulting rcParams are computed on the first activation and restored from a cache
+        afterwards, also in processes the formatter is pickled to.
+        """
         mpl.use("pgf")
 
+        if self.tex_cache_dir is not None:
+            from . import texcache
+
+            max_bytes = self.tex_cache_max_bytes
+            if max_bytes is None:
+                max_bytes = texcache.DEFAULT_MAX_BYTES
+            texcache.install(self.tex_cache_dir, max_bytes)
+
+        if self.image_dir is not None:
+            from . import images
+
+            images.install(self.image_dir)
+
+        if self._rc is not None:
+            mpl.rcParams.update(self._rc)
+            return
+
         styles = mpl.style.available
 
         if "seaborn-white" in styles:
@@ -32,6 +247,57 @@ class AbstractFormatter(abc.ABC):
 
         self.set_rcParams()
 
+        self._rc = _current_rc()
+
+    def share_tex_cache(self, directory, max_bytes=None):
+        """Cache all typesetting results in a directory that is shared among processes.
+
+        Parallel builds pointing to the same directory then reuse each other's results: the
+        text extents measured by the PGF backend as well as the DVI and PNG files of
+        ``text.usetex``. Files are written atomically and every string is typeset only once,
+        even if several processes need it at the same time. When the cache grows beyond
+        ``max_bytes``, the least recently used entries are removed.
+
+        The setting is part of the formatter, so worker processes of :meth:`render_batch`
+        use the same cache.
+
+        Args:
+            directory (Union[str,pathlib.Path]): The cache directory, e.g. on a shared drive.
+            max_bytes (int, optional): Size limit of the cache. Defaults to None, which uses
+                1 GiB, see :data:`rsmf.texcache.DEFAULT_MAX_BYTES`.
+        """
+        from . import texcache
+
+        if max_bytes is None:
+            max_bytes = texcache.DEFAULT_MAX_BYTES
+        self.tex_cache_dir = str(directory)
+        self.tex_cache_max_bytes = max_bytes
+
+        texcache.install(directory, max_bytes)
+
+    def share_images(self, directory):
+        """Write the raster images of all PGF figures into one directory, each image once.
+
+        Images, e.g. of ``imshow`` or rasterized artists, are stored under the hash of their
+        pixels instead of next to every PGF file. An image that occurs in several figures, like
+        a shared background map, is therefore compressed and written only once, and the PGF
+        files refer to it by its path relative to them. In the document, every image is
+        declared once with ``\\pgfdeclareimage`` and loaded by LaTeX only once, however many
+        figures show it.
+
+        The setting is part of the formatter, so worker processes of :meth:`render_batch`
+        share the same directory.
+
+        Args:
+            directory (Union[str,pathlib.Path]): Directory of the images, e.g. next to the
+                figures of the document.
+        """
+        from . import images
+
+        self.image_dir = str(directory)
+
+        images.install(directory)
+
     @property
     @abc.abstractmethod
     def columnwidth(self):
@@ -95,7 +361,7 @@ class AbstractFormatter(abc.ABC):
         plt.rcParams["legend.framealpha"] = 1.0
         plt.rcParams["legend.fancybox"] = False
 
-    def figure(self, aspect_ratio=1 / 1.62, width_ratio=1.0, wide=False):
+    def figure(self, aspect_ratio=1 / 1.62, width_ratio=1.0, wide=False, lazy=False):
         r"""Sets up the plot with the fitting arguments so that the font sizes of the plot
         and the font sizes of the document are well aligned.
 
@@ -107,9 +373,12 @@ class AbstractFormatter(abc.ABC):
             wide (bool, optional): indicates if the figures spans two columns in twocolumn mode,
                 i.e. if the figure* environment is used, has no effect in onecolumn mode.
                 Defaults to False.
+            lazy (bool, optional): Only record the calls made on the figure and its axes and
+                draw them when the figure is saved and the output is not cached yet, see
+                :class:`rsmf.lazy.LazyFigure`. Defaults to False.
 
         Returns:
-            matplotlib.Figure: The matplotlib Figure object
+            Union[matplotlib.Figure,LazyFigure]: The matplotlib Figure object
         """
         if wide and not self.wide_columnwidth:
             raise ValueError("The formatter's wide_columnwidth was not set.")
@@ -122,4 +391,543 @@ class AbstractFormatter(abc.ABC):
         width = base_width * width_ratio
         height = width * aspect_ratio
 
-        return plt.figure(figsize=(width, height), dpi=120, facecolor="white")
+        figure_kwargs = {"figsize": (width, height), "dpi": 120, "facecolor": "white"}
+
+        if lazy:
+            from .lazy import LazyFigure
+
+            rc = _current_rc()
+            return LazyFigure(self, figure_kwargs, rc, cache_dir=self.figure_cache_dir)
+
+        return plt.figure(**figure_kwargs)
+
+    # pylint: disable=too-many-arguments
+    def template(
+        self, build, aspect_ratio=1 / 1.62, width_ratio=1.0, wide=False, freeze_layout=True
+    ):
+        """Build a figure skeleton once and clone it for every figure that shares it.
+
+        ``build(fig)`` is called once with a new figure from :meth:`figure` and sets up the
+        skeleton, e.g. the subplot grid, axis labels, tick formatters, colorbars and legend
+        placement. Its return value, e.g. the axes, is handed out with every clone. The
+        skeleton is laid out once, including the measurement of its text, and stored. Cloning
+        it is much cheaper than building it again::
+
+            def build(fig):
+                axes = fig.subplots(1, 2, sharey=True)
+                axes[0].set_ylabel("signal")
+                return axes
+
+            template = formatter.template(build, aspect_ratio=0.4, wide=True)
+
+            for run in runs:
+                fig, axes = template.figure()
+                axes[0].plot(run.time, run.signal)
+                formatter.savefig(fig, f"{run.name}.pgf")
+                plt.close(fig)
+
+        Args:
+            build (callable): Sets up the skeleton in the given figure.
+            aspect_ratio (float, optional): The aspect ratio (height/width) of the figures.
+                Defaults to the golden ratio.
+            width_ratio (float, optional): The width of the figures in multiples of
+                \\columnwidth. Defaults to 1.0.
+            wide (bool, optional): Whether the figures span two columns. Defaults to False.
+            freeze_layout (bool, optional): Keep the layout of the skeleton fixed in the
+                clones instead of computing it again when they are saved. Then the axes limits
+                or tick labels set in the skeleton should leave enough room for the data.
+                Defaults to True.
+
+        Returns:
+            rsmf.template.FigureTemplate: The template, whose ``figure()`` returns a clone and
+                the return value of ``build`` for it.
+        """
+        from .template import FigureTemplate
+
+        fig = self.figure(aspect_ratio=aspect_ratio, width_ratio=width_ratio, wide=wide)
+
+        try:
+            return FigureTemplate(fig, build(fig), freeze_layout=freeze_layout)
+        finally:
+            plt.close(fig)
+
+    def text_extent(self, text, size="footnotesize"):
+        """Estimate the extent of a piece of text without running LaTeX.
+
+        The estimate uses the metrics of the Computer Modern fonts in the document's
+        :attr:`font_family`, which are loaded on first use and cached. It is meant for fast
+        automated checks, e.g. whether labels fit into the :attr:`columnwidth`.
+
+        Args:
+            text (str): The text, possibly containing math.
+            size (Union[str,float], optional): Name of the font size as in :attr:`fontsizes`,
+                e.g. "small", or size in points. Defaults to "footnotesize", the size of the
+                tick labels.
+
+        Returns:
+            Tuple[float,float,float]: Width, height and depth of the text in inches.
+        """
+        from . import metrics
+
+        if isinstance(size, str):
+            size = getattr(self.fontsizes, size)
+
+        return metrics.text_extent(text, size, family=self.font_family)
+
+    # pylint: disable=invalid-name
+    def imshow(self, X, ax=None, **kwargs):
+        """Show an image downsampled to the printed resolution.
+
+        The image data is block-averaged so that it has at most as many pixels as the figure
+        has dots when printed at :attr:`print_dpi`, which keeps large images from bloating the
+        output files. Images drawn with ``ax.imshow`` directly are left as they are.
+
+        Args:
+            X (numpy.ndarray): The image data.
+            ax (matplotlib.axes.Axes, optional): The axes to draw into.
+                Defaults to the current axes.
+            **kwargs: Passed on to ``matplotlib.axes.Axes.imshow``.
+
+        Returns:
+            matplotlib.image.AxesImage: The image.
+        """
+        from . import raster
+
+        return raster.imshow(ax or plt.gca(), X, self.print_dpi, **kwargs)
+
+    # pylint: disable=invalid-name
+    def pcolormesh(self, C, x=None, y=None, ax=None, **kwargs):
+        """Draw a pseudocolor plot downsampled to the printed resolution.
+
+        Like :meth:`imshow`, the cells are block-averaged to at most one cell per printed dot.
+
+        Args:
+            C (numpy.ndarray): The color values of shape (rows, columns).
+            x (numpy.ndarray, optional): One dimensional cell edges or centers in horizontal
+                direction. Defaults to the column indices.
+            y (numpy.ndarray, optional): One dimensional cell edges or centers in vertical
+                direction. Defaults to the row indices.
+            ax (matplotlib.axes.Axes, optional): The axes to draw into.
+                Defaults to the current axes.
+            **kwargs: Passed on to ``matplotlib.axes.Axes.pcolormesh``.
+
+        Returns:
+            matplotlib.collections.QuadMesh: The pseudocolor plot.
+        """
+        from . import raster
+
+        return raster.pcolormesh(ax or plt.gca(), C, self.print_dpi, x=x, y=y, **kwargs)
+
+    # pylint: disable=too-many-arguments
+    def scatter(self, x, y, ax=None, threshold=100000, chunksize=None, **kwargs):
+        """Draw a scatter plot that switches to a density plot for large numbers of points.
+
+        Above ``threshold`` points, the points are counted on a grid whose cells are about the
+        size of a marker (``rcParams["lines.markersize"]``) and the counts are drawn instead of
+        the individual markers. The counting is done in chunks, so memory-mapped data that does
+        not fit into memory can be plotted as well.
+
+        Args:
+            x (numpy.ndarray): Horizontal coordinates.
+            y (numpy.ndarray): Vertical coordinates.
+            ax (matplotlib.axes.Axes, optional): The axes to draw into.
+                Defaults to the current axes.
+            threshold (int, optional): Number of points above which the density is drawn.
+                Defaults to 100000.
+            chunksize (int, optional): Number of points that are binned at once. Defaults to
+                None, which uses :data:`rsmf.density.DEFAULT_CHUNKSIZE`.
+            **kwargs: Passed on to ``matplotlib.axes.Axes.scatter`` or
+                ``matplotlib.axes.Axes.pcolormesh``, respectively. The arguments of the
+                markers, e.g. ``s`` or ``c``, are left out of the density plot, where a scalar
+                ``s`` sets the size of the bins.
+
+        Returns:
+            Union[matplotlib.collections.PathCollection,matplotlib.collections.QuadMesh]: The
+                scatter or density plot.
+        """
+        from . import density
+
+        if chunksize is None:
+            chunksize = density.DEFAULT_CHUNKSIZE
+
+        return density.scatter(ax or plt.gca(), x, y, threshold, chunksize=chunksize, **kwargs)
+
+    def savefig(self, fig, fname, **kwargs):
+        """Save a figure.
+
+        Lazy figures are only drawn if the output is not cached, see :meth:`figure`. PGF
+        output is written with the precision and simplification of :attr:`pgf_precision` and
+        :attr:`pgf_simplify`. If a :attr:`report` is attached, the size and cost of the
+        figure are recorded in it. If :attr:`snapshot_dir` is set, a snapshot of the figure is
+        stored there, see :meth:`rerender`. If a :attr:`profiler` is attached, figures that
+        take longer than its threshold are sampled.
+
+        Args:
+            fig (Union[matplotlib.Figure,LazyFigure]): The figure to be saved.
+            fname (Union[str,pathlib.Path]): Path of the output file.
+            **kwargs: Passed on to ``matplotlib.Figure.savefig``.
+
+        Returns:
+            pathlib.Path: Path of the written file.
+        """
+        from .lazy import LazyFigure
+        from .pages import active_batch
+
+        name = os.path.basename(fname) if isinstance(fname, (str, os.PathLike)) else "figure"
+
+        with self._profile(name):
+            if isinstance(fig, LazyFigure):
+                return fig.savefig(fname, **kwargs)
+
+            return self._savefig(fig, fname, active_batch(), **kwargs)
+
+    def _profile(self, name):
+        """Context in which the attached profiler samples a slow figure, if there is one."""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+
+        return self.profiler.profile(name)
+
+    def _savefig(self, fig, fname, batch_save, **kwargs):
+        """Save a figure, as part of a batch if one is given and it accepts the output."""
+        from . import export, snapshot
+
+        if batch_save is not None and not batch_save.accepts(fig, fname, kwargs):
+            batch_save = None
+
+        def save():
+            if batch_save is not None:
+                return batch_save.add(self, fig, fname, **kwargs)
+
+            return export.savefig(
+                fig, fname, precision=self.pgf_precision, simplify=self.pgf_simplify, **kwargs
+            )
+
+        if self.report is None:
+            path = save()
+        elif batch_save is None:
+            path = self.report.timed_save(fig, save)
+        else:
+            # The size of the output is known once the batch is typeset
+            start = time.perf_counter()
+            path = save()
+            seconds = time.perf_counter() - start
+            batch_save.when_written(path, functools.partial(self.report.record, fig, path, seconds))
+
+        if self.snapshot_dir is not None and isinstance(fname, (str, os.PathLike)):
+            snapshot.SnapshotStore(self.snapshot_dir).record(fig, fname, self, **kwargs)
+
+        return path
+
+    def rerender(self, snapshot_dir, output_dir=None):
+        """Render the figures of another document again in the style of this formatter.
+
+        Set :attr:`snapshot_dir` of the formatter of the original document, e.g. right after
+        ``rsmf.setup``, so that every figure saved by it is also stored with its data. When the
+        paper moves to another journal or font size, the new formatter re-renders the
+        snapshots without running the scripts that produced the data:
+
+        .. code-block:: python
+
+            formatter = rsmf.setup(r"\\documentclass[aps,twocolumn]{revtex4-2}")
+            formatter.snapshot_dir = "snapshots"
+            ...
+
+            formatter = rsmf.setup(r"\\documentclass[onecolumn,11pt]{quantumarticle}")
+            formatter.rerender("snapshots")
+
+        Figures keep their width relative to the column, their named font sizes and their
+        aspect ratio, see :func:`rsmf.snapshot.restyle`.
+
+        Args:
+            snapshot_dir (Union[str,pathlib.Path]): Directory of the snapshots.
+            output_dir (Union[str,pathlib.Path], optional): Directory of the new outputs.
+                Defaults to None, which overwrites the original outputs.
+
+        Returns:
+            List[pathlib.Path]: Paths of the written files.
+        """
+        from . import snapshot
+
+        return snapshot.SnapshotStore(snapshot_dir).rerender(self, output_dir=output_dir)
+
+    def preview(self, fig, dpi=None):
+        """Render a quick preview of a figure at the size it is printed in the document.
+
+        The PGF backend can not display figures, e.g. inline in notebooks, and saving them
+        runs LaTeX. A preview is rendered to PNG by the Agg backend instead, with the text set
+        by matplotlib's mathtext in the document's font sizes, and notebooks display it at the
+        physical size of the figure. Previews are cached by a hash of the figure, so that
+        rerunning unchanged cells is instant. Use :meth:`savefig` for the final output.
+
+        Args:
+            fig (Union[matplotlib.Figure,LazyFigure]): The figure.
+            dpi (float, optional): Resolution of the preview. Defaults to :attr:`preview_dpi`.
+
+        Returns:
+            rsmf.preview.Preview: The preview, which notebooks display when it is the result
+                of a cell.
+        """
+        from . import preview
+        from .lazy import LazyFigure
+
+        dpi = dpi or self.preview_dpi
+        rc = preview.preview_rc(self.font_family)
+
+        if isinstance(fig, LazyFigure):
+            return fig.preview(dpi, rc, cache_dir=self.preview_cache_dir)
+
+        return preview.preview(fig, dpi, rc, cache_dir=self.preview_cache_dir)
+
+    def export(self, fig, name, formats=("pgf", "pdf"), **kwargs):
+        """Save a figure in several formats from a single layout and typesetting pass.
+
+        The layout of the figure is only computed once. With the PGF backend, LaTeX is run once
+        to produce the PDF and the PNG is rasterized from it, while the PGF code is written
+        without invoking LaTeX at all. An attached :attr:`profiler` samples all formats of a
+        slow figure together.
+
+        Args:
+            fig (Union[matplotlib.Figure,LazyFigure]): The figure to be exported.
+            name (Union[str,pathlib.Path]): Path of the output files without extension.
+            formats (Iterable[str], optional): File extensions of the outputs, e.g.
+                ``["pgf", "pdf", "png"]``. Defaults to ("pgf", "pdf").
+            **kwargs: Passed on to ``matplotlib.Figure.savefig``.
+
+        Returns:
+            List[pathlib.Path]: Paths of the written files in the order of ``formats``.
+        """
+        from . import export
+        from .lazy import LazyFigure
+
+        with self._profile(os.path.basename(name)):
+            if isinstance(fig, LazyFigure):
+                return fig.export(name, formats=formats, **kwargs)
+
+            formats = list(formats)
+            save = self.savefig
+            if any(fmt.lower().lstrip(".") == "png" for fmt in formats):
+                # The PNG is converted from the PDF, which can not wait for a batch
+                save = functools.partial(self._savefig, batch_save=None)
+
+            return export.export(fig, name, formats=formats, save=save, **kwargs)
+
+    def export_pgfplots(self, fig, name, data_path=None):
+        """Write a line plot as pgfplots code that reads its data from external tables.
+
+        LaTeX streams the data from the tables instead of keeping every coordinate of inline
+        PGF paths in its main memory, which allows to include figures with many points. The
+        code is included with ``\\input{name.tex}`` and needs ``\\usepackage{pgfplots}``.
+        The axes keep their size and position within the figure and the text is set in the
+        :attr:`fontsizes` of the document. The tables are written with just enough digits to
+        place every point within :attr:`pgf_precision`.
+
+        Args:
+            fig (matplotlib.Figure): The figure, which may only contain lines.
+            name (Union[str,pathlib.Path]): Path of the output files without extension.
+            data_path (str, optional): Directory of the tables as seen from the LaTeX document.
+                Defaults to the directory of ``name``.
+
+        Returns:
+            List[pathlib.Path]: Paths of the code and the tables.
+        """
+        from . import pgfplots
+
+        return pgfplots.export(
+            fig, name, self.fontsizes, precision=self.pgf_precision, data_path=data_path
+        )
+
+    def render_frames(self, fig, update, frames, path_pattern, dpi=None):
+        """Render a series of frames, e.g. for slides or animations, in which only some
+        artists change.
+
+        The static parts of the figure, i.e. the layout, axes, ticks and the typeset text, are
+        rendered once, and for every frame only the artists returned by ``update(frame)`` are
+        drawn on top, like with blitting in ``matplotlib.animation``. The frames are raster
+        images written by a background thread. See :func:`rsmf.frames.render_frames`::
+
+            fig = formatter.figure()
+            line = plt.plot(x, np.sin(x))[0]
+
+            def update(phase):
+                line.set_ydata(np.sin(x + phase))
+                return [line]
+
+            formatter.render_frames(fig, update, phases, "frames/{:04d}.png", dpi=300)
+
+        Args:
+            fig (matplotlib.Figure): The figure.
+            update (callable): Called with every frame, returns the changed artists.
+            frames (Iterable): The frames passed to ``update``.
+            path_pattern (str): Path of the output files with a placeholder for the index of
+                the frame.
+            dpi (float, optional): Resolution of the frames. Defaults to the figure's dpi.
+
+        Returns:
+            List[pathlib.Path]: Paths of the written frames.
+        """
+        from . import frames as frame_series
+
+        return frame_series.render_frames(fig, update, frames, path_pattern, dpi=dpi)
+
+    def pages(self, filename):
+        """Write many figures as pages of a single PDF file.
+
+        Each page is written to disk and its figure closed as soon as it is saved, and LaTeX
+        is run only once for the whole document when the returned object is closed::
+
+            with formatter.pages("supplement.pdf") as pages:
+                for data in panels:
+                    fig = pages.figure(wide=True)
+                    plt.plot(data)
+                    pages.savefig(fig)
+
+        Args:
+            filename (Union[str,pathlib.Path]): Path of the resulting PDF file.
+
+        Returns:
+            Pages: Context manager to which the pages are saved.
+        """
+        from .pages import Pages
+
+        return Pages(self, filename)
+
+    def batch_save(self):
+        """Typeset the PDFs of many figures with a single LaTeX run.
+
+        While the returned batch is active, figures that are saved as PDF, by this or any
+        other formatter, are only written as PGF code. When the batch is closed, the figures
+        with the same LaTeX preamble are typeset together as the pages of one document, each
+        page with the exact size of its figure, and the result is split into the PDFs of the
+        figures::
+
+            with formatter.batch_save():
+                for name, data in panels.items():
+                    fig = formatter.figure()
+                    plt.plot(data)
+                    formatter.savefig(fig, f"{name}.pdf")
+                    plt.close(fig)
+
+        LaTeX and the preamble are thus loaded once instead of once per figure. The PDFs are
+        split with pypdf if it is installed and with ghostscript otherwise, without dates or
+        random identifiers, so that they can be cached per figure. Outputs in other formats
+        and PDFs cropped with ``bbox_inches`` are saved right away.
+
+        Returns:
+            BatchSave: Context manager that collects the figures.
+        """
+        from .pages import BatchSave
+
+        return BatchSave()
+
+    # pylint: disable=too-many-arguments
+    def render_batch(
+        self,
+        render,
+        jobs,
+        *,
+        processes=None,
+        share="memmap",
+        min_shared_bytes=2**20,
+        max_jobs_per_worker=None,
+        max_rss=None,
+    ):
+        """Render figures in parallel worker processes.
+
+        Each job is a dict of keyword arguments and is rendered by calling
+        ``render(formatter, **job)`` in a worker, where ``render`` is expected to create
+        its figure via ``formatter.figure`` and save it. Large numpy arrays in the jobs
+        are handed to the workers via shared memory instead of being pickled. The workers use
+        the rcParams that are active when the batch starts, including changes made after
+        setting up the formatter, just like rendering the jobs one after another.
+
+        Figures that a job creates, e.g. via ``formatter.figure``, are closed after the job.
+        The caches of matplotlib and LaTeX still grow with every figure, so long batches can
+        recycle their workers: a worker is replaced by a fresh process after
+        ``max_jobs_per_worker`` jobs or once its resident memory exceeds ``max_rss`` bytes
+        after a job. The peak memory of every worker is reported in the ``workers``
+        attribute of the returned list.
+
+        Args:
+            render (callable): Module level function that renders a single job.
+            jobs (Iterable[dict]): Keyword arguments for the individual renders.
+            processes (int, optional): Number of worker processes. Defaults to the number of CPUs.
+            share (str, optional): How arrays are shared, either "memmap" for memory-mapped
+                ``.npy`` files or "shared_memory" for ``multiprocessing.shared_memory``.
+                Defaults to "memmap".
+            min_shared_bytes (int, optional): Arrays smaller than this are pickled as usual.
+                Defaults to 1 MiB.
+            max_jobs_per_worker (int, optional): Number of jobs after which a worker is
+                replaced. Defaults to None, which keeps the workers for the whole batch.
+            max_rss (int, optional): Resident set size in bytes above which a worker is
+                replaced after its current job, e.g. ``2 * 2**30``. Defaults to None.
+
+        Returns:
+            rsmf.batch.BatchResults: The return values of ``render`` in the order of the jobs.
+        """
+        from . import batch
+
+        return batch.render_batch(
+            self,
+            render,
+            jobs,
+            processes=processes,
+            share=share,
+            min_shared_bytes=min_shared_bytes,
+            max_jobs_per_worker=max_jobs_per_worker,
+            max_rss=max_rss,
+            rc=_current_rc(),
+        )
+
+    # pylint: disable=too-many-arguments
+    def render_farm(
+        self, render, jobs, directory, local_workers=0, *, poll_interval=1.0, timeout=None
+    ):
+        """Render figures with workers on several machines that share a filesystem.
+
+        The jobs are written as files to a queue in ``directory``, which has to be on a
+        filesystem that all machines can access, e.g. via NFS. Workers started on any machine
+        with ``python -m rsmf.farm <directory>`` claim the jobs by an atomic rename, render
+        them with this formatter by calling ``render(formatter, **job)`` and store the
+        results next to a manifest of the batch. No message broker is needed. See
+        :class:`rsmf.farm.JobQueue`.
+
+        Args:
+            render (callable): Function that renders a single job. It has to be defined at the
+                top level of an importable module, so that workers on other machines can load
+                it.
+            jobs (Iterable[dict]): Keyword arguments for the individual renders.
+            directory (Union[str,pathlib.Path]): Directory of the queue.
+            local_workers (int, optional): Number of worker processes started on this machine
+                as well, which stop once the queue is empty. Defaults to 0.
+            poll_interval (float, optional): Time in seconds between two checks of the queue.
+                Defaults to 1 second.
+            timeout (float, optional): Raise a TimeoutError if the jobs are not done after
+                this many seconds. Defaults to None, which waits forever.
+
+        Returns:
+            List: The return values of ``render`` in the order of the jobs.
+        """
+        # Imported here, so that running python -m rsmf.farm does not import it twice
+        from . import farm
+
+        return farm.render_farm(
+            self,
+            render,
+            jobs,
+            directory,
+            local_workers=local_workers,
+            poll_interval=poll_interval,
+            timeout=timeout,
+        )
+
+
+def _freeze(value):
+    """Turn arguments into a hashable key."""
+    if isinstance(value, dict):
+        return tuple((key, _freeze(item)) for key, item in sorted(value.items()))
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+
+    return value
@@ -0,0 +1,425 @@
+"""
+Parallel rendering of figures with zero-copy handoff of array inputs.
+"""
+
+import multiprocessing
+import os
+import pickle
+import queue
+import sys
+import tempfile
+import traceback
+import uuid
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SHARE_METHODS = ("memmap", "shared_memory")
+"""Supported ways of handing arrays to worker processes."""
+
+_POLL_INTERVAL = 0.5
+
+# Shared memory segments attached in the current process, kept open for reuse.
+_ATTACHED = {}
+
+
+class SharedArray:
+    """Picklable handle to a numpy array that worker processes can read without copying.
+
+    Only the location, shape and dtype of the array are pickled. The array itself lives
+    either in a ``multiprocessing.shared_memory`` segment or in a memory-mapped ``.npy`` file.
+
+    Args:
+        array (numpy.ndarray): The array to be shared.
+        method (str, optional): Either "memmap" or "shared_memory". Defaults to "memmap".
+        directory (Union[str,pathlib.Path], optional): Directory for the ``.npy`` files when
+            using "memmap". Defaults to the system's temporary directory.
+    """
+
+    def __init__(self, array, method="memmap", directory=None):
+        if method not in SHARE_METHODS:
+            raise ValueError(
+                f"Unknown share method {method}, must be one of {', '.join(SHARE_METHODS)}."
+            )
+
+        array = np.ascontiguousarray(array)
+
+        self.method = method
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self._shm = None
+
+        if method == "shared_memory":
+            self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self.name = self._shm.name
+            np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)[...] = array
+        else:
+            directory = Path(directory or tempfile.gettempdir())
+            self.name = str(directory / f"rsmf-{uuid.uuid4().hex}.npy")
+            np.save(self.name, array)
+
+    def __getstate__(self):
+        return {"method": self.method, "name": self.name, "shape": self.shape, "dtype": self.dtype}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+
+    @property
+    def array(self):
+        """numpy.ndarray: Read-only view of the shared array."""
+        if self.method == "memmap":
+            return np.load(self.name, mmap_mode="r")
+
+        shm = self._shm or _ATTACHED.get(self.name)
+        if shm is None:
+            shm = _ATTACHED[self.name] = shared_memory.SharedMemory(name=self.name)
+
+        view = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+        view.flags.writeable = False
+
+        return view
+
+    def release(self):
+        """Free the shared array. Must only be called by the process that created it."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+        elif self.method == "memmap":
+            Path(self.name).unlink(missing_ok=True)
+
+
+def _share_job(job, method, directory, min_shared_bytes, handles):
+    """Replace the large arrays of a job by shared array handles."""
+    shared_job = {}
+
+    for key, value in job.items():
+        if isinstance(value, np.ndarray) and value.nbytes >= min_shared_bytes:
+            value = SharedArray(value, method=method, directory=directory)
+            handles.append(value)
+
+        shared_job[key] = value
+
+    return shared_job
+
+
+def current_rss():
+    """Resident set size of this process.
+
+    Returns:
+        Union[int,NoneType]: The size in bytes. Where the current size is not available, the
+            peak size, see :func:`peak_rss`.
+    """
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return peak_rss()
+
+
+def peak_rss():
+    """Largest resident set size this process had so far.
+
+    Returns:
+        Union[int,NoneType]: The size in bytes, or None if it is not available, e.g. on
+            Windows.
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class BatchResults(list):
+    """Return values of the jobs of a batch, in order, with statistics of the workers.
+
+    Attributes:
+        workers (List[Dict]): For every worker process in the order they were started, its
+            ``pid``, the number of ``jobs`` it rendered, its ``peak_rss`` in bytes and the
+            ``reason`` why it was recycled: "jobs" after ``max_jobs_per_worker`` jobs,
+            "memory" after exceeding ``max_rss`` or None at the end of the batch.
+    """
+
+    def __init__(self, values, workers):
+        super().__init__(values)
+        self.workers = workers
+
+
+def _render_job(formatter, render, job):
+    """Render a job and close the figures it created."""
+    figures = set(plt.get_fignums())
+
+    try:
+        return _run_job(formatter, render, job)
+    finally:
+        for number in set(plt.get_fignums()) - figures:
+            plt.close(number)
+
+
+def _worker(formatter, render, tasks, results, counters, *, rc, max_jobs, max_rss):
+    """Render jobs until there are none left or a limit of the worker is reached.
+
+    ``counters`` holds the number of jobs taken by all workers and the index of the job this
+    worker renders. They are shared memory, which outlives the process if it is killed.
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+    taken, current = counters
+    formatter.activate()
+    if rc is not None:
+        mpl.rcParams.update(rc)
+    pid = os.getpid()
+    jobs = 0
+    reason = None
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        index, job = task
+        with taken.get_lock():
+            taken.value += 1
+            current.value = index
+
+        try:
+            payload = pickle.dumps((True, _render_job(formatter, render, job)))
+        except Exception as error:  # pylint: disable=broad-except
+            try:
+                payload = pickle.dumps((False, error))
+            except Exception:  # pylint: disable=broad-except
+                payload = pickle.dumps((False, RuntimeError(traceback.format_exc())))
+
+        results.put(("done", pid, index, payload))
+        current.value = -1
+        jobs += 1
+
+        if max_jobs is not None and jobs >= max_jobs:
+            reason = "jobs"
+        elif max_rss is not None and (current_rss() or 0) > max_rss:
+            reason = "memory"
+
+        if reason is not None:
+            break
+
+    results.put(("exit", pid, {"pid": pid, "jobs": jobs, "peak_rss": peak_rss(), "reason": reason}))
+
+
+class _Workers:
+    """Worker processes that are replaced when they retire, until all jobs are done."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, formatter, render, processes, *, rc, max_jobs, max_rss):
+        # pylint: disable=too-many-arguments
+        self._args = (formatter, render)
+        self._options = {"rc": rc, "max_jobs": max_jobs, "max_rss": max_rss}
+        self._processes = processes
+        self.tasks = multiprocessing.Queue()
+        self.results = multiprocessing.Queue()
+        self.taken = multiprocessing.Value("q", 0)
+        self.running = {}
+        self.current = {}
+        self.statistics = {}
+        self.started = []
+
+    def start(self):
+        """Start a new worker."""
+        current = multiprocessing.Value("q", -1, lock=False)
+        process = multiprocessing.Process(
+            target=_worker,
+            args=self._args + (self.tasks, self.results, (self.taken, current)),
+            kwargs=self._options,
+            daemon=True,
+        )
+        process.start()
+        self.running[process.pid] = process
+        self.current[process.pid] = current
+        self.started.append(process.pid)
+
+    def job(self, pid):
+        """Index of the job a worker renders, or None if it is idle."""
+        index = self.current[pid].value
+
+        return None if index < 0 else index
+
+    def fill(self, jobs):
+        """Start workers until there is an idle one for every job that was not taken yet."""
+        with self.taken.get_lock():
+            untaken = jobs - self.taken.value
+            idle = sum(self.job(pid) is None for pid in self.running)
+
+        while len(self.running) < self._processes and idle < untaken:
+            self.start()
+            idle += 1
+
+    def retire(self, pid, statistics):
+        """Wait for a worker that stopped taking jobs."""
+        self.statistics[pid] = statistics
+        self.running.pop(pid).join()
+
+    def dead(self):
+        """Workers that ended without retiring, e.g. because they were killed."""
+        return [pid for pid, process in self.running.items() if not process.is_alive()]
+
+    def stop(self):
+        """Let the remaining workers finish and wait for them."""
+        for _ in self.running:
+            self.tasks.put(None)
+
+        while self.running:
+            # Workers that died before waiting have sent all their messages
+            dead = self.dead()
+            try:
+                message = self.results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                for pid in dead:
+                    self.running.pop(pid).join()
+                continue
+
+            if message[0] == "exit":
+                self.retire(message[1], message[2])
+
+    def terminate(self):
+        """Kill all workers."""
+        # Jobs that were not taken are dropped
+        self.tasks.cancel_join_thread()
+
+        for process in self.running.values():
+            process.terminate()
+            process.join()
+        self.running.clear()
+
+    def worker_statistics(self):
+        """Statistics of all workers in the order they were started."""
+        return [self.statistics[pid] for pid in self.started if pid in self.statistics]
+
+
+def _run_jobs(formatter, render, jobs, processes, *, rc, max_jobs, max_rss):
+    """Render jobs in recycled worker processes and return their results in order."""
+    # pylint: disable=too-many-arguments,too-many-locals
+    processes = processes or os.cpu_count() or 1
+    workers = _Workers(formatter, render, processes, rc=rc, max_jobs=max_jobs, max_rss=max_rss)
+    values = [None] * len(jobs)
+    done = 0
+
+    for index, job in enumerate(jobs):
+        workers.tasks.put((index, job))
+
+    try:
+        workers.fill(len(jobs))
+
+        while done < len(jobs):
+            # Workers that died before waiting have sent all their messages
+            dead = workers.dead()
+            try:
+                message = workers.results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                for pid in dead:
+                    index = workers.job(pid)
+                    if index is not None:
+                        raise RuntimeError(
+                            f"Worker {pid} died with exit code {workers.running[pid].exitcode} "
+                            f"while rendering job {index}, e.g. because it ran out of memory."
+                        ) from None
+                    workers.running.pop(pid).join()
+                workers.fill(len(jobs))
+                continue
+
+            if message[0] == "done":
+                success, value = pickle.loads(message[3])
+                if not success:
+                    raise value
+                values[message[2]] = value
+                done += 1
+            else:
+                workers.retire(message[1], message[2])
+                workers.fill(len(jobs))
+
+        workers.stop()
+    except BaseException:
+        workers.terminate()
+        raise
+
+    return BatchResults(values, workers.worker_statistics())
+
+
+def _run_job(formatter, render, job):
+    """Resolve the shared arrays of a job and render it."""
+    job = {
+        key: value.array if isinstance(value, SharedArray) else value for key, value in job.items()
+    }
+
+    return render(formatter, **job)
+
+
+# pylint: disable=too-many-arguments
+def render_batch(
+    formatter,
+    render,
+    jobs,
+    *,
+    processes=None,
+    share="memmap",
+    min_shared_bytes=2**20,
+    max_jobs_per_worker=None,
+    max_rss=None,
+    rc=None,
+):
+    """Render figures in parallel worker processes.
+
+    See :meth:`rsmf.abstract_formatter.AbstractFormatter.render_batch`.
+
+    Args:
+        formatter (AbstractFormatter): The formatter used in the workers.
+        render (callable): Module level function that renders a single job.
+        jobs (Iterable[dict]): Keyword arguments for the individual renders.
+        processes (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        share (str, optional): Either "memmap" or "shared_memory". Defaults to "memmap".
+        min_shared_bytes (int, optional): Arrays smaller than this are pickled as usual.
+            Defaults to 1 MiB.
+        max_jobs_per_worker (int, optional): Replace a worker by a fresh process after it
+            rendered this many jobs. Defaults to None, which keeps the workers.
+        max_rss (int, optional): Replace a worker by a fresh process after a job left it with
+            a resident set size of more than this many bytes. Defaults to None.
+        rc (dict, optional): rcParams that are set in the workers after activating the
+            formatter, e.g. those of the calling process. Defaults to None, which keeps the
+            rcParams of the formatter.
+
+    Returns:
+        BatchResults: The return values of ``render`` in the order of the jobs.
+    """
+    if share not in SHARE_METHODS:
+        raise ValueError(
+            f"Unknown share method {share}, must be one of {', '.join(SHARE_METHODS)}."
+        )
+
+    handles = []
+
+    with tempfile.TemporaryDirectory(prefix="rsmf-") as directory:
+        try:
+            jobs = [_share_job(job, share, directory, min_shared_bytes, handles) for job in jobs]
+
+            return _run_jobs(
+                formatter,
+                render,
+                jobs,
+                processes,
+                rc=rc,
+                max_jobs=max_jobs_per_worker,
+                max_rss=max_rss,
+            )
+        finally:
+            for handle in handles:
+                handle.release()
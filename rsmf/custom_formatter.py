@@ -21,13 +21,29 @@ class CustomFormatter(AbstractFormatter):
             Defaults to 10.
         pgf_preamble (str, optional): Additional packages to include in the PGF preamble,
             e.g. for exchanging fonts or defining commands. Defaults to "".
+        font_family (str, optional): Font family of the document, either "serif", "sans-serif"
+            or "monospace". Defaults to None, which keeps the family of the matplotlib style.
     """
 
-    def __init__(self, columnwidth=None, wide_columnwidth=None, fontsizes=10, pgf_preamble=""):
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        columnwidth=None,
+        wide_columnwidth=None,
+        fontsizes=10,
+        pgf_preamble="",
+        font_family=None,
+    ):
         self._columnwidth = columnwidth
         self._wide_columnwidth = wide_columnwidth
         self._pgf_preamble = pgf_preamble
 
+        if font_family is not None:
+            self.font_family = font_family
+            self._set_font_family = True
+        else:
+            self._set_font_family = False
+
         if isinstance(fontsizes, int):
             self._fontsizes = DEFAULT_FONTSIZES[fontsizes]
         else:
@@ -47,8 +63,20 @@ class CustomFormatter(AbstractFormatter):
     def fontsizes(self):
         return self._fontsizes
 
+    def _configuration(self):
+        return (
+            self.columnwidth,
+            self.wide_columnwidth,
+            self.fontsizes,
+            self._pgf_preamble,
+            self.font_family if self._set_font_family else None,
+        )
+
     def set_rcParams(self):
         """Adjust the rcParams to the default values."""
         super().set_rcParams()
 
         plt.rcParams["pgf.preamble"] = self._pgf_preamble
+
+        if self._set_font_family:
+            plt.rcParams["font.family"] = self.font_family
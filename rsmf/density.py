@@ -0,0 +1,157 @@
+"""
+Density aggregation of scatter plots with too many points to draw individually.
+"""
+
+import math
+
+import matplotlib as mpl
+import numpy as np
+
+DEFAULT_CHUNKSIZE = 2**22
+"""Number of points that are binned at once."""
+
+SCATTER_ONLY_KWARGS = ("s", "c", "marker", "plotnonfinite")
+"""Arguments of ``matplotlib.axes.Axes.scatter`` that do not apply to the density plot."""
+
+
+def _chunks(x, y, chunksize):
+    """Iterate over finite pairs of coordinates in chunks."""
+    for start in range(0, len(x), chunksize):
+        chunk_x = np.asarray(x[start : start + chunksize], dtype=float)
+        chunk_y = np.asarray(y[start : start + chunksize], dtype=float)
+        finite = np.isfinite(chunk_x) & np.isfinite(chunk_y)
+
+        yield chunk_x[finite], chunk_y[finite]
+
+
+def data_range(x, y, chunksize=DEFAULT_CHUNKSIZE):
+    """Compute the range of the finite data points chunk by chunk.
+
+    Args:
+        x (numpy.ndarray): Horizontal coordinates, may be memory-mapped.
+        y (numpy.ndarray): Vertical coordinates, may be memory-mapped.
+        chunksize (int, optional): Number of points processed at once.
+
+    Returns:
+        Tuple[Tuple[float,float],Tuple[float,float]]: The horizontal and vertical ranges.
+    """
+    x_min = y_min = math.inf
+    x_max = y_max = -math.inf
+
+    for chunk_x, chunk_y in _chunks(x, y, chunksize):
+        if len(chunk_x):
+            x_min, x_max = min(x_min, chunk_x.min()), max(x_max, chunk_x.max())
+            y_min, y_max = min(y_min, chunk_y.min()), max(y_max, chunk_y.max())
+
+    if x_min > x_max:
+        raise ValueError("The data contains no finite points.")
+
+    return (float(x_min), float(x_max)), (float(y_min), float(y_max))
+
+
+# pylint: disable=too-many-locals
+def histogram2d(x, y, bins, extent=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Count points on a regular grid, processing the data in chunks.
+
+    Only one chunk of the data is in memory at a time, so the coordinates can be
+    memory-mapped arrays that are larger than the available memory.
+
+    Args:
+        x (numpy.ndarray): Horizontal coordinates.
+        y (numpy.ndarray): Vertical coordinates.
+        bins (Tuple[int,int]): Number of bins in horizontal and vertical direction.
+        extent (Tuple[Tuple[float,float],Tuple[float,float]], optional): The horizontal and
+            vertical ranges of the grid. Defaults to the range of the data.
+        chunksize (int, optional): Number of points processed at once.
+
+    Returns:
+        Tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]: The counts of shape
+            (vertical bins, horizontal bins) and the horizontal and vertical bin edges.
+    """
+    if extent is None:
+        extent = data_range(x, y, chunksize)
+
+    n_x, n_y = bins
+    (x_min, x_max), (y_min, y_max) = extent
+    x_scale = n_x / ((x_max - x_min) or 1.0)
+    y_scale = n_y / ((y_max - y_min) or 1.0)
+
+    counts = np.zeros(n_x * n_y, dtype=np.int64)
+
+    for chunk_x, chunk_y in _chunks(x, y, chunksize):
+        index_x = np.floor((chunk_x - x_min) * x_scale).astype(np.int64)
+        index_y = np.floor((chunk_y - y_min) * y_scale).astype(np.int64)
+
+        # Points on the upper edges belong to the last bin
+        index_x[chunk_x == x_max] = n_x - 1
+        index_y[chunk_y == y_max] = n_y - 1
+
+        inside = (index_x >= 0) & (index_x < n_x) & (index_y >= 0) & (index_y < n_y)
+        counts += np.bincount(index_y[inside] * n_x + index_x[inside], minlength=n_x * n_y)
+
+    x_edges = np.linspace(x_min, x_max, n_x + 1)
+    y_edges = np.linspace(y_min, y_max, n_y + 1)
+
+    return counts.reshape(n_y, n_x), x_edges, y_edges
+
+
+def grid_shape(ax, markersize=None):
+    """Number of bins such that each bin is about as large as a marker.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes the data is drawn into.
+        markersize (float, optional): Size of a marker in points.
+            Defaults to ``rcParams["lines.markersize"]``.
+
+    Returns:
+        Tuple[int,int]: Number of bins in horizontal and vertical direction.
+    """
+    markersize = markersize or mpl.rcParams["lines.markersize"]
+    fig_width, fig_height = ax.figure.get_size_inches()
+    position = ax.get_position()
+
+    width = position.width * fig_width * 72
+    height = position.height * fig_height * 72
+
+    return max(1, round(width / markersize)), max(1, round(height / markersize))
+
+
+# pylint: disable=too-many-arguments
+def scatter(ax, x, y, threshold, *, markersize=None, chunksize=DEFAULT_CHUNKSIZE, **kwargs):
+    """Draw a scatter plot, or a density plot for more than ``threshold`` points.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes to draw into.
+        x (numpy.ndarray): Horizontal coordinates.
+        y (numpy.ndarray): Vertical coordinates.
+        threshold (int): Number of points above which the density is drawn.
+        markersize (float, optional): Size of a marker in points, determines the size of the
+            bins. Defaults to the square root of a scalar ``s`` or else
+            ``rcParams["lines.markersize"]``.
+        chunksize (int, optional): Number of points processed at once.
+        **kwargs: Passed on to ``matplotlib.axes.Axes.scatter`` or
+            ``matplotlib.axes.Axes.pcolormesh``, respectively. The arguments of the markers,
+            see :data:`SCATTER_ONLY_KWARGS`, are left out of the density plot.
+
+    Returns:
+        Union[matplotlib.collections.PathCollection,matplotlib.collections.QuadMesh]: The
+            scatter or density plot.
+    """
+    if len(x) != len(y):
+        raise ValueError("x and y must have the same length.")
+
+    if len(x) <= threshold:
+        return ax.scatter(x, y, **kwargs)
+
+    size = kwargs.get("s")
+    if markersize is None and size is not None and np.ndim(size) == 0:
+        markersize = math.sqrt(size)
+    for name in SCATTER_ONLY_KWARGS:
+        kwargs.pop(name, None)
+
+    counts, x_edges, y_edges = histogram2d(x, y, grid_shape(ax, markersize), chunksize=chunksize)
+
+    kwargs.setdefault("norm", "log")
+    kwargs.setdefault("rasterized", True)
+
+    return ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts, 0), **kwargs)
@@ -0,0 +1,259 @@
+"""
+Saving figures in one or more formats through a formatter.
+"""
+
+import contextlib
+import math
+import os
+import re
+import tempfile
+from pathlib import Path
+
+import matplotlib as mpl
+from matplotlib.backends.backend_pgf import FigureCanvasPgf, make_pdf_to_png_converter
+
+from .metrics import TEX_POINTS_PER_INCH
+
+_LENGTH_REGEX = re.compile(rb"(-?\d+\.\d+)(in|pt)")
+
+_PGFTEXT_REGEX = re.compile(rb"\\pgftext(\[[^\]]*\])?\{")
+
+
+def _closing_brace(data, start):
+    """Index of the brace that closes a group whose content starts at ``start``."""
+    depth = 1
+    index = start
+
+    while index < len(data):
+        char = data[index : index + 1]
+        if char == b"\\":
+            index += 1
+        elif char == b"{":
+            depth += 1
+        elif char == b"}":
+            depth -= 1
+            if depth == 0:
+                return index
+        index += 1
+
+    return len(data)
+
+
+@contextlib.contextmanager
+def frozen_layout(fig):
+    """Run the layout of a figure once and keep it fixed while the context is active.
+
+    Args:
+        fig (matplotlib.Figure): The figure whose layout is frozen.
+    """
+    engine = fig.get_layout_engine()
+
+    if engine is None:
+        yield
+        return
+
+    fig.draw_without_rendering()
+    fig.set_layout_engine("none")
+    try:
+        yield
+    finally:
+        fig.set_layout_engine(engine)
+
+
+def decimals(precision):
+    """Number of decimals needed to write lengths in points and inches with a precision.
+
+    Args:
+        precision (float): The precision in points.
+
+    Returns:
+        Tuple[int,int]: The decimals of lengths in points and in inches.
+    """
+    return (
+        max(0, math.ceil(-math.log10(precision))),
+        max(0, math.ceil(-math.log10(precision / TEX_POINTS_PER_INCH))),
+    )
+
+
+def round_pgf(path, precision):
+    """Round all lengths in a PGF file and drop trailing zeros.
+
+    The text of ``\\pgftext`` is kept as it is, so labels like "2.54in" are not changed.
+
+    Args:
+        path (Union[str,pathlib.Path]): The PGF file, it is rewritten in place.
+        precision (float): The precision of the lengths in points.
+    """
+    pt_decimals, in_decimals = decimals(precision)
+
+    def _round(match):
+        digits = pt_decimals if match.group(2) == b"pt" else in_decimals
+        value = f"{float(match.group(1)):.{digits}f}"
+        if "." in value:
+            value = value.rstrip("0").rstrip(".")
+        if value == "-0":
+            value = "0"
+
+        return value.encode("ascii") + match.group(2)
+
+    path = Path(path)
+    data = path.read_bytes()
+    parts = []
+    position = 0
+
+    for match in _PGFTEXT_REGEX.finditer(data):
+        if match.start() < position:  # Part of the text of a previous \pgftext
+            continue
+        end = _closing_brace(data, match.end())
+        parts.append(_LENGTH_REGEX.sub(_round, data[position : match.end()]))
+        parts.append(data[match.end() : end])
+        position = end
+
+    parts.append(_LENGTH_REGEX.sub(_round, data[position:]))
+    path.write_bytes(b"".join(parts))
+
+
+def simplify_threshold(tolerance, dpi):
+    """Convert a simplification tolerance into matplotlib's ``path.simplify_threshold``.
+
+    Args:
+        tolerance (float): Largest deviation of a simplified path from the original in points.
+        dpi (float): Resolution at which the figure is saved.
+
+    Returns:
+        float: The threshold in pixels. matplotlib only accepts thresholds of at most one pixel.
+    """
+    return tolerance / TEX_POINTS_PER_INCH * dpi
+
+
+def output_format(fname, kwargs):
+    """Format in which a figure is saved.
+
+    Args:
+        fname (Union[str,pathlib.Path]): Path of the output file.
+        kwargs (dict): Keyword arguments of ``matplotlib.Figure.savefig``.
+
+    Returns:
+        Union[str,NoneType]: The format in lower case, or None if it is determined by
+            matplotlib's default for file-like outputs.
+    """
+    fmt = kwargs.get("format")
+    if fmt is None:
+        if not isinstance(fname, (str, os.PathLike)):
+            return None
+
+        fmt = Path(fname).suffix.lstrip(".")
+
+    return fmt.lower()
+
+
+def is_pgf(fname, kwargs):
+    """Whether a figure is saved as PGF code.
+
+    Args:
+        fname (Union[str,pathlib.Path]): Path of the output file.
+        kwargs (dict): Keyword arguments of ``matplotlib.Figure.savefig``.
+
+    Returns:
+        bool: Whether the output format is PGF.
+    """
+    return output_format(fname, kwargs) == "pgf"
+
+
+def is_pdf(fname, kwargs):
+    """Whether a figure is saved as PDF.
+
+    Args:
+        fname (Union[str,pathlib.Path]): Path of the output file.
+        kwargs (dict): Keyword arguments of ``matplotlib.Figure.savefig``.
+
+    Returns:
+        bool: Whether the output format is PDF.
+    """
+    return output_format(fname, kwargs) == "pdf"
+
+
+def savefig(fig, fname, precision=None, simplify=None, **kwargs):
+    """Save a single figure.
+
+    Args:
+        fig (matplotlib.Figure): The figure to be saved.
+        fname (Union[str,pathlib.Path]): Path of the output file.
+        precision (float, optional): Precision of the lengths in PGF output in points. Lengths
+            are written with the corresponding number of decimals. Defaults to None, which
+            keeps the precision of matplotlib.
+        simplify (float, optional): Largest deviation of simplified paths from the originals
+            in PGF output in points. Defaults to None, which keeps ``path.simplify_threshold``.
+        **kwargs: Passed on to ``matplotlib.Figure.savefig``.
+
+    Returns:
+        pathlib.Path: Path of the written file.
+    """
+    if not is_pgf(fname, kwargs):
+        fig.savefig(fname, **kwargs)
+        return Path(fname)
+
+    rc = {}
+    if simplify is not None:
+        dpi = kwargs.get("dpi", mpl.rcParams["savefig.dpi"])
+        if dpi == "figure":
+            dpi = fig.dpi
+
+        rc = {
+            "path.simplify": True,
+            "path.simplify_threshold": min(1.0, simplify_threshold(simplify, dpi)),
+        }
+
+    with mpl.rc_context(rc):
+        fig.savefig(fname, **kwargs)
+
+    if precision is not None:
+        round_pgf(fname, precision)
+
+    return Path(fname)
+
+
+def export(fig, name, formats=("pgf", "pdf"), save=savefig, **kwargs):
+    """Save a figure in several formats with a single layout and typesetting pass.
+
+    The layout is computed once and kept for all formats. With the PGF backend, the
+    PDF is typeset with a single LaTeX run and the PNG is rasterized from that PDF,
+    instead of running LaTeX once per format.
+
+    Args:
+        fig (matplotlib.Figure): The figure to be exported.
+        name (Union[str,pathlib.Path]): Path of the output files without extension.
+        formats (Iterable[str], optional): File extensions of the outputs. Defaults to
+            ("pgf", "pdf").
+        save (callable, optional): Function used to save a single file, called as
+            ``save(fig, fname, **kwargs)``. Defaults to :func:`savefig`.
+        **kwargs: Passed on to ``matplotlib.Figure.savefig``.
+
+    Returns:
+        List[pathlib.Path]: Paths of the written files in the order of ``formats``.
+    """
+    formats = [fmt.lower().lstrip(".") for fmt in formats]
+    paths = {fmt: Path(f"{name}.{fmt}") for fmt in formats}
+
+    pgf_canvas = isinstance(fig.canvas, FigureCanvasPgf)
+
+    with frozen_layout(fig), tempfile.TemporaryDirectory(prefix="rsmf-") as tmpdir:
+        for fmt in formats:
+            if pgf_canvas and fmt == "png":
+                continue
+
+            save(fig, paths[fmt], format=fmt, **kwargs)
+
+        if pgf_canvas and "png" in formats:
+            pdf_path = paths["pdf"] if "pdf" in formats else Path(tmpdir, "figure.pdf")
+            if "pdf" not in formats:
+                fig.savefig(pdf_path, format="pdf", **kwargs)
+
+            dpi = kwargs.get("dpi", mpl.rcParams["savefig.dpi"])
+            if dpi == "figure":
+                dpi = fig.dpi
+
+            converter = make_pdf_to_png_converter()
+            converter(pdf_path, paths["png"], dpi=dpi)
+
+    return [paths[fmt] for fmt in formats]
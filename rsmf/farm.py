@@ -0,0 +1,391 @@
+"""
+Rendering of figures by workers on several machines that share a filesystem, e.g. via NFS.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import socket
+import sys
+import time
+import traceback
+import uuid
+from pathlib import Path
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+
+from .batch import SharedArray, _share_job
+from .texcache import atomic_write
+
+_log = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 1.0
+"""Default time in seconds between two looks for new jobs."""
+
+_DIRECTORIES = ("pending", "claimed", "done", "results", "data")
+
+
+def _worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class JobQueue:
+    """Queue of render jobs in a directory that all nodes can access.
+
+    Every job is a file that moves through the subdirectories of the queue:
+
+    * ``pending``: jobs waiting for a worker.
+    * ``claimed``: jobs being rendered. A worker claims a job by renaming it into this
+      directory, which is atomic, so every job is claimed by exactly one worker.
+    * ``done``: rendered jobs, whose results are in ``results``.
+
+    Large arrays of the jobs are stored as memory-mapped files in ``data``. When all jobs of a
+    batch are done, a manifest ``results/<batch>.manifest.json`` lists which node rendered
+    which job, how long it took and whether it failed.
+
+    Args:
+        directory (Union[str,pathlib.Path]): Directory of the queue, created if necessary.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+        for name in _DIRECTORIES:
+            (self.directory / name).mkdir(parents=True, exist_ok=True)
+
+    def enqueue(self, formatter, render, jobs, min_shared_bytes=2**20):
+        """Add a batch of jobs to the queue.
+
+        The workers render with the rcParams that are active when the jobs are enqueued.
+
+        Args:
+            formatter (AbstractFormatter): The formatter with which the workers render.
+            render (callable): Function that renders a single job as ``render(formatter, **job)``.
+                It has to be importable by the workers, i.e. defined at the top level of a
+                module other than the script that is run.
+            jobs (Iterable[dict]): Keyword arguments for the individual renders.
+            min_shared_bytes (int, optional): Arrays of at least this size are stored as
+                separate memory-mapped files. Defaults to 1 MiB.
+
+        Returns:
+            List[str]: Names of the jobs, in order.
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        # Imported here, as the formatter imports this module for render_farm
+        from .abstract_formatter import _current_rc
+
+        if getattr(render, "__module__", None) == "__main__":
+            raise ValueError(
+                "The render function has to be defined in an importable module, not in the "
+                "script that is run, so that workers on other nodes can load it."
+            )
+
+        # Jobs are claimed in the order of their names, i.e. first come first served
+        batch = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        self._data_directory(batch).mkdir()
+        rc = _current_rc()
+        names = []
+
+        for index, job in enumerate(jobs):
+            name = f"{batch}-{index:06d}"
+            job = _share_job(job, "memmap", self._data_directory(batch), min_shared_bytes, [])
+            for value in job.values():
+                if isinstance(value, SharedArray):
+                    # Nodes may mount the queue elsewhere, so the data is found relative to it
+                    value.name = str(Path(value.name).relative_to(self.directory))
+            data = pickle.dumps((formatter, rc, render, job), protocol=pickle.HIGHEST_PROTOCOL)
+            atomic_write(self.directory / "pending" / f"{name}.job", data)
+            names.append(name)
+
+        return names
+
+    def claim(self):
+        """Claim the oldest pending job.
+
+        Returns:
+            Union[pathlib.Path,NoneType]: Path of the claimed job, or None if no job is
+                pending.
+        """
+        for path in sorted((self.directory / "pending").glob("*.job")):
+            claimed = self.directory / "claimed" / f"{path.name}.{_worker_id()}"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:  # Claimed by another worker
+                continue
+
+            # The age of a claim, see recover, starts now
+            os.utime(claimed)
+
+            return claimed
+
+        return None
+
+    def run(self, claimed):
+        """Render a claimed job and store its result.
+
+        Every job is rendered with its formatter and rcParams activated afresh, and the figures
+        it creates are closed afterwards, so nothing carries over to the next job.
+
+        Args:
+            claimed (pathlib.Path): Path of the claimed job.
+        """
+        name = claimed.name.split(".job.", 1)[0]
+        start = time.perf_counter()
+        record = {"name": name, "worker": _worker_id()}
+        figures = set(plt.get_fignums())
+
+        try:
+            formatter, rc, render, job = pickle.loads(claimed.read_bytes())
+            formatter.activate()
+            mpl.rcParams.update(rc)
+            job = {key: self._shared_array(value) for key, value in job.items()}
+            record["value"] = render(formatter, **job)
+        except Exception:  # pylint: disable=broad-except
+            record["error"] = traceback.format_exc()
+            _log.warning("Job %s failed:\n%s", name, record["error"])
+        finally:
+            for number in set(plt.get_fignums()) - figures:
+                plt.close(number)
+
+        record["seconds"] = time.perf_counter() - start
+
+        try:
+            data = pickle.dumps(record)
+        except Exception:  # pylint: disable=broad-except
+            record["error"] = traceback.format_exc()
+            del record["value"]
+            data = pickle.dumps(record)
+
+        atomic_write(self._result_path(name), data)
+
+        # The job may have been put back by recover, in which case it is rendered again
+        with contextlib.suppress(FileNotFoundError):
+            os.replace(claimed, self.directory / "done" / f"{name}.job")
+
+    def _shared_array(self, value):
+        """The array of a shared array handle, whose path is relative to the queue."""
+        if not isinstance(value, SharedArray):
+            return value
+
+        value.name = str(self.directory / value.name)
+
+        return value.array
+
+    def _result_path(self, name):
+        return self.directory / "results" / f"{name}.result"
+
+    def _data_directory(self, batch):
+        return self.directory / "data" / batch
+
+    def recover(self, max_age):
+        """Put jobs back into the queue whose workers seem to have died.
+
+        Args:
+            max_age (float): Time in seconds after which a claimed job is considered to be
+                abandoned. Has to be longer than any render takes.
+
+        Returns:
+            int: Number of jobs that were put back.
+        """
+        recovered = 0
+        now = time.time()
+
+        for claimed in (self.directory / "claimed").iterdir():
+            try:
+                if now - claimed.stat().st_mtime < max_age:
+                    continue
+                name = claimed.name.split(".job.", 1)[0]
+                os.rename(claimed, self.directory / "pending" / f"{name}.job")
+            except FileNotFoundError:  # Finished or recovered by someone else
+                continue
+
+            recovered += 1
+
+        return recovered
+
+    def work(self, poll_interval=DEFAULT_POLL_INTERVAL, idle_timeout=None):
+        """Render jobs until the queue stays empty.
+
+        Args:
+            poll_interval (float, optional): Time in seconds between two looks for new jobs.
+                Defaults to 1 second.
+            idle_timeout (float, optional): Stop after finding no pending job for this many
+                seconds, 0 stops as soon as the queue is empty. Defaults to None, which
+                waits for jobs forever.
+
+        Returns:
+            int: Number of rendered jobs.
+        """
+        rendered = 0
+        idle_since = time.monotonic()
+
+        while True:
+            claimed = self.claim()
+
+            if claimed is not None:
+                self.run(claimed)
+                rendered += 1
+                idle_since = time.monotonic()
+            elif idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+                return rendered
+            else:
+                time.sleep(poll_interval)
+
+    def collect(self, names, poll_interval=DEFAULT_POLL_INTERVAL, timeout=None):
+        """Wait for jobs to be rendered, write the manifest of their batch and return results.
+
+        Args:
+            names (List[str]): Names of the jobs as returned by :meth:`enqueue`.
+            poll_interval (float, optional): Time in seconds between two checks.
+                Defaults to 1 second.
+            timeout (float, optional): Raise a TimeoutError if the jobs are not done after this
+                many seconds. Defaults to None, which waits forever.
+
+        Returns:
+            List: The return values of the render function in the order of the jobs.
+        """
+        start = time.monotonic()
+
+        while not all(self._result_path(name).exists() for name in names):
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"The jobs were not done within {timeout} seconds.")
+            time.sleep(poll_interval)
+
+        records = [pickle.loads(self._result_path(name).read_bytes()) for name in names]
+        batch = self._write_manifest(records)
+        shutil.rmtree(self._data_directory(batch), ignore_errors=True)
+
+        failed = [record for record in records if "error" in record]
+        if failed:
+            raise RuntimeError(
+                f"{len(failed)} of {len(records)} jobs failed, the first one "
+                f"({failed[0]['name']}) with:\n{failed[0]['error']}"
+            )
+
+        return [record["value"] for record in records]
+
+    def _write_manifest(self, records):
+        """Write the manifest of a batch and return the name of the batch."""
+        batch = records[0]["name"].rsplit("-", 1)[0] if records else "empty"
+        manifest = {
+            "jobs": [
+                {
+                    "name": record["name"],
+                    "worker": record["worker"],
+                    "seconds": round(record["seconds"], 4),
+                    "status": "failed" if "error" in record else "done",
+                    "result": self._result_path(record["name"]).name,
+                }
+                for record in records
+            ],
+            "workers": sorted({record["worker"] for record in records}),
+        }
+
+        atomic_write(
+            self.directory / "results" / f"{batch}.manifest.json",
+            json.dumps(manifest, indent=2).encode("utf-8"),
+        )
+
+        return batch
+
+
+def _work(directory, poll_interval):
+    """Entry point of local worker processes."""
+    JobQueue(directory).work(poll_interval=poll_interval, idle_timeout=0)
+
+
+# pylint: disable=too-many-arguments
+def render_farm(
+    formatter,
+    render,
+    jobs,
+    directory,
+    local_workers=0,
+    *,
+    poll_interval=DEFAULT_POLL_INTERVAL,
+    timeout=None,
+):
+    """Render figures through a job queue on a shared filesystem.
+
+    See :meth:`rsmf.abstract_formatter.AbstractFormatter.render_farm`.
+
+    Args:
+        formatter (AbstractFormatter): The formatter used by the workers.
+        render (callable): Importable function that renders a single job.
+        jobs (Iterable[dict]): Keyword arguments for the individual renders.
+        directory (Union[str,pathlib.Path]): Directory of the queue on the shared filesystem.
+        local_workers (int, optional): Number of worker processes started on this machine,
+            which stop once the queue is empty. Defaults to 0.
+        poll_interval (float, optional): Time in seconds between two checks of the queue.
+            Defaults to 1 second.
+        timeout (float, optional): Raise a TimeoutError if the jobs are not done after this
+            many seconds. Defaults to None, which waits forever.
+
+    Returns:
+        List: The return values of ``render`` in the order of the jobs.
+    """
+    queue = JobQueue(directory)
+    names = queue.enqueue(formatter, render, jobs)
+
+    workers = [
+        multiprocessing.Process(target=_work, args=(str(queue.directory), poll_interval))
+        for _ in range(local_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    try:
+        return queue.collect(names, poll_interval=poll_interval, timeout=timeout)
+    finally:
+        for worker in workers:
+            worker.join()
+
+
+def main(argv=None):
+    """Run a worker: ``python -m rsmf.farm DIRECTORY``.
+
+    Returns:
+        int: The exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m rsmf.farm", description="Render figures from a shared job queue."
+    )
+    parser.add_argument("directory", help="directory of the queue")
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help="seconds between two looks for new jobs",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=None,
+        help="stop after the queue was empty for this many seconds",
+    )
+    parser.add_argument(
+        "--recover-after",
+        type=float,
+        default=None,
+        help="first put back jobs that were claimed longer than this many seconds ago",
+    )
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.directory)
+    if args.recover_after is not None:
+        queue.recover(args.recover_after)
+
+    rendered = queue.work(poll_interval=args.poll_interval, idle_timeout=args.idle_timeout)
+    print(f"Rendered {rendered} jobs.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
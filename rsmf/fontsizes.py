@@ -19,11 +19,26 @@ class Fontsizes:
         LARGE (int, optional): Even more large text. Defaults to 17.
         huge (int, optional): Huge text. Defaults to 20.
         Huge (int, optional): Even more huge text. Defaults to 25.
+
+    Fontsizes are immutable and hashable, so they can be compared and used as keys of caches.
     """
 
     # pylint: disable=invalid-name,too-many-instance-attributes,too-many-arguments
     # pylint: disable=too-few-public-methods
 
+    __slots__ = (
+        "tiny",
+        "scriptsize",
+        "footnotesize",
+        "small",
+        "normalsize",
+        "large",
+        "Large",
+        "LARGE",
+        "huge",
+        "Huge",
+    )
+
     def __init__(
         self,
         tiny=5,
@@ -48,6 +63,41 @@ class Fontsizes:
         self.huge = huge
         self.Huge = Huge
 
+    def __setattr__(self, name, value):
+        # Every size can only be set once, in the constructor
+        if hasattr(self, name):
+            raise AttributeError("Fontsizes are immutable.")
+
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError("Fontsizes are immutable.")
+
+    def astuple(self):
+        """The sizes from tiny to Huge.
+
+        Returns:
+            Tuple: The ten font sizes.
+        """
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, Fontsizes):
+            return NotImplemented
+
+        return self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        sizes = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+
+        return f"Fontsizes({sizes})"
+
+    def __reduce__(self):
+        return Fontsizes, self.astuple()
+
 
 DEFAULT_FONTSIZES_10 = Fontsizes()
 """Default fontsize palette based on normal size 10."""
@@ -0,0 +1,145 @@
+"""
+Rendering of frame series, e.g. for animations, that draws the static parts of a figure once.
+"""
+
+import queue
+import threading
+from pathlib import Path
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+DEFAULT_QUEUE_SIZE = 8
+"""Default number of rendered frames that may wait to be written."""
+
+_DONE = object()
+
+
+class FrameWriter:
+    """Writes raster images in a background thread while the next frames are rendered.
+
+    At most ``queue_size`` frames wait to be written, rendering blocks when the writer falls
+    behind, which bounds the memory usage. Errors of the writer are raised by :meth:`write`
+    or :meth:`close`.
+
+    Args:
+        dpi (float): Resolution stored in the written files.
+        queue_size (int, optional): Number of frames that may wait to be written.
+            Defaults to 8.
+    """
+
+    def __init__(self, dpi, queue_size=DEFAULT_QUEUE_SIZE):
+        self.dpi = dpi
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="rsmf-frame-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _DONE:
+                return
+
+            if self._error is None:
+                path, rgba = item
+                try:
+                    Path(path).parent.mkdir(parents=True, exist_ok=True)
+                    mpl.image.imsave(path, rgba, dpi=self.dpi)
+                except Exception as error:  # pylint: disable=broad-except
+                    self._error = error
+
+    def _raise(self):
+        if self._error is not None:
+            raise self._error
+
+    def write(self, path, rgba):
+        """Queue an image to be written.
+
+        Args:
+            path (Union[str,pathlib.Path]): Path of the file, the format is determined by its
+                extension.
+            rgba (numpy.ndarray): The image of shape (rows, columns, 4), which must not be
+                changed afterwards.
+        """
+        self._raise()
+        self._queue.put((path, rgba))
+
+    def close(self):
+        """Wait until all queued images are written."""
+        self._queue.put(_DONE)
+        self._thread.join()
+        self._raise()
+
+
+def _set_animated(artists, animated):
+    for artist in artists:
+        artist.set_animated(animated)
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def render_frames(fig, update, frames, path_pattern, *, dpi=None, queue_size=DEFAULT_QUEUE_SIZE):
+    """Render a series of frames in which only some artists of a figure change.
+
+    ``update(frame)`` is called for every frame and returns the artists it changed, like the
+    update function of ``matplotlib.animation.FuncAnimation`` with blitting. These artists are
+    excluded from a background that is rendered once with the Agg backend, including the
+    layout, the ticks and the typeset text. For every frame the background is restored and only
+    the changed artists are drawn on top of it. The frames are written by a
+    :class:`FrameWriter` in a background thread.
+
+    The background is only rendered again when ``update`` returns an artist that was not
+    changed before. Changes of anything else, e.g. of the axis limits, are not picked up.
+
+    Args:
+        fig (matplotlib.Figure): The figure.
+        update (callable): Called with every frame, returns the changed artists.
+        frames (Iterable): The frames passed to ``update``.
+        path_pattern (str): Path of the output files with a placeholder for the index of the
+            frame, e.g. ``"frames/{:04d}.png"``.
+        dpi (float, optional): Resolution of the frames. Defaults to the figure's dpi.
+        queue_size (int, optional): Number of frames that may wait to be written.
+            Defaults to 8.
+
+    Returns:
+        List[pathlib.Path]: Paths of the written frames.
+    """
+    canvas = fig.canvas
+    dpi = dpi or fig.dpi
+    original_dpi = fig.dpi
+
+    animated = []
+    background = None
+    paths = []
+    writer = FrameWriter(dpi, queue_size)
+
+    try:
+        fig.dpi = dpi
+        agg = FigureCanvasAgg(fig)
+
+        for index, frame in enumerate(frames):
+            artists = list(update(frame) or ())
+
+            changed = [artist for artist in artists if not artist.get_animated()]
+            if background is None or changed:
+                _set_animated(changed, True)
+                animated += changed
+                agg.draw()
+                background = agg.copy_from_bbox(fig.bbox)
+            else:
+                agg.restore_region(background)
+
+            for artist in artists:
+                fig.draw_artist(artist)
+
+            path = Path(path_pattern.format(index))
+            writer.write(path, np.array(agg.buffer_rgba()))
+            paths.append(path)
+    finally:
+        _set_animated(animated, False)
+        fig.dpi = original_dpi
+        fig.set_canvas(canvas)
+        writer.close()
+
+    return paths
@@ -0,0 +1,159 @@
+"""
+Raster images of PGF figures that are stored once under content-hash names and shared by all
+figures.
+"""
+
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import numpy as np
+from matplotlib.backends import backend_pgf
+from PIL import Image
+
+from .texcache import atomic_write
+
+_ACTIVE = None
+_ORIGINALS = {}
+
+
+class ImageStore:
+    """Directory of raster images named by the hash of their pixels.
+
+    Args:
+        directory (Union[str,pathlib.Path]): The directory, created if necessary.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, directory):
+        self.directory = Path(directory).resolve()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._known = set()
+
+    def add(self, rgba):
+        """Store an image unless an identical one is stored already.
+
+        The name is computed from the pixels, so an image is only compressed and written the
+        first time it is added, also by other processes using the same directory.
+
+        Args:
+            rgba (numpy.ndarray): The image of shape (rows, columns, 4) with the first row at
+                the top.
+
+        Returns:
+            pathlib.Path: Path of the PNG file.
+        """
+        rgba = np.ascontiguousarray(rgba)
+        hasher = hashlib.sha256(f"{rgba.shape};{rgba.dtype};".encode())
+        hasher.update(rgba.data)
+        path = self.directory / f"{hasher.hexdigest()[:32]}.png"
+
+        if path not in self._known and not path.exists():
+            buffer = io.BytesIO()
+            Image.fromarray(rgba).save(buffer, format="png")
+            atomic_write(path, buffer.getvalue())
+
+        self._known.add(path)
+
+        return path
+
+
+def _reference(path, directory):
+    """Path of an image as written in a PGF file in a directory."""
+    try:
+        path = os.path.relpath(path, directory)
+    except ValueError:  # On another drive
+        pass
+
+    return Path(path).as_posix()
+
+
+def _draw_image(renderer, gc, x, y, im, transform=None):
+    """Image drawing of the PGF backend that stores the image in the active store.
+
+    The image is declared once per LaTeX run with ``\\pgfdeclareimage`` and placed by its
+    transformation, so LaTeX loads it once even if many figures of a document contain it.
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    store = _ACTIVE
+    pgf_path = getattr(renderer.fh, "name", "")
+    if store is None or not os.path.exists(pgf_path):
+        return _ORIGINALS["draw_image"](renderer, gc, x, y, im, transform)
+
+    height, width = im.shape[:2]
+    if width == 0 or height == 0:
+        return None
+
+    path = store.add(im[::-1])
+    interpolate = str(transform is None).lower()
+    name = f"rsmf-{path.stem}-{interpolate}"
+
+    # The image is declared one inch wide and high and scaled to its size by the transform
+    factor = 1.0 / renderer.dpi
+    if transform is None:
+        matrix = (width * factor, 0.0, 0.0, height * factor, x * factor, y * factor)
+    else:
+        values = transform.frozen().to_values()
+        matrix = tuple(value * factor for value in values[:4]) + (
+            (values[4] + x) * factor,
+            (values[5] + y) * factor,
+        )
+
+    renderer.fh.write("\\begin{pgfscope}%\n")
+    renderer._print_pgf_clip(gc)  # pylint: disable=protected-access
+
+    lines = [
+        r"\pgfsys@transformcm{%f}{%f}{%f}{%f}{%fin}{%fin}" % matrix,
+        rf"\ifcsname rsmf@image@{name}\endcsname\else",
+        rf"\pgfdeclareimage[interpolate={interpolate},width=1in,height=1in]{{{name}}}"
+        rf"{{{_reference(path, Path(pgf_path).parent)}}}",
+        rf"\expandafter\gdef\csname rsmf@image@{name}\endcsname{{}}",
+        r"\fi",
+        rf"\pgftext[left,bottom]{{\pgfuseimage{{{name}}}}}",
+        r"\end{pgfscope}",
+    ]
+    for line in lines:
+        renderer.fh.write(f"{line}%\n")
+
+    return None
+
+
+def _patch():
+    """Route the images of the PGF backend into the active store, done once per process."""
+    if _ORIGINALS:
+        return
+
+    _ORIGINALS["draw_image"] = backend_pgf.RendererPgf.__dict__["draw_image"]
+    backend_pgf.RendererPgf.draw_image = _draw_image
+
+
+def install(directory):
+    """Store the images of all PGF figures saved in this process in a shared directory.
+
+    Installing the store that is already active does nothing.
+
+    Args:
+        directory (Union[str,pathlib.Path]): The directory of the images.
+
+    Returns:
+        ImageStore: The active store.
+    """
+    global _ACTIVE  # pylint: disable=global-statement
+
+    directory = Path(directory).resolve()
+    if _ACTIVE is not None and _ACTIVE.directory == directory:
+        return _ACTIVE
+
+    _patch()
+    _ACTIVE = ImageStore(directory)
+
+    return _ACTIVE
+
+
+def uninstall():
+    """Go back to writing the images of every figure next to its PGF file."""
+    global _ACTIVE  # pylint: disable=global-statement
+
+    _ACTIVE = None
@@ -0,0 +1,216 @@
+"""
+Lookup of document classes in the bundled database of column widths and font sizes.
+"""
+
+import functools
+import os
+import re
+from pathlib import Path
+
+from .custom_formatter import CustomFormatter
+from .fontsizes import Fontsizes
+from .metrics import TEX_POINTS_PER_INCH
+
+DATABASE_PATH = Path(__file__).parent / "journals.tsv"
+"""Path of the bundled database."""
+
+LAYOUT_OPTIONS = frozenset(
+    [
+        "8pt",
+        "9pt",
+        "10pt",
+        "11pt",
+        "12pt",
+        "onecolumn",
+        "twocolumn",
+        "a4paper",
+        "a5paper",
+        "b5paper",
+        "executivepaper",
+        "legalpaper",
+        "letterpaper",
+        "landscape",
+        "conference",
+        "journal",
+        "technote",
+        "peerreview",
+        "peerreviewca",
+        "compsoc",
+        "comsoc",
+        "transmag",
+    ]
+)
+"""Class options that can change the column widths or font sizes of a document."""
+
+_DOCUMENTCLASS_REGEX = re.compile(r"\\documentclass\s*(?:\[([^\]]*)\])?\s*\{([^}]*)\}")
+
+
+def _key(line):
+    """The documentclass of a line of the database."""
+    return line.rstrip(b"\r\n").split(b"\t", 1)[0]
+
+
+def _line_start(file, position):
+    """Position of the first line that starts at or after the given position."""
+    if position == 0:
+        return 0
+
+    file.seek(position - 1)
+    file.readline()
+
+    return file.tell()
+
+
+def _read_entries(path, documentclass):
+    """Find the lines of a documentclass by bisection over the sorted file.
+
+    Only a logarithmic number of lines is read, and nothing is kept in memory.
+    """
+    target = documentclass.encode("utf-8")
+
+    with open(path, "rb") as file:
+        low, high = 0, os.fstat(file.fileno()).st_size
+
+        while low < high:
+            middle = (low + high) // 2
+            file.seek(_line_start(file, middle))
+            line = file.readline()
+
+            if line and _key(line) < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        file.seek(_line_start(file, low))
+        lines = []
+        for line in file:
+            if _key(line) != target:
+                break
+
+            lines.append(line.decode("utf-8").rstrip("\r\n"))
+
+    return lines
+
+
+@functools.lru_cache(maxsize=64)
+def entries(documentclass, path=DATABASE_PATH):
+    """Get the entries of a documentclass from the database.
+
+    Args:
+        documentclass (str): Name of the documentclass, e.g. "IEEEtran".
+        path (Union[str,pathlib.Path], optional): Path of the database.
+            Defaults to :data:`DATABASE_PATH`.
+
+    Returns:
+        List[Dict]: The entries with keys options, ignored_options, columnwidth, textwidth
+            (both in points), fontsizes, font_family and pgf_preamble.
+    """
+    result = []
+
+    for line in _read_entries(path, documentclass):
+        (
+            _,
+            options,
+            ignored_options,
+            columnwidth,
+            textwidth,
+            sizes,
+            font_family,
+            pgf_preamble,
+        ) = line.split("\t")
+        result.append(
+            {
+                "options": frozenset(filter(None, options.split(","))),
+                "ignored_options": frozenset(filter(None, ignored_options.split(","))),
+                "columnwidth": float(columnwidth),
+                "textwidth": float(textwidth),
+                "fontsizes": Fontsizes(*(float(size) for size in sizes.split(","))),
+                "font_family": font_family or None,
+                "pgf_preamble": pgf_preamble,
+            }
+        )
+
+    return result
+
+
+def parse_documentclass(preamble):
+    r"""Extract the documentclass and its options from a preamble.
+
+    Args:
+        preamble (str): The preamble, containing at least the \documentclass command.
+
+    Returns:
+        Union[NoneType,Tuple[str,FrozenSet[str]]]: The name of the documentclass and its
+            options, or None if there is no \documentclass command.
+    """
+    match = _DOCUMENTCLASS_REGEX.search(preamble)
+    if match is None:
+        return None
+
+    options = frozenset(option.strip() for option in (match.group(1) or "").split(","))
+
+    return match.group(2).strip(), options - {""}
+
+
+def configuration(preamble, path=DATABASE_PATH):
+    r"""Get the formatter arguments for the documentclass of a preamble from the database.
+
+    An entry matches if the preamble has all of its options and no option of
+    :data:`LAYOUT_OPTIONS` that the entry neither requires nor ignores, e.g. because it is the
+    default of the class. Among the matching entries, the one with the most options is used.
+    Documents whose layout options are not covered by an entry are not guessed, as the column
+    widths could be wrong, measure them with :func:`rsmf.probe` instead.
+
+    Args:
+        preamble (str): The preamble, containing at least the \documentclass command.
+        path (Union[str,pathlib.Path], optional): Path of the database.
+            Defaults to :data:`DATABASE_PATH`.
+
+    Returns:
+        Union[NoneType,Dict]: Keyword arguments of :class:`rsmf.custom_formatter.CustomFormatter`,
+            or None if the documentclass with these options is not in the database.
+    """
+    documentclass = parse_documentclass(preamble)
+    if documentclass is None:
+        return None
+
+    name, options = documentclass
+    layout = options & LAYOUT_OPTIONS
+    matching = [
+        entry
+        for entry in entries(name, path)
+        if entry["options"] <= options and layout <= entry["options"] | entry["ignored_options"]
+    ]
+    if not matching:
+        return None
+
+    entry = max(matching, key=lambda entry: len(entry["options"]))
+
+    return {
+        "columnwidth": entry["columnwidth"] / TEX_POINTS_PER_INCH,
+        "wide_columnwidth": entry["textwidth"] / TEX_POINTS_PER_INCH,
+        "fontsizes": entry["fontsizes"],
+        "pgf_preamble": entry["pgf_preamble"],
+        "font_family": entry["font_family"],
+    }
+
+
+def lookup(preamble, path=DATABASE_PATH):
+    r"""Get a formatter for the documentclass of a preamble from the database.
+
+    See :func:`configuration`.
+
+    Args:
+        preamble (str): The preamble, containing at least the \documentclass command.
+        path (Union[str,pathlib.Path], optional): Path of the database.
+            Defaults to :data:`DATABASE_PATH`.
+
+    Returns:
+        Union[NoneType,CustomFormatter]: A formatter, or None if the documentclass with these
+            options is not in the database.
+    """
+    formatter_kwargs = configuration(preamble, path)
+    if formatter_kwargs is None:
+        return None
+
+    return CustomFormatter(**formatter_kwargs)
@@ -0,0 +1,327 @@
+"""
+Figures that record their plotting calls and only draw when an output is not cached yet.
+"""
+
+import functools
+import hashlib
+import pickle
+import shutil
+from pathlib import Path
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+
+from . import preview
+from .pages import active_batch
+from .texcache import atomic_write
+
+CACHE_DIR = Path(mpl.get_cachedir(), "rsmf", "figures")
+"""Default directory in which the outputs of lazy figures are cached."""
+
+_FIGURE = 0
+
+
+class Recorded:
+    """Placeholder for an object that is only created when a lazy figure is drawn.
+
+    Accessing an attribute, calling or indexing a placeholder records the operation and
+    returns a placeholder for its result. Placeholders can be passed as arguments to later
+    calls, e.g. the image returned by ``ax.imshow`` to ``fig.colorbar``. They can not be
+    iterated or inspected, so ``line, = ax.plot(...)`` has to be written as
+    ``line = ax.plot(...)[0]``.
+    """
+
+    __slots__ = ("_lazy_figure", "_index")
+
+    def __init__(self, lazy_figure, index):
+        self._lazy_figure = lazy_figure
+        self._index = index
+
+    def __getattr__(self, name):
+        # Private names are not part of matplotlib's API, but are probed e.g. by IPython
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        return self._lazy_figure._record("getattr", self._index, name)
+
+    def __call__(self, *args, **kwargs):
+        return self._lazy_figure._record("call", self._index, args, kwargs)
+
+    def __getitem__(self, key):
+        return self._lazy_figure._record("getitem", self._index, key)
+
+    def __iter__(self):
+        raise TypeError("Recorded objects of lazy figures can not be iterated, index them instead.")
+
+
+def _update_hash(hasher, value):
+    """Feed a canonical representation of a recorded argument into a hash."""
+    # pylint: disable=protected-access
+    if isinstance(value, Recorded):
+        hasher.update(b"R%d;" % value._index)
+    elif isinstance(value, np.ma.MaskedArray):
+        hasher.update(b"M")
+        _update_hash(hasher, value.data)
+        _update_hash(hasher, np.ma.getmaskarray(value))
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        hasher.update(f"A{value.dtype.str}{value.shape};".encode())
+        hasher.update(np.ascontiguousarray(value).view(np.uint8).ravel())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f"{type(value).__name__}{len(value)};".encode())
+        for item in value:
+            _update_hash(hasher, item)
+    elif isinstance(value, dict):
+        hasher.update(f"D{len(value)};".encode())
+        for key in sorted(value, key=repr):
+            _update_hash(hasher, key)
+            _update_hash(hasher, value[key])
+    elif value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        hasher.update(f"{type(value).__name__}:{value!r};".encode())
+    else:
+        hasher.update(b"P")
+        hasher.update(pickle.dumps(value, protocol=4))
+
+
+def _copy(source, destination):
+    """Write a copy of a file atomically."""
+    atomic_write(destination, Path(source).read_bytes())
+
+
+class LazyFigure(Recorded):
+    """A figure that records what is drawn and creates its artists only when needed.
+
+    Create it with ``formatter.figure(lazy=True)`` and use it like a ``matplotlib.Figure``
+    through its methods, e.g. ``ax = fig.add_subplot()`` followed by ``ax.plot(x, y)``; the
+    pyplot state functions like ``plt.plot`` do not act on lazy figures. When the figure is
+    saved, a hash of the recorded calls, the formatter configuration and the rcParams at
+    creation is computed first. If an output with that hash is in the cache, it is copied and
+    nothing is drawn, otherwise the figure is built, saved and the output is cached.
+
+    Args:
+        formatter (AbstractFormatter): The formatter that created the figure.
+        figure_kwargs (dict): Passed on to ``matplotlib.pyplot.figure`` when the figure is built.
+        rc (dict): rcParams active while the figure is built and saved.
+        cache_dir (Union[str,pathlib.Path], optional): Directory of the output cache.
+            Defaults to :data:`CACHE_DIR`.
+    """
+
+    __slots__ = ("_formatter", "_figure_kwargs", "_rc", "_cache_dir", "_operations", "_objects")
+
+    def __init__(self, formatter, figure_kwargs, rc, cache_dir=None):
+        super().__init__(self, _FIGURE)
+        self._formatter = formatter
+        self._figure_kwargs = figure_kwargs
+        self._rc = rc
+        self._cache_dir = Path(cache_dir or CACHE_DIR)
+        self._operations = []
+        self._objects = None
+
+    def _record(self, kind, target, *arguments):
+        """Append an operation and return a placeholder for its result."""
+        self._operations.append((kind, target, arguments))
+
+        return Recorded(self, len(self._operations))
+
+    def subplots(self, nrows=1, ncols=1, squeeze=True, **kwargs):
+        """Record ``matplotlib.Figure.subplots``.
+
+        Returns:
+            Union[Recorded,numpy.ndarray]: A placeholder for one axes or an array of them,
+                shaped like the result of ``matplotlib.Figure.subplots``.
+        """
+        grid = self._record("getattr", _FIGURE, "subplots")(nrows, ncols, squeeze=False, **kwargs)
+        axes = np.empty((nrows, ncols), dtype=object)
+        for row in range(nrows):
+            for col in range(ncols):
+                axes[row, col] = grid[row, col]
+
+        if squeeze:
+            return axes.item() if axes.size == 1 else axes.squeeze()
+
+        return axes
+
+    def cache_key(self):
+        """Hash that identifies the outputs of the figure.
+
+        Returns:
+            Union[str,NoneType]: Hex digest of the recorded calls, the formatter's
+                configuration, the rcParams and the matplotlib version, or None if a recorded
+                argument can not be pickled, e.g. a lambda function as tick formatter.
+        """
+        # pylint: disable=protected-access
+        hasher = hashlib.sha256()
+        hasher.update(f"{mpl.__version__};{type(self._formatter).__qualname__};".encode())
+        _update_hash(hasher, self._formatter._configuration())
+        _update_hash(hasher, (self._formatter.pgf_precision, self._formatter.pgf_simplify))
+        _update_hash(hasher, self._figure_kwargs)
+        hasher.update(repr(sorted(self._rc.items())).encode())
+        try:
+            _update_hash(hasher, self._operations)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+
+        return hasher.hexdigest()
+
+    def _cache_path(self, key, fname, kwargs):
+        hasher = hashlib.sha256(key.encode())
+        _update_hash(hasher, Path(fname).suffix.lower())
+        _update_hash(hasher, kwargs)
+        if self._formatter.image_dir is not None:
+            # Shared images are referred to relative to the output
+            _update_hash(hasher, (self._formatter.image_dir, str(Path(fname).resolve().parent)))
+
+        return self._cache_dir / hasher.hexdigest()[:2] / hasher.hexdigest()
+
+    def build(self):
+        """Create the figure and replay the recorded calls that were not replayed yet.
+
+        Returns:
+            matplotlib.Figure: The figure.
+        """
+        with mpl.rc_context(self._rc):
+            if self._objects is None:
+                self._objects = [plt.figure(**self._figure_kwargs)]
+
+            for kind, target, arguments in self._operations[len(self._objects) - 1 :]:
+                obj = self._objects[target]
+                arguments = self._resolve(arguments)
+
+                if kind == "getattr":
+                    result = getattr(obj, *arguments)
+                elif kind == "getitem":
+                    result = obj[arguments[0]]
+                else:
+                    args, kwargs = arguments
+                    result = obj(*args, **kwargs)
+
+                self._objects.append(result)
+
+        return self._objects[_FIGURE]
+
+    def _resolve(self, value):
+        """Replace placeholders by the objects they stand for."""
+        if isinstance(value, Recorded):
+            return self._objects[value._index]  # pylint: disable=protected-access
+
+        if isinstance(value, (list, tuple)) and not hasattr(value, "_fields"):
+            return type(value)(self._resolve(item) for item in value)
+
+        if isinstance(value, dict):
+            return {key: self._resolve(item) for key, item in value.items()}
+
+        return value
+
+    def _save_cached(self, paths, save, kwargs):
+        """Copy cached outputs, or build the figure, save it and cache the outputs."""
+        key = self.cache_key()
+        if key is None:
+            # Figures that can not be hashed are drawn every time
+            with mpl.rc_context(self._rc):
+                return save(self.build())
+
+        cache_paths = [self._cache_path(key, path, kwargs) for path in paths]
+
+        if all(cache_path.exists() for cache_path in cache_paths):
+            for cache_path, path in zip(cache_paths, paths):
+                shutil.copyfile(cache_path, path)
+            self._record_snapshots(paths, kwargs)
+
+            return paths
+
+        with mpl.rc_context(self._rc):
+            paths = save(self.build())
+
+        batch = active_batch()
+        for cache_path, path in zip(cache_paths, paths):
+            cache = functools.partial(_copy, path, cache_path)
+            if batch is None:
+                cache()
+            else:
+                # Outputs of a batch are written when it is closed
+                batch.when_written(path, cache)
+
+        return paths
+
+    def _record_snapshots(self, paths, kwargs):
+        """Store snapshots of outputs copied from the cache, which needs the built figure."""
+        # pylint: disable=import-outside-toplevel
+        from . import snapshot
+
+        if self._formatter.snapshot_dir is None:
+            return
+
+        with mpl.rc_context(self._rc):
+            fig = self.build()
+        store = snapshot.SnapshotStore(self._formatter.snapshot_dir)
+        for path in paths:
+            store.record(fig, path, self._formatter, **kwargs)
+
+    def savefig(self, fname, **kwargs):
+        """Save the figure, drawing it only if the output is not cached.
+
+        Args:
+            fname (Union[str,pathlib.Path]): Path of the output file.
+            **kwargs: Passed on to ``matplotlib.Figure.savefig``.
+
+        Returns:
+            pathlib.Path: Path of the written file.
+        """
+        paths = self._save_cached(
+            [Path(fname)],
+            lambda fig: [self._formatter.savefig(fig, fname, **kwargs)],
+            kwargs,
+        )
+
+        return paths[0]
+
+    def export(self, name, formats=("pgf", "pdf"), **kwargs):
+        """Save the figure in several formats, drawing it only if an output is not cached.
+
+        See :meth:`rsmf.abstract_formatter.AbstractFormatter.export`.
+
+        Returns:
+            List[pathlib.Path]: Paths of the written files in the order of ``formats``.
+        """
+        paths = [Path(f"{name}.{fmt.lower().lstrip('.')}") for fmt in formats]
+
+        return self._save_cached(
+            paths,
+            lambda fig: self._formatter.export(fig, name, formats=formats, **kwargs),
+            kwargs,
+        )
+
+    def get_size_inches(self):
+        """Size of the figure, known without building it.
+
+        Returns:
+            numpy.ndarray: Width and height in inches.
+        """
+        return np.array(self._figure_kwargs["figsize"], dtype=float)
+
+    def preview(self, dpi, rc, cache_dir=None):
+        """Render a preview, building the figure only if the preview is not cached.
+
+        See :func:`rsmf.preview.preview`.
+
+        Returns:
+            Preview: The preview.
+        """
+
+        def render():
+            with mpl.rc_context(self._rc):
+                return preview.render_png(self.build(), dpi, rc)
+
+        key = self.cache_key()
+        if key is None:
+            return preview.Preview(render(), self.get_size_inches())
+
+        key = preview.rendering_key(key, dpi, rc)
+
+        return preview.cached_preview(key, self.get_size_inches(), render, cache_dir=cache_dir)
+
+    def close(self):
+        """Close the built figure, if any."""
+        if self._objects is not None:
+            plt.close(self._objects[_FIGURE])
+            self._objects = None
@@ -0,0 +1,146 @@
+"""
+Measurement of column widths and font sizes of arbitrary document classes with LaTeX.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tempfile
+from pathlib import Path
+
+import matplotlib as mpl
+
+from .custom_formatter import CustomFormatter
+from .fontsizes import Fontsizes
+from .metrics import TEX_POINTS_PER_INCH
+from .setup import _extract_preamble
+
+CACHE_DIR = Path(mpl.get_cachedir(), "rsmf")
+"""Directory in which rsmf caches results on disk."""
+
+_FONTSIZE_NAMES = Fontsizes.__slots__
+
+_PROBE_BODY = "\n".join(
+    [
+        r"\begin{document}",
+        r"\makeatletter",
+        r"\typeout{rsmf:columnwidth=\strip@pt\columnwidth}",
+        r"\typeout{rsmf:textwidth=\strip@pt\textwidth}",
+    ]
+    + [rf"{{\{name}\typeout{{rsmf:{name}=\f@size}}}}" for name in _FONTSIZE_NAMES]
+    + [r"\makeatother", r"\end{document}", ""]
+)
+
+_RESULT_REGEX = re.compile(r"^rsmf:(\w+)=([\d.]+)\s*$", re.MULTILINE)
+
+
+def _run_latex(tex_source, texsystem, texinputs):
+    """Compile a document and return the contents of its log file.
+
+    Args:
+        tex_source (pathlib.Path): Path of the document.
+        texsystem (str): The LaTeX executable.
+        texinputs (Union[NoneType,pathlib.Path]): Additional directory to search for inputs.
+
+    Returns:
+        str: The log of the LaTeX run.
+    """
+    env = dict(os.environ)
+    if texinputs is not None:
+        env["TEXINPUTS"] = f"{texinputs}{os.pathsep}{env.get('TEXINPUTS', '')}"
+
+    result = subprocess.run(
+        [texsystem, "-interaction=nonstopmode", "-halt-on-error", "-draftmode", tex_source.name],
+        cwd=tex_source.parent,
+        env=env,
+        capture_output=True,
+        check=False,
+    )
+
+    log_path = tex_source.with_suffix(".log")
+    log = log_path.read_text(errors="replace") if log_path.exists() else ""
+
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"{texsystem} could not compile the probe document:\n\n"
+            + result.stdout.decode("utf-8", "replace")
+        )
+
+    return log
+
+
+def measure(arg, texsystem="pdflatex", cache_dir=None):
+    """Measure column widths and font sizes of a document by compiling its preamble.
+
+    The results are cached on disk under a hash of the preamble, so LaTeX only runs once
+    for every configuration.
+
+    Args:
+        arg (Union[str,pathlib.Path]): Either path to a tex file or preamble of a tex file,
+            containing at least the \\documentclass command.
+        texsystem (str, optional): The LaTeX executable. Defaults to "pdflatex".
+        cache_dir (Union[str,pathlib.Path], optional): Directory of the cache.
+            Defaults to :data:`CACHE_DIR`.
+
+    Returns:
+        Dict[str,float]: The columnwidth, textwidth and named font sizes, all in points.
+    """
+    texinputs = None
+    if Path(arg).exists():
+        texinputs = Path(arg).resolve().parent
+        preamble = _extract_preamble(arg)
+    else:
+        preamble = str(arg).split("\\begin{document}", maxsplit=1)[0]
+
+    key = hashlib.sha256(f"{texsystem}\n{preamble}".encode("utf-8")).hexdigest()
+    cache_path = Path(cache_dir or CACHE_DIR, "probe", f"{key}.json")
+
+    if cache_path.exists():
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+
+    with tempfile.TemporaryDirectory(prefix="rsmf-") as tmpdir:
+        tex_source = Path(tmpdir, "probe.tex")
+        tex_source.write_text(preamble + "\n" + _PROBE_BODY, encoding="utf-8")
+        log = _run_latex(tex_source, texsystem, texinputs)
+
+    result = {name: float(value) for name, value in _RESULT_REGEX.findall(log)}
+
+    missing = {"columnwidth", "textwidth", *_FONTSIZE_NAMES} - set(result)
+    if missing:
+        raise RuntimeError(f"The probe document did not report {', '.join(sorted(missing))}.")
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(result), encoding="utf-8")
+    tmp_path.replace(cache_path)
+
+    return result
+
+
+def probe(arg, pgf_preamble="", texsystem="pdflatex", cache_dir=None):
+    """Get a formatter for any document class by measuring it with LaTeX.
+
+    See :func:`measure` for details on the measurement and caching.
+
+    Args:
+        arg (Union[str,pathlib.Path]): Either path to a tex file or preamble of a tex file,
+            containing at least the \\documentclass command.
+        pgf_preamble (str, optional): Additional packages to include in the PGF preamble,
+            e.g. for exchanging fonts or defining commands. Defaults to "".
+        texsystem (str, optional): The LaTeX executable. Defaults to "pdflatex".
+        cache_dir (Union[str,pathlib.Path], optional): Directory of the cache.
+            Defaults to :data:`CACHE_DIR`.
+
+    Returns:
+        CustomFormatter: A formatter with the measured widths and font sizes.
+    """
+    result = measure(arg, texsystem=texsystem, cache_dir=cache_dir)
+
+    return CustomFormatter(
+        columnwidth=result["columnwidth"] / TEX_POINTS_PER_INCH,
+        wide_columnwidth=result["textwidth"] / TEX_POINTS_PER_INCH,
+        fontsizes=Fontsizes(**{name: result[name] for name in _FONTSIZE_NAMES}),
+        pgf_preamble=pgf_preamble,
+    )
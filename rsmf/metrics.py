@@ -0,0 +1,145 @@
+"""
+Estimation of text extents from the metrics of the Computer Modern fonts, without running LaTeX.
+"""
+
+import functools
+import os
+import re
+
+import matplotlib as mpl
+import numpy as np
+from matplotlib.ft2font import FT2Font  # pylint: disable=no-name-in-module
+
+try:
+    from matplotlib.ft2font import LoadFlags  # pylint: disable=no-name-in-module
+
+    _NO_SCALE = LoadFlags.NO_SCALE
+except ImportError:  # matplotlib < 3.10
+    from matplotlib.ft2font import LOAD_NO_SCALE as _NO_SCALE  # pylint: disable=no-name-in-module
+
+TEX_POINTS_PER_INCH = 72.27
+"""Number of TeX points in one inch."""
+
+_FONT_FILES = {
+    "serif": "cmr10.ttf",
+    "sans-serif": "cmss10.ttf",
+    "monospace": "cmtt10.ttf",
+    "math": "cmmi10.ttf",
+}
+
+_N_CODES = 128
+
+_CONTROL_WORD_REGEX = re.compile(r"\\[a-zA-Z]+\s*")
+_MARKUP_REGEX = re.compile(r"[{}^_]|\\.")
+
+
+class FontMetrics:
+    """Widths, heights and depths of the ASCII glyphs of a font, in units of the font size.
+
+    Args:
+        path (Union[str,pathlib.Path]): Path of the font file.
+        family (str, optional): Font family of the font. Defaults to "serif".
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ("widths", "heights", "depths")
+
+    def __init__(self, path, family="serif"):
+        font = FT2Font(str(path))
+        charmap = font.get_charmap()
+
+        metrics = np.full((3, _N_CODES), np.nan, dtype=np.float32)
+        for code in range(32, _N_CODES):
+            if code in charmap:
+                glyph = font.load_glyph(charmap[code], _NO_SCALE)
+                metrics[:, code] = (
+                    glyph.horiAdvance,
+                    glyph.horiBearingY,
+                    glyph.height - glyph.horiBearingY,
+                )
+
+        metrics /= font.units_per_EM
+
+        # Characters without a glyph are estimated by an average glyph
+        missing = np.isnan(metrics[0])
+        metrics[:, missing] = np.nanmean(metrics, axis=1)[:, None]
+        # The interword space of Computer Modern is a third of an em, or one glyph width for
+        # the monospaced font
+        metrics[:, ord(" ")] = (metrics[0, ord("x")] if family == "monospace" else 1 / 3, 0, 0)
+
+        self.widths, self.heights, self.depths = metrics
+
+    def extent(self, text):
+        """Extent of a string of characters.
+
+        Args:
+            text (str): The characters.
+
+        Returns:
+            Tuple[float,float,float]: Width, height and depth in units of the font size.
+        """
+        if not text:
+            return 0.0, 0.0, 0.0
+
+        codes = np.frombuffer(text.encode("ascii", "replace"), dtype=np.uint8)
+
+        return (
+            float(self.widths[codes].sum()),
+            float(self.heights[codes].max()),
+            float(self.depths[codes].max()),
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def font_metrics(family):
+    """Load the metrics of the Computer Modern font of a family, cached after the first call.
+
+    Args:
+        family (str): One of "serif", "sans-serif", "monospace" or "math".
+
+    Returns:
+        FontMetrics: The metrics of the font.
+    """
+    if family not in _FONT_FILES:
+        raise ValueError(f"Unknown font family {family}, must be one of {', '.join(_FONT_FILES)}.")
+
+    return FontMetrics(
+        os.path.join(mpl.get_data_path(), "fonts", "ttf", _FONT_FILES[family]), family
+    )
+
+
+def _strip_markup(text):
+    """Replace control words by a single character and drop braces and script markers."""
+    return _MARKUP_REGEX.sub("", _CONTROL_WORD_REGEX.sub("o", text))
+
+
+def text_extent(text, size, family="serif"):
+    """Estimate the extent of a piece of LaTeX text.
+
+    Text in math mode (between ``$``) is measured with the math italic font, control words
+    like ``\\alpha`` count as one character and sub- and superscripts are measured at full
+    size. Kerning and ligatures are ignored. The estimate is therefore slightly conservative,
+    which is what automated checks against the available width need.
+
+    Args:
+        text (str): The text, possibly containing math.
+        size (float): Font size in TeX points.
+        family (str, optional): Font family of the text outside math mode. Defaults to "serif".
+
+    Returns:
+        Tuple[float,float,float]: Width, height and depth in inches.
+    """
+    width = height = depth = 0.0
+
+    for index, segment in enumerate(text.split("$")):
+        metrics = font_metrics("math" if index % 2 else family)
+        segment_width, segment_height, segment_depth = metrics.extent(_strip_markup(segment))
+
+        width += segment_width
+        height = max(height, segment_height)
+        depth = max(depth, segment_depth)
+
+    scale = size / TEX_POINTS_PER_INCH
+
+    return width * scale, height * scale, depth * scale
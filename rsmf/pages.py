@@ -0,0 +1,333 @@
+"""
+Streaming output of many figures into a single multi-page PDF, and batches of figures that are
+typeset with a single LaTeX run and split into one PDF per figure.
+"""
+
+import io
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+from matplotlib import cbook
+from matplotlib.backends import backend_pgf
+
+from . import export
+from .texcache import atomic_write
+
+try:
+    import pypdf
+except ImportError:  # Optional, ghostscript splits the PDFs instead
+    pypdf = None
+
+_log = logging.getLogger(__name__)
+
+_ACTIVE_BATCH = None
+
+
+class Pages:
+    """Writes figures as pages of a single PDF that is typeset with one LaTeX run.
+
+    Every saved page is written to disk as PGF code right away and its figure is closed,
+    so the memory usage does not grow with the number of pages. LaTeX is run once for the
+    whole document when the object is closed. Use it via
+    :meth:`rsmf.abstract_formatter.AbstractFormatter.pages`.
+
+    Args:
+        formatter (AbstractFormatter): Formatter used to create the figures.
+        filename (Union[str,pathlib.Path]): Path of the resulting PDF file.
+    """
+
+    def __init__(self, formatter, filename):
+        self._formatter = formatter
+        self._filename = Path(filename)
+        # pylint: disable=consider-using-with
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="rsmf-")
+        self._page_sizes = []
+        self._preamble = None
+        self._texsystem = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._tmpdir.cleanup()
+
+    @property
+    def pagecount(self):
+        """int: Number of pages written so far."""
+        return len(self._page_sizes)
+
+    def figure(self, aspect_ratio=1 / 1.62, width_ratio=1.0, wide=False):
+        """Create a figure for a new page, see
+        :meth:`rsmf.abstract_formatter.AbstractFormatter.figure`."""
+        return self._formatter.figure(aspect_ratio=aspect_ratio, width_ratio=width_ratio, wide=wide)
+
+    def savefig(self, figure=None, **kwargs):
+        """Write a figure as a new page and close it.
+
+        Args:
+            figure (matplotlib.Figure, optional): The figure to be written. Defaults to the
+                current figure.
+            **kwargs: Passed on to ``matplotlib.Figure.savefig``.
+        """
+        if figure is None:
+            figure = plt.gcf()
+
+        self._write_page(figure, **kwargs)
+
+        plt.close(figure)
+
+    def _write_page(self, figure, **kwargs):
+        """Write a figure as a new page."""
+        # pylint: disable=protected-access
+        if self._preamble is None:
+            self._preamble = backend_pgf._get_preamble()
+            self._texsystem = mpl.rcParams["pgf.texsystem"]
+
+        page_path = Path(self._tmpdir.name, f"page{self.pagecount:06d}.pgf")
+        export.savefig(
+            figure,
+            page_path,
+            precision=self._formatter.pgf_precision,
+            simplify=self._formatter.pgf_simplify,
+            format="pgf",
+            backend="pgf",
+            **kwargs,
+        )
+        self._page_sizes.append(tuple(figure.get_size_inches()))
+
+    def _document(self):
+        """Assemble the LaTeX document that includes all pages."""
+        # pylint: disable=protected-access
+        width, height = self._page_sizes[0]
+        lines = [
+            backend_pgf._DOCUMENTCLASS,
+            r"\usepackage[papersize={%fin,%fin}, margin=0in]{geometry}" % (width, height),
+            r"\usepackage{pgf}",
+            self._preamble,
+            r"\setlength{\parindent}{0pt}",
+            r"\begin{document}%",
+        ]
+
+        for page, (width, height) in enumerate(self._page_sizes):
+            if page > 0:
+                lines.append(
+                    rf"\newpage"
+                    rf"\ifdefined\pdfpagewidth\pdfpagewidth\else\pagewidth\fi={width:f}in"
+                    rf"\ifdefined\pdfpageheight\pdfpageheight\else\pageheight\fi={height:f}in%"
+                )
+            lines.append(rf"\input{{page{page:06d}.pgf}}%")
+
+        lines.append(r"\end{document}")
+
+        return "\n".join(lines)
+
+    def close(self):
+        """Run LaTeX on all written pages and move the resulting PDF to its destination."""
+        try:
+            if self._page_sizes:
+                tex_source = Path(self._tmpdir.name, "pages.tex")
+                tex_source.write_text(self._document(), encoding="utf-8")
+
+                cbook._check_and_log_subprocess(  # pylint: disable=protected-access
+                    [
+                        self._texsystem,
+                        "-interaction=nonstopmode",
+                        "-halt-on-error",
+                        "-no-shell-escape",
+                        tex_source.name,
+                    ],
+                    _log,
+                    cwd=self._tmpdir.name,
+                )
+                shutil.move(tex_source.with_suffix(".pdf"), self._filename)
+        finally:
+            self._tmpdir.cleanup()
+
+
+def split_pdf(source, paths):
+    """Write every page of a PDF to a file of its own.
+
+    The pages are split with pypdf if it is installed and with ghostscript otherwise. The
+    files do not contain creation dates or random identifiers, so splitting the same PDF
+    again gives identical files.
+
+    Args:
+        source (Union[str,pathlib.Path]): The PDF.
+        paths (List[Union[str,pathlib.Path]]): Paths of the files of the pages, in order.
+    """
+    paths = [Path(path) for path in paths]
+
+    if pypdf is not None:
+        reader = pypdf.PdfReader(source)
+        if len(reader.pages) != len(paths):
+            raise RuntimeError(f"{source} has {len(reader.pages)} pages, expected {len(paths)}.")
+
+        for page, path in zip(reader.pages, paths):
+            writer = pypdf.PdfWriter()
+            writer.add_page(page)
+            buffer = io.BytesIO()
+            writer.write(buffer)
+            atomic_write(path, buffer.getvalue())
+
+        return
+
+    try:
+        ghostscript = mpl._get_executable_info("gs").executable  # pylint: disable=protected-access
+    except mpl.ExecutableNotFoundError as error:
+        raise RuntimeError("Splitting PDFs needs either pypdf or ghostscript.") from error
+
+    for number, path in enumerate(paths, start=1):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cbook._check_and_log_subprocess(  # pylint: disable=protected-access
+            [
+                ghostscript,
+                "-dBATCH",
+                "-dNOPAUSE",
+                "-dSAFER",
+                "-sDEVICE=pdfwrite",
+                "-dOmitInfoDate",
+                "-dOmitID",
+                "-dOmitXMP",
+                f"-dFirstPage={number}",
+                f"-dLastPage={number}",
+                f"-sOutputFile={path}",
+                os.fspath(source),
+            ],
+            _log,
+        )
+
+
+class BatchSave:
+    """Collects the PDF outputs of figures and typesets them with one LaTeX run per preamble.
+
+    While the batch is active, every figure that a formatter saves as PDF is written as a page
+    of a LaTeX document, with the size of the figure. Figures whose rcParams lead to the same
+    LaTeX preamble share a document. When the batch is closed, LaTeX is run once for every
+    document and the result is split into one PDF per figure, see :func:`split_pdf`. Use it
+    via :meth:`rsmf.abstract_formatter.AbstractFormatter.batch_save`.
+    """
+
+    def __init__(self):
+        # pylint: disable=consider-using-with
+        self._tmpdir = tempfile.TemporaryDirectory(prefix="rsmf-")
+        self._documents = {}
+        self._callbacks = {}
+
+    def __enter__(self):
+        global _ACTIVE_BATCH  # pylint: disable=global-statement
+
+        if _ACTIVE_BATCH is not None:
+            raise RuntimeError("Another batch is active already.")
+
+        _ACTIVE_BATCH = self
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _ACTIVE_BATCH  # pylint: disable=global-statement
+
+        _ACTIVE_BATCH = None
+
+        if exc_type is None:
+            self.close()
+        else:
+            self._tmpdir.cleanup()
+
+    @staticmethod
+    def accepts(fig, fname, kwargs):
+        """Whether the output of a figure can be part of the batch.
+
+        Args:
+            fig (matplotlib.Figure): The figure.
+            fname (Union[str,pathlib.Path]): Path of the output file.
+            kwargs (dict): Keyword arguments of ``matplotlib.Figure.savefig``.
+
+        Returns:
+            bool: Whether the figure is saved as PDF by the PGF backend, at its own size.
+        """
+        return (
+            isinstance(fname, (str, os.PathLike))
+            and export.is_pdf(fname, kwargs)
+            and isinstance(fig.canvas, backend_pgf.FigureCanvasPgf)
+            and kwargs.get("bbox_inches") is None
+            and kwargs.get("backend") is None
+        )
+
+    def add(self, formatter, fig, fname, **kwargs):
+        """Write a figure as a page of the document of its preamble.
+
+        Args:
+            formatter (AbstractFormatter): The formatter the figure is saved with.
+            fig (matplotlib.Figure): The figure.
+            fname (Union[str,pathlib.Path]): Path of the output file, written when the batch
+                is closed.
+            **kwargs: Passed on to ``matplotlib.Figure.savefig``.
+
+        Returns:
+            pathlib.Path: Path of the output file.
+        """
+        kwargs.pop("format", None)
+        preamble = backend_pgf._get_preamble()  # pylint: disable=protected-access
+        key = (mpl.rcParams["pgf.texsystem"], preamble)
+
+        if key not in self._documents:
+            path = Path(self._tmpdir.name, f"batch{len(self._documents):03d}.pdf")
+            self._documents[key] = (Pages(formatter, path), [])
+
+        pages, paths = self._documents[key]
+        pages._write_page(fig, **kwargs)  # pylint: disable=protected-access
+        paths.append(Path(fname))
+
+        return Path(fname)
+
+    def when_written(self, path, callback):
+        """Call a function once an output file of the batch is written.
+
+        Args:
+            path (Union[str,pathlib.Path]): Path of the output file.
+            callback (callable): Called without arguments, right away if the file is not part
+                of the batch.
+        """
+        path = Path(path)
+
+        if any(path in paths for _, paths in self._documents.values()):
+            self._callbacks.setdefault(path, []).append(callback)
+        else:
+            callback()
+
+    @property
+    def pagecount(self):
+        """int: Number of figures in the batch."""
+        return sum(pages.pagecount for pages, _ in self._documents.values())
+
+    def close(self):
+        """Typeset all documents and write the PDFs of the figures."""
+        try:
+            for pages, paths in self._documents.values():
+                # pylint: disable=protected-access
+                combined = pages._filename
+                pages.close()
+                split_pdf(combined, paths)
+
+                for path in paths:
+                    for callback in self._callbacks.pop(path, []):
+                        callback()
+        finally:
+            self._tmpdir.cleanup()
+
+
+def active_batch():
+    """The batch that is active in this process.
+
+    Returns:
+        Union[BatchSave,NoneType]: The batch, or None.
+    """
+    return _ACTIVE_BATCH
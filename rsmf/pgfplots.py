@@ -0,0 +1,277 @@
+"""
+Export of line plots as pgfplots code that reads its data from external tables.
+"""
+
+import math
+from pathlib import Path
+
+import numpy as np
+from matplotlib.colors import to_rgb
+
+from .metrics import TEX_POINTS_PER_INCH
+
+_LINESTYLES = {
+    "-": "solid",
+    "--": "dashed",
+    ":": "dotted",
+    "-.": "dashdotted",
+}
+
+_MARKERS = {
+    "o": "*",
+    ".": "*",
+    "s": "square*",
+    "^": "triangle*",
+    "D": "diamond*",
+    "d": "diamond*",
+    "x": "x",
+    "+": "+",
+    "*": "asterisk",
+    "|": "|",
+    "_": "-",
+}
+
+_MAX_DIGITS = 17
+
+_TABLE_BLOCK_ROWS = 65536
+"""Number of rows of a table that are formatted at once."""
+
+
+def _font(size):
+    """pgfplots style selecting a font size in points."""
+    return rf"font=\fontsize{{{size:g}}}{{{1.2 * size:g}}}\selectfont"
+
+
+def _color(color):
+    red, green, blue = to_rgb(color)
+
+    return f"{{rgb,1:red,{red:.4f};green,{green:.4f};blue,{blue:.4f}}}"
+
+
+def column_format(limits, length, log=False, precision=0.01):
+    """printf-style format that writes coordinates just precise enough to be placed exactly.
+
+    Args:
+        limits (Tuple[float,float]): The limits of the axis in data coordinates.
+        length (float): The length of the axis in points.
+        log (bool, optional): Whether the axis is logarithmic. Defaults to False.
+        precision (float, optional): Precision of the positions in points. Defaults to 0.01,
+            None writes all digits.
+
+    Returns:
+        str: The format.
+    """
+    low, high = sorted(limits)
+    if precision is None or not np.isfinite([low, high]).all() or low == high:
+        return f"%.{_MAX_DIGITS}g"
+
+    if log:
+        # Relative precision of the values, one decade spans length / decades points
+        step = math.log10(high / low) * precision / length * math.log(10)
+        digits = math.ceil(-math.log10(step)) + 1
+        return f"%.{min(max(digits, 1), _MAX_DIGITS)}g"
+
+    step = (high - low) * precision / length
+    decimals = max(0, math.ceil(-math.log10(step)))
+    if decimals + math.log10(max(abs(low), abs(high))) > _MAX_DIGITS:
+        return f"%.{_MAX_DIGITS}g"
+
+    return f"%.{decimals}f"
+
+
+def write_table(path, columns, formats):
+    """Write columns of numbers as a whitespace separated table.
+
+    The rows are written in blocks of :data:`_TABLE_BLOCK_ROWS`, each formatted by a single
+    string formatting operation on its flat array, so the memory needed does not grow with the
+    length of the table.
+
+    Args:
+        path (pathlib.Path): Path of the table.
+        columns (Tuple[numpy.ndarray,...]): The columns, of equal length.
+        formats (Tuple[str,...]): printf-style formats of the columns.
+    """
+    row = " ".join(formats) + "\n"
+    length = len(columns[0]) if len(columns) else 0
+
+    with open(path, "w", encoding="ascii") as file:
+        file.write(" ".join(f"c{index}" for index in range(len(formats))) + "\n")
+        for start in range(0, length, _TABLE_BLOCK_ROWS):
+            block = np.column_stack(
+                [column[start : start + _TABLE_BLOCK_ROWS] for column in columns]
+            ).astype(float)
+            file.write((row * len(block)) % tuple(block.ravel().tolist()))
+
+
+def _line_options(line):
+    """pgfplots options reproducing the style of a line."""
+    options = [f"color={_color(line.get_color())}", f"line width={line.get_linewidth():g}pt"]
+
+    linestyle = line.get_linestyle()
+    if linestyle in _LINESTYLES:
+        options.append(_LINESTYLES[linestyle])
+    else:
+        options.append("draw=none")
+
+    marker = line.get_marker()
+    if marker in _MARKERS:
+        size = line.get_markersize() / 2
+        if marker == ".":
+            size /= 2
+        options += [f"mark={_MARKERS[marker]}", f"mark size={size:g}pt"]
+        if line.get_markerfacecolor() not in ("none", None):
+            options.append(f"mark options={{solid, fill={_color(line.get_markerfacecolor())}}}")
+    else:
+        options.append("mark=none")
+
+    if line.get_alpha() is not None:
+        options.append(f"opacity={line.get_alpha():g}")
+
+    return options
+
+
+# pylint: disable=too-many-locals
+def _axis_options(ax, fontsizes, figure_size):
+    """pgfplots options reproducing the position, limits and labels of an axes."""
+    fig_width, fig_height = figure_size
+    position = ax.get_position()
+    xmin, xmax = ax.get_xlim()
+    ymin, ymax = ax.get_ylim()
+
+    options = [
+        "scale only axis",
+        f"at={{({position.x0 * fig_width:.4f}in,{position.y0 * fig_height:.4f}in)}}",
+        "anchor=south west",
+        f"width={position.width * fig_width:.4f}in",
+        f"height={position.height * fig_height:.4f}in",
+        f"xmin={float(xmin)!r}",
+        f"xmax={float(xmax)!r}",
+        f"ymin={float(ymin)!r}",
+        f"ymax={float(ymax)!r}",
+        f"tick label style={{{_font(fontsizes.footnotesize)}}}",
+        f"label style={{{_font(fontsizes.small)}}}",
+        f"title style={{{_font(fontsizes.large)}}}",
+        f"legend style={{{_font(fontsizes.small)}}}",
+        "tick align=inside",
+    ]
+
+    for name, axis, (low, high) in (("x", ax.xaxis, (xmin, xmax)), ("y", ax.yaxis, (ymin, ymax))):
+        if axis.get_scale() == "log":
+            options.append(f"{name}mode=log")
+
+        ticks = [tick for tick in axis.get_ticklocs() if min(low, high) <= tick <= max(low, high)]
+        options.append(f"{name}tick={{{','.join(repr(float(tick)) for tick in ticks)}}}")
+
+        label = axis.get_label_text()
+        if label:
+            options.append(f"{name}label={{{label}}}")
+
+        if any(line.get_visible() for line in axis.get_gridlines()):
+            options.append(f"{name}majorgrids")
+
+    if xmin > xmax:
+        options.append("x dir=reverse")
+    if ymin > ymax:
+        options.append("y dir=reverse")
+
+    if ax.get_title():
+        options.append(f"title={{{ax.get_title()}}}")
+
+    if not ax.axison:
+        options.append("hide axis")
+
+    return options
+
+
+def _check_supported(fig):
+    """Raise an error if the figure contains artists that can not be exported."""
+    unsupported = [type(artist).__name__ for artist in fig.texts + fig.images + fig.patches]
+
+    for ax in fig.axes:
+        for artists in (ax.collections, ax.images, ax.patches, ax.texts, ax.tables):
+            unsupported += [type(artist).__name__ for artist in artists]
+
+    if unsupported:
+        raise ValueError(
+            "Only lines can be exported as pgfplots tables, the figure also contains "
+            + ", ".join(sorted(set(unsupported)))
+            + "."
+        )
+
+
+# pylint: disable=too-many-locals
+def export(fig, name, fontsizes, precision=0.01, data_path=None):
+    r"""Write the lines of a figure as pgfplots code and external data tables.
+
+    Every line is written to a table ``{name}-{axes}-{line}.dat`` and the code in
+    ``{name}.tex`` reads the tables with ``\addplot table``. The axes keep their position
+    and size within the figure and the text is set in the given font sizes, like in
+    :meth:`rsmf.abstract_formatter.AbstractFormatter.set_default_fontsizes`. Only lines are
+    supported, other artists like images or scatter plots raise an error.
+
+    Args:
+        fig (matplotlib.Figure): The figure to be exported.
+        name (Union[str,pathlib.Path]): Path of the output files without extension.
+        fontsizes (Fontsizes): Font sizes of the document.
+        precision (float, optional): Precision in points with which the data points are
+            placed, determines the number of digits in the tables. Defaults to 0.01,
+            None writes all digits.
+        data_path (str, optional): Directory of the tables as seen from the LaTeX document.
+            Defaults to the directory of ``name``.
+
+    Returns:
+        List[pathlib.Path]: Paths of the code and the tables.
+    """
+    _check_supported(fig)
+
+    name = Path(name)
+    data_path = Path(name.parent if data_path is None else data_path)
+    fig_width, fig_height = fig.get_size_inches()
+
+    lines = [
+        r"\begin{tikzpicture}",
+        rf"\useasboundingbox (0,0) rectangle ({fig_width:.4f}in,{fig_height:.4f}in);",
+    ]
+    paths = [Path(f"{name}.tex")]
+
+    for axes_index, ax in enumerate(fig.axes):
+        position = ax.get_position()
+        width = position.width * fig_width * TEX_POINTS_PER_INCH
+        height = position.height * fig_height * TEX_POINTS_PER_INCH
+        formats = (
+            column_format(ax.get_xlim(), width, ax.get_xscale() == "log", precision),
+            column_format(ax.get_ylim(), height, ax.get_yscale() == "log", precision),
+        )
+
+        options = _axis_options(ax, fontsizes, (fig_width, fig_height))
+        lines.append(r"\begin{axis}[" + ",\n  ".join(options) + "]")
+
+        legend = ax.get_legend()
+        labels = {text.get_text() for text in legend.get_texts()} if legend else set()
+
+        for line_index, line in enumerate(ax.lines):
+            if not line.get_visible():
+                continue
+
+            table = Path(f"{name}-{axes_index}-{line_index}.dat")
+            write_table(table, line.get_xydata().T, formats)
+            paths.append(table)
+
+            options = _line_options(line)
+            label = line.get_label()
+            if label not in labels:
+                options.append("forget plot")
+
+            lines.append(
+                rf"\addplot[{', '.join(options)}] table[x index=0, y index=1]"
+                rf" {{{(data_path / table.name).as_posix()}}};"
+            )
+            if label in labels:
+                lines.append(rf"\addlegendentry{{{label}}}")
+
+        lines.append(r"\end{axis}")
+
+    lines.append(r"\end{tikzpicture}")
+    paths[0].write_text("%\n".join(lines) + "%\n", encoding="utf-8")
+
+    return paths
@@ -0,0 +1,254 @@
+"""
+Fast previews of figures at their printed size, e.g. for notebooks.
+"""
+
+import hashlib
+import io
+import pickle
+from pathlib import Path
+
+import matplotlib as mpl
+from matplotlib.artist import Artist
+from matplotlib.axis import Tick
+from matplotlib.text import Text
+from matplotlib.ticker import TickHelper
+from matplotlib.transforms import BboxBase, TransformNode
+
+from .texcache import atomic_write
+
+CACHE_DIR = Path(mpl.get_cachedir(), "rsmf", "previews")
+"""Default directory in which previews are cached."""
+
+CSS_DPI = 96
+"""Pixels per inch of the CSS unit px, in which notebooks size images."""
+
+_DERIVED_STATE = {
+    "_axobservers",
+    "_callbacks",
+    "_canvas_callbacks",
+    "_number",
+    "_remove_method",
+    "_transformed_path",
+    "axis",
+    "callbacks",
+    "format",
+    "locs",
+    "majorTicks",
+    "minorTicks",
+    "number",
+    "offset",
+    "orderOfMagnitude",
+    "stale",
+}
+"""Attributes of artists and tickers that are caches, recomputed when drawing or that do not
+affect the rendering, like the number of a figure."""
+
+
+def _token(*args):
+    """Stands in for the constructor of objects in the pickled state, which is never loaded."""
+    return args
+
+
+class _HashWriter:
+    """File-like object that feeds everything written to it into a hash."""
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, hasher):
+        self.write = hasher.update
+
+
+class _StatePickler(pickle.Pickler):
+    """Pickler that writes the state of a figure without caches filled in when it is drawn."""
+
+    def reducer_override(self, obj):
+        """Reduce artists, tickers and transforms to the values that determine the drawing."""
+        if isinstance(obj, BboxBase):
+            return _token, ("Bbox", obj.get_points().tolist())
+
+        if isinstance(obj, TransformNode):
+            return _token, (type(obj).__name__, str(obj))
+
+        # Ticks are created while drawing, their style is kept by the axis
+        if isinstance(obj, Tick):
+            return _token, ("Tick",)
+
+        if isinstance(obj, (Artist, TickHelper)):
+            state = obj.__getstate__() if hasattr(obj, "__getstate__") else vars(obj)
+            state = sorted(
+                (key, value) for key, value in state.items() if key not in _DERIVED_STATE
+            )
+            # The state is pickled after the object is memoized, which resolves cycles
+            return _token, (type(obj).__qualname__,), state
+
+        return NotImplemented
+
+
+def figure_hash(fig):
+    """Hash of everything that determines how a figure looks.
+
+    The hash is computed from the pickled state of the figure, leaving out the caches that
+    are filled in when it is drawn. A figure that is created by the same code therefore has
+    the same hash in every session, and drawing a figure only changes its hash once.
+
+    Args:
+        fig (matplotlib.Figure): The figure.
+
+    Returns:
+        Union[str,NoneType]: Hex digest of the figure's state, or None if the figure contains
+            objects that can not be pickled, e.g. lambda functions as tick formatters.
+    """
+    # Apply pending autoscaling, which would otherwise only happen when drawing
+    for ax in fig.axes:
+        ax.get_xlim()
+
+    hasher = hashlib.sha256(f"{mpl.__version__};".encode())
+    try:
+        _StatePickler(_HashWriter(hasher), protocol=4).dump(fig)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+
+    return hasher.hexdigest()
+
+
+def preview_rc(font_family):
+    """rcParams with which previews are rendered.
+
+    Text is rendered by matplotlib's mathtext instead of LaTeX, which is what makes
+    previews fast. Font sizes and the figure size are unchanged.
+
+    Args:
+        font_family (str): Font family of the document.
+
+    Returns:
+        Dict: The rcParams.
+    """
+    return {
+        "text.usetex": False,
+        "font.family": font_family,
+        "mathtext.fontset": "cm" if font_family == "serif" else "dejavusans",
+    }
+
+
+def render_png(fig, dpi, rc):
+    """Render a figure to PNG with the Agg backend.
+
+    The PGF backend can stay active, only this rendering uses Agg. Texts that are marked to
+    be set by LaTeX are rendered by mathtext for the duration of the call.
+
+    Args:
+        fig (matplotlib.Figure): The figure.
+        dpi (float): Resolution of the PNG.
+        rc (dict): rcParams active while rendering, see :func:`preview_rc`.
+
+    Returns:
+        bytes: The PNG file.
+    """
+    usetex = mpl.rcParams["text.usetex"]
+    texts = {text: text.get_usetex() for text in fig.findobj(Text)}
+
+    buffer = io.BytesIO()
+    try:
+        with mpl.rc_context(rc):
+            for text in texts:
+                text.set_usetex(False)
+            fig.savefig(buffer, format="png", dpi=dpi, backend="agg")
+    finally:
+        # Ticks created while rendering take the setting of the figure
+        for text in fig.findobj(Text):
+            text.set_usetex(texts.get(text, usetex))
+
+    return buffer.getvalue()
+
+
+class Preview:
+    """PNG rendering of a figure that notebooks display at the figure's physical size.
+
+    Args:
+        data (bytes): The PNG file.
+        size_inches (Tuple[float,float]): Width and height of the figure in inches.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, data, size_inches):
+        self.data = data
+        self.size_inches = tuple(size_inches)
+
+    def _repr_png_(self):
+        width, height = self.size_inches
+
+        return self.data, {"width": round(width * CSS_DPI), "height": round(height * CSS_DPI)}
+
+    def save(self, path):
+        """Write the PNG file.
+
+        Args:
+            path (Union[str,pathlib.Path]): Path of the file.
+        """
+        Path(path).write_bytes(self.data)
+
+
+def cached_preview(key, size_inches, render, cache_dir=None):
+    """Read a preview from the cache, or render and cache it.
+
+    Args:
+        key (str): Hash identifying the figure and the settings of the rendering.
+        size_inches (Tuple[float,float]): Width and height of the figure in inches.
+        render (callable): Returns the PNG file, called if the preview is not cached.
+        cache_dir (Union[str,pathlib.Path], optional): Directory of the cache.
+            Defaults to :data:`CACHE_DIR`.
+
+    Returns:
+        Preview: The preview.
+    """
+    path = Path(cache_dir or CACHE_DIR, key[:2], f"{key}.png")
+
+    if path.exists():
+        return Preview(path.read_bytes(), size_inches)
+
+    data = render()
+    atomic_write(path, data)
+
+    return Preview(data, size_inches)
+
+
+def rendering_key(figure_key, dpi, rc):
+    """Hash identifying the preview of a figure with given settings.
+
+    Args:
+        figure_key (str): Hash of the figure.
+        dpi (float): Resolution of the preview.
+        rc (dict): rcParams active while rendering.
+
+    Returns:
+        str: Hex digest.
+    """
+    return hashlib.sha256(repr((figure_key, dpi, sorted(rc.items()))).encode()).hexdigest()
+
+
+def preview(fig, dpi, rc, cache_dir=None):
+    """Render a preview of a figure, or read it from the cache.
+
+    Figures that can not be hashed, see :func:`figure_hash`, are rendered every time.
+
+    Args:
+        fig (matplotlib.Figure): The figure.
+        dpi (float): Resolution of the preview.
+        rc (dict): rcParams active while rendering, see :func:`preview_rc`.
+        cache_dir (Union[str,pathlib.Path], optional): Directory of the cache.
+            Defaults to :data:`CACHE_DIR`.
+
+    Returns:
+        Preview: The preview.
+    """
+    key = figure_hash(fig)
+    if key is None:
+        return Preview(render_png(fig, dpi, rc), fig.get_size_inches())
+
+    # Settings that are read while drawing take effect as well
+    key = rendering_key(key, dpi, {**mpl.rcParams, **rc})
+
+    return cached_preview(
+        key, fig.get_size_inches(), lambda: render_png(fig, dpi, rc), cache_dir=cache_dir
+    )
@@ -0,0 +1,237 @@
+"""
+Sampling profiler that records where the time of slow figures goes, as flamegraphs.
+"""
+
+import collections
+import sys
+import threading
+import time
+from pathlib import Path
+
+from .texcache import atomic_write
+
+DEFAULT_THRESHOLD = 1.0
+"""Default time in seconds after which the saving of a figure is sampled."""
+
+DEFAULT_INTERVAL = 0.005
+"""Default time in seconds between two samples."""
+
+CATEGORIES = ("rsmf", "layout", "text", "backend", "other")
+"""Categories to which the samples are attributed."""
+
+_TEXT_MODULES = (
+    "matplotlib._mathtext",
+    "matplotlib._text_helpers",
+    "matplotlib.dviread",
+    "matplotlib.font_manager",
+    "matplotlib.mathtext",
+    "matplotlib.text",
+    "matplotlib.texmanager",
+    "matplotlib.textpath",
+    "rsmf.texcache",
+)
+
+_TEXT_FUNCTIONS = (
+    "LatexManager.",
+    "RendererPgf.get_text_width_height_descent",
+    "_get_preamble",
+)
+
+_LAYOUT_MODULES = (
+    "matplotlib._constrained_layout",
+    "matplotlib._layoutgrid",
+    "matplotlib._tight_bbox",
+    "matplotlib._tight_layout",
+    "matplotlib.layout_engine",
+    "matplotlib.ticker",
+)
+
+_BACKEND_MODULES = (
+    "PIL",
+    "matplotlib._backend_pdf_ps",
+    "matplotlib.backend_bases",
+    "matplotlib.backends",
+)
+
+# Threads that are sampled at the moment, to ignore nested saves like those of export
+_LOCAL = threading.local()
+
+
+def _in_modules(module, modules):
+    """Whether a module is one of the given modules or part of one of these packages."""
+    return any(module == name or module.startswith(name + ".") for name in modules)
+
+
+def category(module, function):
+    """Category of the time spent in a function.
+
+    Args:
+        module (str): Name of the module of the function, e.g. ``"matplotlib.text"``.
+        function (str): Qualified name of the function, e.g. ``"Text.draw"``.
+
+    Returns:
+        Union[str,NoneType]: One of :data:`CATEGORIES` except ``"other"``, or None if the
+            function belongs to none of them, e.g. because it is part of numpy.
+    """
+    if _in_modules(module, _TEXT_MODULES) or (
+        module == "matplotlib.backends.backend_pgf" and function.startswith(_TEXT_FUNCTIONS)
+    ):
+        return "text"
+    if _in_modules(module, _LAYOUT_MODULES):
+        return "layout"
+    if _in_modules(module, _BACKEND_MODULES):
+        return "backend"
+    if _in_modules(module, ("rsmf",)):
+        return "rsmf"
+
+    return None
+
+
+def _collapse(frame, root):
+    """Category and functions of a stack from the root frame to the innermost frame."""
+    functions = []
+    kind = None
+
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        # Qualified names of code objects are available from Python 3.11 on
+        function = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+        # Time is attributed to the innermost function of a category, e.g. LaTeX runs
+        # during the layout count as text
+        kind = kind or category(module, function)
+        functions.append(f"{module}:{function}")
+
+        if frame is root:
+            break
+        frame = frame.f_back
+
+    return (kind or "other",) + tuple(reversed(functions))
+
+
+class _Sampling:
+    """Context in which the calling thread is sampled once it took longer than a threshold."""
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+        self._stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+        self._ident = None
+        self._root = None
+        self._start = None
+
+    def __enter__(self):
+        if getattr(_LOCAL, "active", False):
+            return self
+
+        _LOCAL.active = True
+        self._ident = threading.get_ident()
+        self._root = sys._getframe(1)  # pylint: disable=protected-access
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._start = time.perf_counter()
+        self._thread.start()
+
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join()
+        _LOCAL.active = False
+
+        seconds = time.perf_counter() - self._start
+        self._root = None
+        if self._stacks:
+            self._profiler.record(self._name, self._stacks, seconds)
+
+    def _sample(self):
+        """Take samples of the stack until the sampled code returns."""
+        if self._stop.wait(self._profiler.threshold):
+            return
+
+        while True:
+            frame = sys._current_frames().get(self._ident)  # pylint: disable=protected-access
+            if frame is not None:
+                self._stacks[_collapse(frame, self._root)] += 1
+            del frame
+
+            if self._stop.wait(self._profiler.interval):
+                return
+
+
+class Profiler:
+    """Samples the stack while slow figures are saved and writes a flamegraph of each.
+
+    Attach it to a formatter via ``formatter.profiler = Profiler("profiles")``, after which
+    every figure saved with :meth:`rsmf.abstract_formatter.AbstractFormatter.savefig` or
+    :meth:`rsmf.abstract_formatter.AbstractFormatter.export` that takes longer than
+    ``threshold`` is sampled until it is saved. Faster figures only cost the start of a
+    thread that waits for the threshold.
+
+    Each flamegraph is written in the collapsed stack format, one line per distinct stack
+    with the number of samples, which tools like ``flamegraph.pl`` or speedscope read. The
+    first frame of every stack is the category of its time, see :func:`category`.
+
+    Args:
+        directory (Union[str,pathlib.Path]): Directory of the flamegraphs, created if
+            necessary.
+        threshold (float, optional): Time in seconds after which a figure is sampled.
+            Defaults to 1 second.
+        interval (float, optional): Time in seconds between two samples. Defaults to 5 ms.
+    """
+
+    def __init__(self, directory, threshold=DEFAULT_THRESHOLD, interval=DEFAULT_INTERVAL):
+        self.directory = Path(directory)
+        self.threshold = threshold
+        self.interval = interval
+        self.entries = []
+
+    def profile(self, name):
+        """Sample the code in a with statement if it takes longer than the threshold.
+
+        Nested profiles in the same thread are part of the outer one.
+
+        Args:
+            name (str): Name of the flamegraph, e.g. the name of the output file.
+
+        Returns:
+            ContextManager: The context of the sampled code.
+        """
+        return _Sampling(self, name)
+
+    def record(self, name, stacks, seconds):
+        """Write the flamegraph of a sampled figure.
+
+        Args:
+            name (str): Name of the flamegraph.
+            stacks (Dict[Tuple[str],int]): Number of samples of every stack, each starting
+                with its category.
+            seconds (float): Time the figure took in total.
+
+        Returns:
+            Dict: The entry of the figure, with the path of the flamegraph, the total time
+                and the sampled time in seconds of every category.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{name}.folded"
+        lines = [f"{';'.join(stack)} {count}\n" for stack, count in sorted(stacks.items())]
+        atomic_write(path, "".join(lines).encode("utf-8"))
+
+        categories = dict.fromkeys(CATEGORIES, 0.0)
+        for stack, count in stacks.items():
+            categories[stack[0]] += count * self.interval
+
+        entry = {
+            "name": name,
+            "path": str(path),
+            "seconds": round(seconds, 4),
+            "sampled": {kind: round(value, 4) for kind, value in categories.items()},
+        }
+        self.entries.append(entry)
+
+        return entry
@@ -32,6 +32,8 @@ class QuantumarticleFormatter(RevtexLikeFormatter):
 
     _colors = {"quantumviolet": "#53257F", "quantumgray": "#555555"}
 
+    font_family = "sans-serif"
+
     # pylint: disable=unused-argument
     def __init__(self, columns="twocolumn", paper="a4paper", fontsize=10, **kwargs):
         super().__init__(columns, paper, fontsize)
@@ -40,7 +42,7 @@ class QuantumarticleFormatter(RevtexLikeFormatter):
         """Adjust the rcParams to the default values for Quantumarticle."""
         super().set_rcParams()
 
-        plt.rcParams["font.family"] = "sans-serif"
+        plt.rcParams["font.family"] = self.font_family
 
         plt.rcParams["pgf.preamble"] = (
             r"\usepackage{lmodern} \usepackage[utf8x]{inputenc} \usepackage[T1]{fontenc}"
@@ -0,0 +1,172 @@
+"""
+Downsampling of raster data to the resolution at which it is printed.
+"""
+
+import math
+
+import matplotlib as mpl
+import numpy as np
+
+
+def print_shape(fig, dpi):
+    """Number of printed dots of a figure.
+
+    Args:
+        fig (matplotlib.Figure): The figure.
+        dpi (float): The print resolution in dots per inch.
+
+    Returns:
+        Tuple[int,int]: Number of dots in vertical and horizontal direction.
+    """
+    width, height = fig.get_size_inches()
+
+    return math.ceil(height * dpi), math.ceil(width * dpi)
+
+
+def _block_sizes(length, factor):
+    """Sizes of the blocks of ``factor`` entries along an axis, including a shorter last block."""
+    return np.diff(np.append(np.arange(0, length, factor), length))
+
+
+def _block_sum(data, factors, dtype=None):
+    """Sum blocks of the first two axes, including shorter last blocks."""
+    for axis, factor in enumerate(factors):
+        starts = np.arange(0, data.shape[axis], factor)
+        data = np.add.reduceat(data, starts, axis=axis, dtype=dtype)
+
+    return data
+
+
+def downsample(data, shape):
+    """Downsample an array by averaging blocks of integer size.
+
+    The block sizes are the smallest integers that reduce the first two axes of ``data`` to at
+    most ``shape``. Trailing rows and columns that do not fill a complete block are averaged as
+    a smaller last block, so no data is lost. Masked entries and NaN are left out of the
+    averages, blocks in which all entries are masked or NaN stay masked or NaN. The blocks of
+    arrays without NaN are summed without copying the data first, which allows to reduce
+    memory-mapped arrays.
+
+    Args:
+        data (numpy.ndarray): Array of shape (rows, columns) or (rows, columns, channels).
+        shape (Tuple[int,int]): Maximal number of rows and columns of the result.
+
+    Returns:
+        Tuple[numpy.ndarray,Tuple[int,int]]: The downsampled array and the number of rows and
+            columns of ``data`` that were averaged per block.
+    """
+    rows, cols = data.shape[:2]
+    factors = (max(1, math.ceil(rows / shape[0])), max(1, math.ceil(cols / shape[1])))
+
+    if factors == (1, 1):
+        return data, (1, 1)
+
+    masked = isinstance(data, np.ma.MaskedArray)
+    if masked:
+        valid = ~np.ma.getmaskarray(data)
+        values = data.filled(0)
+    elif np.issubdtype(data.dtype, np.inexact):
+        valid = ~np.isnan(data)
+        values = data if valid.all() else np.where(valid, data, 0)
+    else:
+        valid = None
+        values = data
+
+    sums = _block_sum(values, factors, dtype=np.result_type(data.dtype, np.float64))
+    if valid is None:
+        counts = np.multiply.outer(_block_sizes(rows, factors[0]), _block_sizes(cols, factors[1]))
+        counts = counts.reshape(counts.shape + (1,) * (data.ndim - 2))
+    else:
+        counts = _block_sum(valid, factors, dtype=np.intp)
+
+    if masked:
+        reduced = np.ma.masked_array(sums / np.maximum(counts, 1), mask=counts == 0)
+    else:
+        # Blocks of only NaN are 0 / 0
+        with np.errstate(invalid="ignore"):
+            reduced = sums / counts
+
+    if np.issubdtype(data.dtype, np.integer):
+        reduced = reduced.round().astype(data.dtype)
+    elif np.issubdtype(data.dtype, np.inexact):
+        reduced = reduced.astype(data.dtype)
+
+    return reduced, factors
+
+
+def _reduce_coordinates(coords, n_cells, factor):
+    """Reduce cell edges or centers alongside the data."""
+    coords = np.asarray(coords)
+
+    if len(coords) == n_cells + 1:
+        edges = coords[::factor]
+        if n_cells % factor:
+            edges = np.append(edges, coords[-1])
+        return edges
+
+    if len(coords) == n_cells:
+        starts = np.arange(0, n_cells, factor)
+        return np.add.reduceat(coords, starts, dtype=float) / _block_sizes(n_cells, factor)
+
+    raise ValueError(f"Coordinates of length {len(coords)} do not match data with {n_cells} cells.")
+
+
+# pylint: disable=invalid-name
+def imshow(ax, X, dpi, **kwargs):
+    """Show an image downsampled to the printed resolution of its figure.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes to draw into.
+        X (numpy.ndarray): The image data.
+        dpi (float): The print resolution in dots per inch.
+        **kwargs: Passed on to ``matplotlib.axes.Axes.imshow``.
+
+    Returns:
+        matplotlib.image.AxesImage: The image.
+    """
+    rows, cols = X.shape[:2]
+    reduced, _ = downsample(X, print_shape(ax.figure, dpi))
+
+    if reduced is X:
+        return ax.imshow(X, **kwargs)
+
+    # The reduced image covers the extent of the original, a shorter last block of pixels is
+    # stretched by less than a printed dot
+    origin = kwargs.get("origin") or mpl.rcParams["image.origin"]
+    extent = kwargs.pop("extent", None)
+    if extent is None:
+        extent = (-0.5, cols - 0.5, rows - 0.5, -0.5)
+        if origin == "lower":
+            extent = (-0.5, cols - 0.5, -0.5, rows - 0.5)
+
+    return ax.imshow(reduced, extent=extent, **kwargs)
+
+
+# pylint: disable=invalid-name,too-many-arguments
+def pcolormesh(ax, C, dpi, x=None, y=None, **kwargs):
+    """Draw a pseudocolor plot downsampled to the printed resolution of its figure.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes to draw into.
+        C (numpy.ndarray): The color values of shape (rows, columns).
+        dpi (float): The print resolution in dots per inch.
+        x (numpy.ndarray, optional): One dimensional cell edges or centers in horizontal
+            direction. Defaults to the column indices.
+        y (numpy.ndarray, optional): One dimensional cell edges or centers in vertical
+            direction. Defaults to the row indices.
+        **kwargs: Passed on to ``matplotlib.axes.Axes.pcolormesh``.
+
+    Returns:
+        matplotlib.collections.QuadMesh: The pseudocolor plot.
+    """
+    rows, cols = C.shape[:2]
+    x = np.arange(cols + 1) if x is None else x
+    y = np.arange(rows + 1) if y is None else y
+
+    reduced, (row_factor, col_factor) = downsample(C, print_shape(ax.figure, dpi))
+
+    if reduced is not C:
+        x = _reduce_coordinates(x, cols, col_factor)
+        y = _reduce_coordinates(y, rows, row_factor)
+
+    return ax.pcolormesh(x, y, reduced, **kwargs)
@@ -0,0 +1,180 @@
+"""
+Report of the size and rendering cost of saved figures, with budgets that can be checked in CI.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from matplotlib.collections import Collection
+from matplotlib.image import AxesImage
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from matplotlib.text import Text
+
+DEFAULT_MAX_BYTES = 2 * 2**20
+"""Default budget for the size of an output file."""
+
+DEFAULT_MAX_SECONDS = 5.0
+"""Default budget for the time it takes to save a figure."""
+
+
+def figure_statistics(fig):
+    """Count the artists, path vertices and texts of a figure.
+
+    Args:
+        fig (matplotlib.Figure): The figure, after it was drawn.
+
+    Returns:
+        Dict[str,int]: Number of visible artists, of vertices of their paths, of texts that
+            are typeset by LaTeX and of image pixels.
+    """
+    artists = vertices = texts = pixels = 0
+
+    for artist in fig.findobj(lambda artist: artist.get_visible()):
+        artists += 1
+
+        if isinstance(artist, Text):
+            texts += bool(artist.get_text())
+        elif isinstance(artist, Line2D):
+            vertices += len(artist.get_xydata())
+        elif isinstance(artist, Patch):
+            vertices += len(artist.get_path().vertices)
+        elif isinstance(artist, Collection):
+            paths = artist.get_paths()
+            offsets = len(artist.get_offsets())
+            path_vertices = sum(len(path.vertices) for path in paths)
+            # Collections with offsets draw their paths at every offset
+            vertices += path_vertices * max(1, offsets) // max(1, len(paths))
+        elif isinstance(artist, AxesImage):
+            pixels += int(np.prod(artist.get_array().shape[:2]))
+
+    return {"artists": artists, "vertices": vertices, "texts": texts, "pixels": pixels}
+
+
+class Report:
+    """Collects the size and saving time of figures and checks them against budgets.
+
+    Attach it to a formatter via ``formatter.report = Report()``, after which every
+    figure saved with :meth:`rsmf.abstract_formatter.AbstractFormatter.savefig` or
+    :meth:`rsmf.abstract_formatter.AbstractFormatter.export` is recorded.
+
+    Args:
+        max_bytes (int, optional): Budget for the size of an output file. Defaults to 2 MiB.
+        max_seconds (float, optional): Budget for the time it takes to save a figure.
+            Defaults to 5 seconds.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_seconds=DEFAULT_MAX_SECONDS):
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.entries = []
+
+    def record(self, fig, path, seconds):
+        """Add a saved figure to the report.
+
+        Args:
+            fig (matplotlib.Figure): The saved figure.
+            path (Union[str,pathlib.Path]): Path of the output file.
+            seconds (float): Time it took to save the figure.
+
+        Returns:
+            Dict: The entry of the figure.
+        """
+        path = Path(path)
+        size = os.path.getsize(path)
+
+        over_budget = []
+        if self.max_bytes is not None and size > self.max_bytes:
+            over_budget.append("bytes")
+        if self.max_seconds is not None and seconds > self.max_seconds:
+            over_budget.append("seconds")
+
+        entry = {
+            "path": str(path),
+            "format": path.suffix.lstrip(".").lower(),
+            "bytes": size,
+            "seconds": round(seconds, 4),
+            **figure_statistics(fig),
+            "over_budget": over_budget,
+        }
+        self.entries.append(entry)
+
+        return entry
+
+    def timed_save(self, fig, save):
+        """Save a figure and record it.
+
+        Args:
+            fig (matplotlib.Figure): The figure.
+            save (callable): Saves the figure and returns the path of the output file.
+
+        Returns:
+            pathlib.Path: The path returned by ``save``.
+        """
+        start = time.perf_counter()
+        path = save()
+        self.record(fig, path, time.perf_counter() - start)
+
+        return path
+
+    @property
+    def failures(self):
+        """List[Dict]: Entries of the figures that exceed a budget."""
+        return [entry for entry in self.entries if entry["over_budget"]]
+
+    def to_dict(self):
+        """The report as a JSON serializable dict.
+
+        Returns:
+            Dict: The budgets, the entries of all figures and the number of figures that
+                exceed a budget.
+        """
+        return {
+            "budget": {"max_bytes": self.max_bytes, "max_seconds": self.max_seconds},
+            "figures": self.entries,
+            "total_bytes": sum(entry["bytes"] for entry in self.entries),
+            "total_seconds": round(sum(entry["seconds"] for entry in self.entries), 4),
+            "over_budget": len(self.failures),
+        }
+
+    def write(self, path):
+        """Write the report as JSON.
+
+        Args:
+            path (Union[str,pathlib.Path]): Path of the report.
+        """
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+
+def main(argv=None):
+    """Check a written report, for use in CI: ``python -m rsmf.report report.json``.
+
+    Prints the figures that exceed a budget.
+
+    Returns:
+        int: 1 if any figure exceeds a budget, 0 otherwise.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1:
+        print("Usage: python -m rsmf.report REPORT.json", file=sys.stderr)
+        return 2
+
+    report = json.loads(Path(argv[0]).read_text(encoding="utf-8"))
+    budget = report["budget"]
+
+    for entry in report["figures"]:
+        if entry["over_budget"]:
+            print(
+                f"{entry['path']}: {entry['bytes']} bytes (budget {budget['max_bytes']}), "
+                f"{entry['seconds']} s (budget {budget['max_seconds']})"
+            )
+
+    return int(report["over_budget"] > 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
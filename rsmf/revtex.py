@@ -28,6 +28,8 @@ class RevtexFormatter(RevtexLikeFormatter):
         "twocolumn": {"a4paper": 7.08},
     }
 
+    font_family = "serif"
+
     # pylint: disable=unused-argument
     def __init__(self, columns="twocolumn", fontsize=10, **kwargs):
         super().__init__(columns, "a4paper", fontsize)
@@ -36,7 +38,7 @@ class RevtexFormatter(RevtexLikeFormatter):
         """Adjust the rcParams to the default values for Revtex."""
         super().set_rcParams()
 
-        plt.rcParams["font.family"] = "serif"
+        plt.rcParams["font.family"] = self.font_family
 
 
 # pylint: disable=invalid-name
@@ -52,12 +52,8 @@ class RevtexLikeFormatter(AbstractFormatter):
         """Fontsizes as specified by the underlying document."""
         return DEFAULT_FONTSIZES[self.fontsize]
 
-    def __eq__(self, other):
-        return (
-            self.fontsize == other.fontsize
-            and self.columns == other.columns
-            and self.paper == other.paper
-        )
+    def _configuration(self):
+        return (self.columns, self.paper, self.fontsize)
 
 
 class RevtexLikeParser:
@@ -84,10 +80,28 @@ class RevtexLikeParser:
             Union[NoneType,Formatter]: Either a formatter if the target document has the given
                 document class or None.
         """
+        configuration = self.configuration(preamble)
+        if configuration is None:
+            return None
+
+        formatter_class, formatter_kwargs = configuration
+
+        return formatter_class(**formatter_kwargs)
+
+    def configuration(self, preamble):
+        """Parse the given preamble without creating the formatter.
+
+        Args:
+            preamble (string): Preamble of the target document.
+
+        Returns:
+            Union[NoneType,Tuple[class,Dict]]: Either the formatter class and its keyword
+                arguments if the target document has the given document class or None.
+        """
         # IDEA: Add support for regexes to support things like \documentclass[rmp,aps]{revtex4-1}
         for documentclass_identifier in self.documentclass_identifiers:
             if documentclass_identifier in preamble:
-                return self.formatter_class(**self._extract_kwargs(preamble))
+                return self.formatter_class, self._extract_kwargs(preamble)
 
         return None
 
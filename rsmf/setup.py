@@ -2,13 +2,30 @@
 Main routines to invoke the module from code.
 """
 
+import functools
+import importlib
+import importlib.metadata
 import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from .quantumarticle import quantumarticle_parser
-from .revtex import revtex_parser
+from .custom_formatter import CustomFormatter
 
-_PARSERS = [quantumarticle_parser, revtex_parser]
+ENTRY_POINT_GROUP = "rsmf.parsers"
+"""Entry point group under which packages can register parsers for further document classes.
+
+The name of an entry point is the document class it handles, its value points to the parser,
+e.g. ``myjournal = "mypackage.formatter:myjournal_parser"``. The parser is only imported once a
+preamble with that document class is set up.
+"""
+
+_BUILTIN_PARSERS = {
+    "quantumarticle": "rsmf.quantumarticle:quantumarticle_parser",
+    "revtex4-1": "rsmf.revtex:revtex_parser",
+    "revtex4-2": "rsmf.revtex:revtex_parser",
+}
+
+_REGISTERED_PARSERS = {}
 
 _COMMENT_REGEX = re.compile("(%.*)")
 
@@ -50,34 +67,187 @@ def _extract_preamble(path):
     return "".join(lines)
 
 
-def setup(arg):
-    """Get a formatter corresponding to the document's class.
+def register_parser(documentclass, parser):
+    """Register a parser for a document class.
+
+    Parsers registered this way take precedence over built-in parsers and parsers registered
+    via entry points (see :data:`ENTRY_POINT_GROUP`).
 
     Args:
-        arg (str): Either path to a tex file or preamble of a tex file,
-            containing at least the \\documentclass command.
+        documentclass (str): Name of the document class, e.g. "revtex4-2".
+        parser (Union[str,callable]): The parser, or a string "module:attribute" pointing to it,
+            in which case it is only imported when it is needed. A parser is called with the
+            preamble and returns either a formatter or None.
+    """
+    _REGISTERED_PARSERS[documentclass] = parser
 
-    Raises:
-        Exception: When no formatter for the given document was found.
 
-    Returns:
-        object: A formatter for the given document/preamble.
+@functools.lru_cache(maxsize=None)
+def _entry_point_parsers():
+    """Parsers registered by installed packages, only their names are read."""
+    try:
+        entry_points = importlib.metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:  # Python < 3.10
+        entry_points = importlib.metadata.entry_points().get(ENTRY_POINT_GROUP, [])
+
+    return {entry_point.name: entry_point for entry_point in entry_points}
+
+
+def _parser_registry():
+    """All known parsers by document class, later sources take precedence."""
+    registry = dict(_BUILTIN_PARSERS)
+    registry.update(_entry_point_parsers())
+    registry.update(_REGISTERED_PARSERS)
+
+    return registry
+
+
+def _load_parser(parser):
+    """Import a lazily registered parser."""
+    if isinstance(parser, importlib.metadata.EntryPoint):
+        return parser.load()
+
+    if isinstance(parser, str):
+        module, _, attribute = parser.partition(":")
+        return getattr(importlib.import_module(module), attribute)
+
+    return parser
+
+
+def _find_parsers(preamble, registry=None, loaded=None):
+    """Load the parsers whose document class appears in the preamble.
+
+    Args:
+        preamble (str): The cleaned preamble.
+        registry (Dict, optional): Parsers by document class. Defaults to all known parsers.
+        loaded (Dict, optional): Already loaded parsers by document class, which is updated.
     """
+    registry = _parser_registry() if registry is None else registry
+    loaded = {} if loaded is None else loaded
+
+    parsers = []
+    for documentclass, parser in registry.items():
+        if f"{{{documentclass}}}" in preamble:
+            if documentclass not in loaded:
+                loaded[documentclass] = _load_parser(parser)
+            parsers.append(loaded[documentclass])
+
+    return parsers
+
+
+def _read_preamble(arg):
+    """The cleaned preamble of a path to a tex file or of a preamble."""
     if Path(arg).exists():
         preamble = _extract_preamble(arg)
     else:
         preamble = arg
 
-    preamble = _clean_preamble(preamble)
+    return _clean_preamble(preamble)
+
 
-    result = None
-    for parser in _PARSERS:
-        result = parser(preamble)
+def _find_formatter(preamble, parsers, interned=False):
+    """Ask the parsers and then the database for the formatter of a cleaned preamble.
+
+    With ``interned``, formatters are created via
+    :meth:`rsmf.abstract_formatter.AbstractFormatter.interned` where the parser can describe
+    the configuration without creating the formatter, so that equal configurations share one
+    formatter.
+    """
+    for parser in parsers:
+        if interned and hasattr(parser, "configuration"):
+            configuration = parser.configuration(preamble)
+            result = configuration and configuration[0].interned(**configuration[1])
+        else:
+            result = parser(preamble)
 
         if result:
             return result
 
+    # Imported here, which keeps import rsmf fast
+    from . import journals  # pylint: disable=import-outside-toplevel
+
+    if interned:
+        formatter_kwargs = journals.configuration(preamble)
+        return formatter_kwargs and CustomFormatter.interned(**formatter_kwargs)
+
+    return journals.lookup(preamble)
+
+
+def setup(arg):
+    """Get a formatter corresponding to the document's class.
+
+    Args:
+        arg (str): Either path to a tex file or preamble of a tex file,
+            containing at least the \\documentclass command.
+
+    The parser for the document class is taken from the built-in parsers, from parsers that
+    installed packages register via entry points in the :data:`ENTRY_POINT_GROUP` group and from
+    parsers registered with :func:`register_parser`. Parsers are imported only when their
+    document class is used.
+
+    Document classes without a dedicated parser are looked up in the bundled database of
+    column widths and font sizes, see :mod:`rsmf.journals`.
+
+    Raises:
+        Exception: When no formatter for the given document was found.
+
+    Returns:
+        object: A formatter for the given document/preamble.
+    """
+    preamble = _read_preamble(arg)
+
+    result = _find_formatter(preamble, _find_parsers(preamble))
+    if result:
+        return result
+
     raise RuntimeError(
-        "No formatter was found for the given argument. This means either there is no formatter,"
-        + " or, if you gave a file path that it does not exist."
+        "No formatter was found for the given argument. This means either there is no formatter"
+        + " for the document class and its options, or, if you gave a file path that it does not"
+        + " exist. rsmf.probe measures the document with LaTeX instead."
     )
+
+
+def setup_many(args, max_threads=8):
+    """Get the formatters of many documents at once, e.g. of all papers in a repository.
+
+    The preambles are read concurrently by at most ``max_threads`` threads and then passed
+    through the parsers in one pass, see :func:`setup`. Documents with the same configuration,
+    e.g. the same document class, columns, paper and font size, get the same formatter, which
+    is created only once via :meth:`rsmf.abstract_formatter.AbstractFormatter.interned`. The
+    formatters are not activated again, call ``activate()`` before plotting with one of them.
+    As they are shared, their settings like ``snapshot_dir`` or ``report`` can not be changed,
+    call ``copy()`` to get a formatter for a single document.
+
+    Args:
+        args (Iterable[str]): Paths to tex files or preambles, as for :func:`setup`.
+        max_threads (int, optional): Number of threads reading the files. Defaults to 8.
+
+    Raises:
+        RuntimeError: When no formatter was found for some of the documents.
+
+    Returns:
+        List: The formatters in the order of ``args``.
+    """
+    args = list(args)
+
+    with ThreadPoolExecutor(max_workers=max_threads) as executor:
+        preambles = list(executor.map(_read_preamble, args))
+
+    registry = _parser_registry()
+    loaded = {}
+    formatters = {}
+
+    # Identical preambles are only parsed once
+    for preamble in dict.fromkeys(preambles):
+        parsers = _find_parsers(preamble, registry, loaded)
+        formatters[preamble] = _find_formatter(preamble, parsers, interned=True)
+
+    missing = [str(arg) for arg, preamble in zip(args, preambles) if not formatters[preamble]]
+    if missing:
+        raise RuntimeError(
+            "No formatter was found for the following arguments, either there is no formatter"
+            + " or the files do not exist: "
+            + ", ".join(missing)
+        )
+
+    return [formatters[preamble] for preamble in preambles]
@@ -0,0 +1,178 @@
+"""
+Snapshots of saved figures that are rendered again with the style of another document.
+"""
+
+import hashlib
+import math
+import pickle
+import warnings
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+from matplotlib.text import Text
+
+from .texcache import atomic_write
+
+_RELATIVE_TOLERANCE = 1e-3
+
+
+class SnapshotStore:
+    """Directory with the pickled figures and styles of everything saved through a formatter.
+
+    Every snapshot holds the figure with its data as well as the column widths, font sizes and
+    font family of the formatter it was saved with. A snapshot is replaced when the same
+    output file is saved again.
+
+    Args:
+        directory (Union[str,pathlib.Path]): The directory, created if necessary.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def record(self, fig, fname, formatter, **kwargs):
+        """Store a snapshot of a figure that is saved.
+
+        Figures that can not be pickled, e.g. because of lambda functions as tick formatters,
+        are skipped with a warning.
+
+        Args:
+            fig (matplotlib.Figure): The figure.
+            fname (Union[str,pathlib.Path]): Path of the output file.
+            formatter (AbstractFormatter): The formatter the figure is saved with.
+            **kwargs: Keyword arguments of ``matplotlib.Figure.savefig``.
+
+        Returns:
+            Union[pathlib.Path,NoneType]: Path of the snapshot, or None if it was skipped.
+        """
+        fname = Path(fname).resolve()
+        snapshot = {
+            "figure": fig,
+            "fname": str(fname),
+            "kwargs": kwargs,
+            "columnwidth": formatter.columnwidth,
+            "wide_columnwidth": formatter.wide_columnwidth,
+            "fontsizes": formatter.fontsizes,
+            "font_family": formatter.font_family,
+        }
+
+        try:
+            data = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as error:
+            warnings.warn(f"No snapshot of {fname.name} is stored, it can not be pickled: {error}")
+            return None
+
+        key = hashlib.sha256(str(fname).encode()).hexdigest()[:16]
+        path = self.directory / f"{fname.name}.{key}.snapshot"
+        atomic_write(path, data)
+
+        return path
+
+    def paths(self):
+        """Paths of the stored snapshots.
+
+        Returns:
+            List[pathlib.Path]: The paths, sorted by name.
+        """
+        return sorted(self.directory.glob("*.snapshot"))
+
+    def rerender(self, formatter, output_dir=None):
+        """Render all snapshots again with the style of another formatter.
+
+        See :func:`restyle`. The figures are saved by ``formatter.savefig``.
+
+        Args:
+            formatter (AbstractFormatter): The formatter of the new document. It is activated.
+            output_dir (Union[str,pathlib.Path], optional): Directory of the new outputs, which
+                keep their names, created if necessary. Defaults to None, which overwrites the
+                original outputs.
+
+        Returns:
+            List[pathlib.Path]: Paths of the written files.
+        """
+        formatter.activate()
+        if output_dir is not None:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+
+        written = []
+
+        for path in self.paths():
+            # Unpickled figures are managed by pyplot
+            snapshot = pickle.loads(path.read_bytes())
+            fig = snapshot["figure"]
+
+            try:
+                restyle(fig, snapshot, formatter)
+
+                fname = Path(snapshot["fname"])
+                if output_dir is not None:
+                    fname = Path(output_dir, fname.name)
+
+                written.append(formatter.savefig(fig, fname, **snapshot["kwargs"]))
+            finally:
+                plt.close(fig)
+
+        return written
+
+
+def _map_fontsize(size, old, new):
+    """Map a font size to the size with the same name in another palette, or scale it."""
+    for old_size, new_size in zip(old.astuple(), new.astuple()):
+        if math.isclose(size, old_size, rel_tol=_RELATIVE_TOLERANCE):
+            return new_size
+
+    return size * new.normalsize / old.normalsize
+
+
+def restyle(fig, snapshot, formatter):
+    """Change the style of a figure from the formatter of its snapshot to another formatter.
+
+    The figure is resized to the same fraction of the new column width, or of the new wide
+    column width for figures wider than a column, keeping its aspect ratio. Texts whose size
+    is one of the named sizes of the old document, e.g. ``small``, get the size of the same
+    name in the new document, others are scaled with the normal size. Texts in the old font
+    family are set in the new one. Everything that is read from the rcParams while drawing,
+    like the LaTeX preamble, comes from the new formatter.
+
+    Args:
+        fig (matplotlib.Figure): The figure, it is changed in place.
+        snapshot (dict): The style of the old formatter as stored by
+            :meth:`SnapshotStore.record`.
+        formatter (AbstractFormatter): The new formatter.
+
+    Raises:
+        ValueError: If the figure is wide and the new formatter has no wide column width.
+    """
+    width, height = fig.get_size_inches()
+
+    wide = bool(snapshot["wide_columnwidth"]) and width > snapshot["columnwidth"] * (
+        1 + _RELATIVE_TOLERANCE
+    )
+    if wide and not formatter.wide_columnwidth:
+        raise ValueError("The formatter's wide_columnwidth was not set.")
+
+    if wide:
+        scale = formatter.wide_columnwidth / snapshot["wide_columnwidth"]
+    else:
+        scale = formatter.columnwidth / snapshot["columnwidth"]
+    fig.set_size_inches(width * scale, height * scale)
+
+    old, new = snapshot["fontsizes"], formatter.fontsizes
+    axes_ticks = [
+        (axis, which, ticks)
+        for ax in fig.axes
+        for axis in (ax.xaxis, ax.yaxis)
+        for which, ticks in (("major", axis.get_major_ticks()), ("minor", axis.get_minor_ticks()))
+    ]
+
+    for text in fig.findobj(Text):
+        text.set_fontsize(_map_fontsize(text.get_fontsize(), old, new))
+
+        if text.get_fontfamily() == [snapshot["font_family"]]:
+            text.set_fontfamily(formatter.font_family)
+
+    # Ticks that are created while drawing take their size from the axis
+    for axis, which, ticks in axes_ticks:
+        if ticks:
+            axis.set_tick_params(which=which, labelsize=ticks[0].label1.get_fontsize())
@@ -0,0 +1,42 @@
+"""
+Figure skeletons that are built and laid out once and cloned for every figure.
+"""
+
+import pickle
+
+
+class FigureTemplate:
+    """A laid out figure skeleton from which figures are cloned.
+
+    The template is stored as the pickled figure, so every clone is an independent figure
+    that is restored without running the code that built the skeleton. Clones are managed by
+    pyplot like figures created by ``plt.figure`` and use the active backend, i.e. PGF for
+    the formatters. Use it via :meth:`rsmf.abstract_formatter.AbstractFormatter.template`.
+
+    Args:
+        fig (matplotlib.Figure): The skeleton, it has to be picklable, e.g. tick formatters
+            must not be lambda functions.
+        skeleton (object, optional): Artists of the skeleton that are handed out with every
+            clone, e.g. the axes. Defaults to None.
+        freeze_layout (bool, optional): Compute the layout, e.g. of ``layout="constrained"``,
+            once for the template and keep it fixed in the clones. Defaults to True.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, fig, skeleton=None, freeze_layout=True):
+        if freeze_layout:
+            fig.draw_without_rendering()
+            fig.set_layout_engine("none")
+
+        # Pickled together, so that the skeleton refers to the artists of the clone
+        self._data = pickle.dumps((fig, skeleton), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def figure(self):
+        """Create a figure from the template.
+
+        Returns:
+            Tuple[matplotlib.Figure,object]: The new figure and the artists of its skeleton,
+                like ``plt.subplots`` returns the figure and its axes.
+        """
+        return pickle.loads(self._data)
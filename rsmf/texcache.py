@@ -0,0 +1,339 @@
+"""
+Typesetting cache in a directory that is shared by many processes, e.g. of a parallel build.
+"""
+
+import contextlib
+import functools
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+try:
+    import fcntl
+
+    msvcrt = None  # pylint: disable=invalid-name
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_MAX_BYTES = 2**30
+"""Default size limit of a shared cache."""
+
+_CLEANUP_INTERVAL = 256
+
+_LOCK_STRIPES = 256
+
+_ACTIVE = None
+_ORIGINALS = {}
+
+# The backends are imported once a cache is installed, as this module is loaded by import rsmf
+# pylint: disable=import-outside-toplevel
+
+
+def _hash(*parts):
+    """Hex digest identifying the given strings."""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+@contextlib.contextmanager
+def file_lock(path, blocking=True):
+    """Hold an exclusive lock on a file, across processes.
+
+    Args:
+        path (Union[str,pathlib.Path]): Path of the lock file, it is created if necessary.
+        blocking (bool, optional): Wait for the lock if it is held by someone else.
+            Defaults to True.
+
+    Yields:
+        bool: Whether the lock was acquired, always True when blocking.
+    """
+    with open(path, "a+b") as file:
+        try:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            if blocking:
+                raise
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, data):
+    """Write a file such that readers see either nothing or the complete content.
+
+    Args:
+        path (pathlib.Path): Path of the file.
+        data (bytes): The content.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_name)
+        raise
+
+
+class TexCache:
+    """A directory of typesetting results that can be shared by concurrent processes.
+
+    The directory holds the DVI and PNG files of matplotlib's ``text.usetex`` rendering in
+    ``tex`` and the text extents measured for the PGF backend in ``pgf``. All files are
+    written atomically, and results that take a LaTeX run are produced under a lock so that
+    every string is only typeset once, even if many processes need it at the same time. Once
+    the content exceeds ``max_bytes``, the least recently used files are removed.
+
+    Use it via :meth:`rsmf.abstract_formatter.AbstractFormatter.share_tex_cache`.
+
+    Args:
+        directory (Union[str,pathlib.Path]): The cache directory.
+        max_bytes (int, optional): Size limit of the cache. Defaults to 1 GiB.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._writes = 0
+
+        for name in ("tex", "pgf", "locks"):
+            (self.directory / name).mkdir(parents=True, exist_ok=True)
+
+    def lock(self, key, group, blocking=True):
+        """Lock an entry of the cache, see :func:`file_lock`.
+
+        The entries of a group share a fixed number of lock files chosen by the hash of their
+        name, so the number of files stays bounded however many entries are locked. Entries
+        of different groups never share a lock file, so one group can be locked while a lock
+        of another is held.
+
+        Args:
+            key (str): Name of the entry.
+            group (str): Name of the group of the entry.
+            blocking (bool, optional): Wait for the lock. Defaults to True.
+
+        Returns:
+            ContextManager[bool]: Holds the lock while active.
+        """
+        stripe = int(_hash(key)[:8], 16) % _LOCK_STRIPES
+
+        return file_lock(self.directory / "locks" / f"{group}-{stripe:03d}.lock", blocking)
+
+    def _metrics_path(self, key):
+        return self.directory / "pgf" / key[:2] / key
+
+    def get_metrics(self, key):
+        """Read text extents from the cache.
+
+        Args:
+            key (str): Hash of the text and the LaTeX header.
+
+        Returns:
+            Union[NoneType,Tuple[float,float,float]]: Width, height and descent in TeX points,
+                or None if they are not cached.
+        """
+        path = self._metrics_path(key)
+        try:
+            content = path.read_text(encoding="ascii")
+        except FileNotFoundError:
+            return None
+
+        self.touch(path)
+
+        return tuple(float(value) for value in content.split(","))
+
+    def put_metrics(self, key, metrics):
+        """Write text extents to the cache.
+
+        Args:
+            key (str): Hash of the text and the LaTeX header.
+            metrics (Tuple[float,float,float]): Width, height and descent in TeX points.
+        """
+        atomic_write(self._metrics_path(key), ",".join(map(repr, metrics)).encode("ascii"))
+        self._written()
+
+    @staticmethod
+    def touch(path):
+        """Mark a file as recently used."""
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+    def _written(self):
+        self._writes += 1
+        if self._writes % _CLEANUP_INTERVAL == 0:
+            self.cleanup()
+
+    def _files(self):
+        for name in ("tex", "pgf"):
+            for root, _, files in os.walk(self.directory / name):
+                for file in files:
+                    path = Path(root, file)
+                    with contextlib.suppress(OSError):
+                        stat = path.stat()
+                        yield stat.st_mtime, stat.st_size, path
+
+    def cleanup(self):
+        """Remove the least recently used files until the cache fits into ``max_bytes``.
+
+        Only one process cleans up at a time, others return right away.
+
+        Returns:
+            int: Number of bytes that were freed.
+        """
+        freed = 0
+
+        with self.lock("cleanup", "cleanup", blocking=False) as acquired:
+            if not acquired:
+                return freed
+
+            files = sorted(self._files())
+            excess = sum(size for _, size, _ in files) - self.max_bytes
+
+            for _, size, path in files:
+                if freed >= excess:
+                    break
+
+                with contextlib.suppress(OSError):
+                    path.unlink()
+                    freed += size
+
+        return freed
+
+
+def _text_width_height_descent(renderer, s, prop, ismath):
+    """Text extents for the PGF backend that are looked up in the shared cache first."""
+    cache = _ACTIVE
+    if cache is None:
+        return _ORIGINALS["get_text_width_height_descent"](renderer, s, prop, ismath)
+
+    # pylint: disable=protected-access
+    from matplotlib.backends import backend_pgf
+
+    tex = backend_pgf._escape_and_apply_props(s, prop)
+    key = _hash(backend_pgf.LatexManager._build_latex_header(), tex)
+
+    metrics = cache.get_metrics(key)
+    if metrics is None:
+        manager = backend_pgf.LatexManager._get_cached_or_new()
+        metrics = manager.get_width_height_descent(s, prop)
+        cache.put_metrics(key, metrics)
+
+    factor = backend_pgf.mpl_pt_to_in * renderer.dpi
+
+    return tuple(value * factor for value in metrics)
+
+
+def _locked_make(name):
+    """Wrap a classmethod of TexManager that runs LaTeX such that it holds a lock."""
+    original = _ORIGINALS[name]
+
+    @functools.wraps(original.__func__)
+    def make(cls, tex, fontsize, *args, **kwargs):
+        cache = _ACTIVE
+        if cache is None:
+            return original.__func__(cls, tex, fontsize, *args, **kwargs)
+
+        # DVI and PNG files use different groups of locks, as making a PNG needs the DVI
+        with cache.lock(_hash(tex, str(fontsize), *map(str, args)), name):
+            path = original.__func__(cls, tex, fontsize, *args, **kwargs)
+
+        cache.touch(path)
+        cache._written()  # pylint: disable=protected-access
+
+        return path
+
+    return classmethod(make)
+
+
+def _patch():
+    """Route matplotlib's typesetting through the active cache, done once per process."""
+    if _ORIGINALS:
+        return
+
+    from matplotlib.backends import backend_pgf
+    from matplotlib.texmanager import TexManager
+
+    _ORIGINALS["get_text_width_height_descent"] = backend_pgf.RendererPgf.__dict__[
+        "get_text_width_height_descent"
+    ]
+    backend_pgf.RendererPgf.get_text_width_height_descent = _text_width_height_descent
+
+    for name in ("make_dvi", "make_png"):
+        _ORIGINALS[name] = TexManager.__dict__[name]
+        setattr(TexManager, name, _locked_make(name))
+
+    _ORIGINALS["cache_dir"] = _tex_cache_dir()
+
+
+def _tex_cache_dir():
+    # pylint: disable=protected-access
+    from matplotlib.texmanager import TexManager
+
+    if hasattr(TexManager, "_cache_dir"):
+        return TexManager._cache_dir
+
+    return TexManager.texcache
+
+
+def _set_tex_cache_dir(directory):
+    # pylint: disable=protected-access
+    from matplotlib.texmanager import TexManager
+
+    if hasattr(TexManager, "_cache_dir"):
+        TexManager._cache_dir = Path(directory)
+    else:  # matplotlib < 3.8
+        TexManager.texcache = str(directory)
+
+
+def install(directory, max_bytes=DEFAULT_MAX_BYTES):
+    """Use a shared cache directory for all typesetting in this process.
+
+    Installing the cache that is already active does nothing.
+
+    Args:
+        directory (Union[str,pathlib.Path]): The cache directory.
+        max_bytes (int, optional): Size limit of the cache. Defaults to 1 GiB.
+
+    Returns:
+        TexCache: The active cache.
+    """
+    global _ACTIVE  # pylint: disable=global-statement
+
+    directory = Path(directory).resolve()
+    if _ACTIVE is not None and _ACTIVE.directory == directory:
+        _ACTIVE.max_bytes = max_bytes
+        return _ACTIVE
+
+    _patch()
+
+    cache = TexCache(directory, max_bytes)
+    _set_tex_cache_dir(cache.directory / "tex")
+    cache.cleanup()
+    _ACTIVE = cache
+
+    return cache
+
+
+def uninstall():
+    """Go back to matplotlib's own, per-user cache."""
+    global _ACTIVE  # pylint: disable=global-statement
+
+    if _ORIGINALS:
+        _set_tex_cache_dir(_ORIGINALS["cache_dir"])
+
+    _ACTIVE = None
@@ -12,6 +12,7 @@ info = {
     "maintainer_email": "mail@johannesjakobmeyer.com",
     "url": "https://github.com/johannesjmeyer/rsmf",
     "packages": find_packages(where="."),
+    "package_data": {"rsmf": ["journals.tsv"]},
     "description": "rsmf (right-size my figures) helps you prepare publication-ready figures with matplotlib.",
     "long_description": open("README.md").read(),
     "long_description_content_type": "text/markdown",
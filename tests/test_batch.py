@@ -0,0 +1,153 @@
+import os
+import pickle
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import rsmf.batch
+from rsmf.batch import SharedArray
+from rsmf.custom_formatter import CustomFormatter
+
+
+def render_sum(formatter, data, scale=1.0):
+    """Render job used in the tests, must be module level to be picklable."""
+    fig = formatter.figure(aspect_ratio=1.0)
+
+    return (
+        tuple(fig.get_size_inches()),
+        float(np.sum(data)) * scale,
+        isinstance(data, np.memmap),
+        data.flags.writeable,
+    )
+
+
+class TestSharedArray:
+    """Test the shared array handles."""
+
+    @pytest.mark.parametrize("method", ["memmap", "shared_memory"])
+    def test_roundtrip(self, method, tmp_path):
+        """Test that a pickled handle gives back the original data."""
+        data = np.arange(4096, dtype=np.float32).reshape(64, 64)
+        handle = SharedArray(data, method=method, directory=tmp_path)
+
+        try:
+            restored = pickle.loads(pickle.dumps(handle))
+
+            assert np.array_equal(restored.array, data)
+            assert restored.array.dtype == np.float32
+            assert not restored.array.flags.writeable
+            assert len(pickle.dumps(handle)) < data.nbytes // 10
+        finally:
+            handle.release()
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError, match="Unknown share method"):
+            SharedArray(np.zeros(3), method="pickle")
+
+
+class TestRenderBatch:
+    """Test the parallel batch rendering."""
+
+    @pytest.mark.parametrize("share", ["memmap", "shared_memory"])
+    def test_render_batch(self, share):
+        formatter = CustomFormatter(columnwidth=2.0)
+        jobs = [{"data": np.full((256, 256), i, dtype=np.float64)} for i in range(4)]
+        jobs.append({"data": np.ones(3), "scale": 2.0})
+
+        results = formatter.render_batch(
+            render_sum, jobs, processes=2, share=share, min_shared_bytes=1024
+        )
+
+        assert [result[0] for result in results] == [(2.0, 2.0)] * 5
+        assert [result[1] for result in results] == [0.0, 65536.0, 131072.0, 196608.0, 6.0]
+        assert results[1][3] is False
+        assert results[-1][3] is True
+
+        if share == "memmap":
+            assert results[1][2] is True
+
+
+def render_linewidth(formatter):
+    """Render job that reports the line width of the worker."""
+    return plt.rcParams["lines.linewidth"]
+
+
+def render_open_figures(formatter, fail=False, crash=False):
+    """Render job that reports the figures that are open when it starts."""
+    if fail:
+        raise ValueError("failed job")
+    if crash:
+        os._exit(3)
+
+    open_figures = len(plt.get_fignums())
+    formatter.figure()
+
+    return open_figures
+
+
+class TestWorkerRecycling:
+    """Test the lifecycle of the workers of a batch."""
+
+    @pytest.fixture(autouse=True)
+    def no_open_figures(self):
+        """Workers are forked with the figures of the test process, which must not count."""
+        plt.close("all")
+
+    def test_figures_closed(self):
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        results = formatter.render_batch(render_open_figures, [{}] * 4, processes=1)
+
+        assert results == [0] * 4
+        assert len(results.workers) == 1
+        assert results.workers[0]["jobs"] == 4
+        assert results.workers[0]["reason"] is None
+
+    def test_max_jobs(self):
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        results = formatter.render_batch(
+            render_open_figures, [{}] * 5, processes=1, max_jobs_per_worker=2
+        )
+
+        assert results == [0] * 5
+        assert [worker["jobs"] for worker in results.workers] == [2, 2, 1]
+        assert [worker["reason"] for worker in results.workers] == ["jobs", "jobs", None]
+        assert len({worker["pid"] for worker in results.workers}) == 3
+
+    def test_max_rss(self):
+        """Test that workers above the memory limit are replaced after every job."""
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        results = formatter.render_batch(render_open_figures, [{}] * 3, processes=2, max_rss=1)
+
+        assert results == [0] * 3
+        assert [worker["jobs"] for worker in results.workers] == [1, 1, 1]
+        assert {worker["reason"] for worker in results.workers} == {"memory"}
+        if rsmf.batch.resource is not None:
+            assert all(worker["peak_rss"] > 2**20 for worker in results.workers)
+
+    def test_failed_job(self):
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        with pytest.raises(ValueError, match="failed job"):
+            formatter.render_batch(render_open_figures, [{}, {"fail": True}], processes=2)
+
+    def test_crashed_worker(self):
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        with pytest.raises(RuntimeError, match="died with exit code 3 while rendering job 1"):
+            formatter.render_batch(render_open_figures, [{}, {"crash": True}], processes=1)
+
+    def test_changed_rcparams(self):
+        """Test that the workers use rcParams changed after the formatter was set up."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        plt.rcParams["lines.linewidth"] = 2.5
+
+        try:
+            results = formatter.render_batch(render_linewidth, [{}] * 2, processes=2)
+        finally:
+            formatter.activate()
+
+        assert results == [2.5, 2.5]
@@ -2,7 +2,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pytest
 
-from rsmf.fontsizes import DEFAULT_FONTSIZES_12
+from rsmf.fontsizes import DEFAULT_FONTSIZES_11, DEFAULT_FONTSIZES_12
 from rsmf.custom_formatter import CustomFormatter
 
 
@@ -86,3 +86,58 @@ class TestFigure:
         formatter = CustomFormatter(**paper_kwargs)
         fig = formatter.figure(**figure_kwargs)
         assert np.allclose(fig.get_size_inches(), np.array(expected_format))
+
+
+class TestInterning:
+    """Test comparison, hashing and interning of formatters."""
+
+    def test_equality_and_hash(self):
+        """Test that formatters with equal configurations are equal."""
+        formatter1 = CustomFormatter(columnwidth=2.4, fontsizes=12)
+        formatter2 = CustomFormatter(columnwidth=2.4, fontsizes=DEFAULT_FONTSIZES_12)
+        formatter3 = CustomFormatter(columnwidth=2.4, fontsizes=12, pgf_preamble="TEST")
+
+        assert formatter1 == formatter2
+        assert hash(formatter1) == hash(formatter2)
+        assert formatter1 != formatter3
+        assert len({formatter1, formatter2, formatter3}) == 2
+
+    def test_interned(self):
+        """Test that equal configurations share one instance."""
+        formatter1 = CustomFormatter.interned(columnwidth=2.5, fontsizes=11)
+        formatter2 = CustomFormatter.interned(2.5, fontsizes=11)
+        formatter3 = CustomFormatter.interned(columnwidth=2.5, fontsizes=DEFAULT_FONTSIZES_11)
+
+        assert formatter1 is formatter2
+        assert formatter1 is formatter3
+        assert CustomFormatter.interned(columnwidth=2.6, fontsizes=11) is not formatter1
+
+    def test_interned_settings(self, tmp_path):
+        """Test that shared formatters refuse settings, which their copies accept."""
+        formatter = CustomFormatter.interned(columnwidth=2.7, fontsizes=11)
+
+        with pytest.raises(AttributeError, match="snapshot_dir"):
+            formatter.snapshot_dir = tmp_path
+        with pytest.raises(AttributeError, match="image_dir"):
+            formatter.share_images(tmp_path)
+
+        own = formatter.copy()
+        own.snapshot_dir = tmp_path
+
+        assert own == formatter
+        assert formatter.snapshot_dir is None
+        assert CustomFormatter.interned(columnwidth=2.7, fontsizes=11) is formatter
+
+    def test_activate_restores_rcparams(self):
+        """Test that a second activation restores the cached rcParams."""
+        formatter1 = CustomFormatter(columnwidth=2.4, fontsizes=12, pgf_preamble="TEST")
+        CustomFormatter(columnwidth=2.4, fontsizes=10, font_family="serif")
+
+        assert plt.rcParams["font.size"] == 9
+        assert plt.rcParams["font.family"] == ["serif"]
+
+        formatter1.activate()
+
+        assert plt.rcParams["font.size"] == DEFAULT_FONTSIZES_12.small
+        assert plt.rcParams["pgf.preamble"] == "TEST"
+        assert plt.rcParams["font.family"] == ["sans-serif"]
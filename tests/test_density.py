@@ -0,0 +1,88 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.collections import PathCollection, QuadMesh
+
+from rsmf.custom_formatter import CustomFormatter
+from rsmf.density import data_range, grid_shape, histogram2d
+
+
+class TestHistogram:
+    """Test the chunked binning."""
+
+    def test_matches_numpy(self):
+        rng = np.random.default_rng(1234)
+        x, y = rng.normal(size=(2, 10000))
+
+        counts, x_edges, y_edges = histogram2d(x, y, (13, 7), chunksize=999)
+        expected, expected_x, expected_y = np.histogram2d(x, y, bins=(13, 7))
+
+        assert counts.shape == (7, 13)
+        assert np.array_equal(counts, expected.T)
+        assert np.allclose(x_edges, expected_x)
+        assert np.allclose(y_edges, expected_y)
+
+    def test_non_finite(self):
+        x = np.array([0.0, 1.0, np.nan, 0.5, np.inf])
+        y = np.array([0.0, 1.0, 0.5, np.nan, 0.5])
+
+        assert data_range(x, y, chunksize=2) == ((0.0, 1.0), (0.0, 1.0))
+        assert histogram2d(x, y, (2, 2))[0].sum() == 2
+
+    def test_no_finite(self):
+        with pytest.raises(ValueError, match="no finite points"):
+            data_range(np.array([np.nan]), np.array([1.0]))
+
+    def test_memmap(self, tmp_path):
+        np.save(tmp_path / "x.npy", np.linspace(0, 1, 1001))
+        x = np.load(tmp_path / "x.npy", mmap_mode="r")
+
+        counts, _, _ = histogram2d(x, x, (10, 10), chunksize=100)
+
+        assert counts.sum() == 1001
+        assert np.count_nonzero(counts) == 10
+
+
+class TestScatter:
+    """Test the formatter's scatter method."""
+
+    @pytest.fixture(scope="function")
+    def formatter(self):
+        yield CustomFormatter(columnwidth=3.0)
+
+        plt.close("all")
+
+    def test_grid_shape(self, formatter):
+        fig = formatter.figure(aspect_ratio=0.5)
+        ax = fig.add_axes([0, 0, 1, 1])
+
+        assert grid_shape(ax) == (72, 36)
+        assert grid_shape(ax, markersize=6) == (36, 18)
+
+    def test_small_scatter(self, formatter):
+        fig = formatter.figure()
+        collection = formatter.scatter(np.arange(10), np.arange(10), ax=fig.gca(), threshold=10)
+
+        assert isinstance(collection, PathCollection)
+
+    def test_large_scatter(self, formatter):
+        fig = formatter.figure()
+        ax = fig.gca()
+        x = np.random.default_rng(1).normal(size=1000)
+
+        mesh = formatter.scatter(x, x, ax=ax, threshold=100)
+
+        assert isinstance(mesh, QuadMesh)
+        assert mesh.get_array().sum() == 1000
+        assert mesh.get_array().shape[::-1] == grid_shape(ax)
+
+    def test_scatter_kwargs(self, formatter):
+        """Test that the arguments of the markers are not passed on to the density plot."""
+        fig = formatter.figure()
+        ax = fig.gca()
+        x = np.random.default_rng(1).normal(size=1000)
+
+        mesh = formatter.scatter(x, x, ax=ax, threshold=100, s=36, c="red", marker="s")
+
+        assert isinstance(mesh, QuadMesh)
+        assert mesh.get_array().shape[::-1] == grid_shape(ax, markersize=6)
@@ -0,0 +1,152 @@
+import re
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.backends.backend_pgf import FigureCanvasPgf
+from matplotlib.patches import Rectangle
+
+import rsmf.export
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture(scope="function")
+def textless_figure():
+    """A figure without text, which can be written as PGF without LaTeX."""
+    formatter = CustomFormatter(columnwidth=2.0)
+    fig = formatter.figure()
+    fig.add_artist(Rectangle((0.1, 0.1), 0.5, 0.5))
+
+    yield formatter, fig
+
+    plt.close(fig)
+
+
+class TestExport:
+    """Test the multi-format export."""
+
+    def test_export_pgf(self, textless_figure, tmp_path):
+        formatter, fig = textless_figure
+
+        paths = formatter.export(fig, tmp_path / "figure", formats=["pgf"])
+
+        assert paths == [tmp_path / "figure.pgf"]
+        assert r"\begin{pgfpicture}" in paths[0].read_text()
+
+    def test_single_latex_run(self, textless_figure, tmp_path, mocker):
+        """Test that the PDF is typeset once and the PNG is converted from it."""
+        formatter, fig = textless_figure
+
+        calls = []
+
+        def print_pdf(self, fname_or_fh, **kwargs):
+            calls.append(fname_or_fh)
+
+        mocker.patch.object(FigureCanvasPgf, "print_pdf", print_pdf)
+        converter = mocker.MagicMock()
+        mocker.patch("rsmf.export.make_pdf_to_png_converter", return_value=converter)
+
+        paths = formatter.export(fig, tmp_path / "fig.v2", formats=["pgf", "pdf", "png"], dpi=300)
+
+        assert [path.name for path in paths] == ["fig.v2.pgf", "fig.v2.pdf", "fig.v2.png"]
+        assert calls == [paths[1]]
+        converter.assert_called_once_with(paths[1], paths[2], dpi=300)
+
+    def test_png_without_pdf(self, textless_figure, tmp_path, mocker):
+        """Test that an intermediate PDF is used when only PNG output is requested."""
+        formatter, fig = textless_figure
+
+        mocker.patch.object(FigureCanvasPgf, "print_pdf", lambda self, fname_or_fh, **kwargs: None)
+        converter = mocker.MagicMock()
+        mocker.patch("rsmf.export.make_pdf_to_png_converter", return_value=converter)
+
+        paths = formatter.export(fig, tmp_path / "figure", formats=[".PNG"])
+
+        assert paths == [tmp_path / "figure.png"]
+        assert not (tmp_path / "figure.pdf").exists()
+        assert converter.call_args.kwargs["dpi"] == fig.dpi
+
+    def test_layout_restored(self, textless_figure, tmp_path):
+        """Test that the layout engine is frozen during export and restored afterwards."""
+        formatter, fig = textless_figure
+        fig.set_layout_engine("constrained")
+        engine = fig.get_layout_engine()
+
+        with rsmf.export.frozen_layout(fig):
+            assert fig.get_layout_engine() is not engine
+
+        assert fig.get_layout_engine() is engine
+
+
+class TestPgfSize:
+    """Test the precision and simplification of PGF output."""
+
+    def test_decimals(self):
+        assert rsmf.export.decimals(0.01) == (2, 4)
+        assert rsmf.export.decimals(1.0) == (0, 2)
+
+    def test_round_pgf(self, tmp_path):
+        """Test that lengths are rounded and trailing zeros dropped."""
+        path = tmp_path / "figure.pgf"
+        path.write_text(
+            r"\pgfqpoint{1.234567in}{-0.000012in}\pgfsetlinewidth{1.003750pt}%" + "\n"
+            r"\definecolor{c}{rgb}{0.121569,0.466667,0.705882}%"
+        )
+
+        rsmf.export.round_pgf(path, 0.01)
+
+        assert path.read_text() == (
+            r"\pgfqpoint{1.2346in}{0in}\pgfsetlinewidth{1pt}%" + "\n"
+            r"\definecolor{c}{rgb}{0.121569,0.466667,0.705882}%"
+        )
+
+    def test_round_pgf_text(self, tmp_path):
+        """Test that the position of a text is rounded but numbers in the text are kept."""
+        path = tmp_path / "figure.pgf"
+        path.write_text(
+            r"\pgftext[x=1.234567in,y=0.500000in,left,base]"
+            r"{\sffamily\fontsize{10.000000}{12.000000}\selectfont {\catcode`\^=\active 2.54in}}%"
+            + "\n"
+            r"\pgfsetlinewidth{1.003750pt}%"
+        )
+
+        rsmf.export.round_pgf(path, 0.01)
+
+        assert path.read_text() == (
+            r"\pgftext[x=1.2346in,y=0.5in,left,base]"
+            r"{\sffamily\fontsize{10.000000}{12.000000}\selectfont {\catcode`\^=\active 2.54in}}%"
+            + "\n"
+            r"\pgfsetlinewidth{1pt}%"
+        )
+
+    def test_formatter_precision(self, tmp_path):
+        """Test that the formatter writes smaller PGF files with its precision."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        fig = formatter.figure()
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.plot(np.random.default_rng(0).random(2000))
+        ax.set_axis_off()
+
+        rounded = formatter.savefig(fig, tmp_path / "rounded.pgf")
+        formatter.pgf_precision = None
+        full = formatter.savefig(fig, tmp_path / "full.pgf")
+        plt.close(fig)
+
+        assert re.search(r"\{\d\.\d{5,}in\}", full.read_text())
+        assert not re.search(r"\{\d\.\d{5,}in\}", rounded.read_text())
+        assert rounded.stat().st_size < full.stat().st_size
+
+    def test_formatter_simplify(self, tmp_path):
+        """Test that paths are simplified within the tolerance."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        fig = formatter.figure()
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.plot(np.sin(np.linspace(0, 10, 10000)))
+        ax.set_axis_off()
+
+        full = formatter.savefig(fig, tmp_path / "full.pgf").read_text()
+        formatter.pgf_simplify = 0.5
+        simplified = formatter.savefig(fig, tmp_path / "simplified.pgf").read_text()
+        plt.close(fig)
+
+        assert simplified.count("pgfpathlineto") < full.count("pgfpathlineto") / 2
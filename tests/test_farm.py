@@ -0,0 +1,204 @@
+import json
+import multiprocessing
+import os
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from rsmf import farm
+from rsmf.custom_formatter import CustomFormatter
+
+
+def render_job(formatter, index, data=None, fail=False):
+    """Render job used in the tests, must be module level to be importable by workers."""
+    if fail:
+        raise ValueError(f"job {index} failed")
+
+    fig = formatter.figure(aspect_ratio=1.0)
+    width = fig.get_size_inches()[0]
+    plt.close(fig)
+
+    total = None if data is None else float(np.sum(data))
+
+    return index, float(width), total, os.getpid()
+
+
+def render_precision(formatter):
+    """Render job that returns a setting outside of the configuration of the formatter."""
+    return formatter.pgf_precision
+
+
+def render_linewidth(formatter, linewidth=None):
+    """Render job that leaves a figure open, changes and reports the line width."""
+    formatter.figure()
+    previous = plt.rcParams["lines.linewidth"]
+    if linewidth is not None:
+        plt.rcParams["lines.linewidth"] = linewidth
+
+    return previous
+
+
+def run_worker(directory):
+    """Worker process standing in for a node."""
+    farm.JobQueue(directory).work(poll_interval=0.01, idle_timeout=0.5)
+
+
+@pytest.fixture
+def formatter():
+    return CustomFormatter(columnwidth=2.5)
+
+
+class TestJobQueue:
+    """Test the queue on a directory."""
+
+    def test_claim_once(self, formatter, tmp_path):
+        """Test that every job is claimed by exactly one worker."""
+        queue = farm.JobQueue(tmp_path)
+        names = queue.enqueue(formatter, render_job, [{"index": index} for index in range(3)])
+
+        claims = [queue.claim() for _ in range(4)]
+
+        assert [claim.name.split(".job.")[0] for claim in claims[:3]] == names
+        assert claims[3] is None
+
+    def test_recover(self, formatter, tmp_path):
+        """Test that abandoned jobs are put back."""
+        queue = farm.JobQueue(tmp_path)
+        queue.enqueue(formatter, render_job, [{"index": 0}])
+        claimed = queue.claim()
+
+        assert queue.recover(max_age=60) == 0
+
+        os.utime(claimed, (time.time() - 120, time.time() - 120))
+
+        assert queue.recover(max_age=60) == 1
+        assert queue.claim() is not None
+
+    def test_main_module(self, formatter, tmp_path):
+        """Test that render functions of the running script are rejected."""
+        render = lambda formatter: None  # pylint: disable=unnecessary-lambda-assignment
+        render.__module__ = "__main__"
+
+        with pytest.raises(ValueError, match="importable module"):
+            farm.JobQueue(tmp_path).enqueue(formatter, render, [{}])
+
+    def test_nodes(self, formatter, tmp_path):
+        """Test that several processes render a batch together."""
+        queue = farm.JobQueue(tmp_path)
+        data = np.ones((512, 512))
+        jobs = [{"index": index, "data": data} for index in range(12)]
+        names = queue.enqueue(formatter, render_job, jobs, min_shared_bytes=1000)
+
+        workers = [multiprocessing.Process(target=run_worker, args=(tmp_path,)) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+
+        results = queue.collect(names, poll_interval=0.01, timeout=60)
+
+        for worker in workers:
+            worker.join()
+
+        assert [result[:3] for result in results] == [(index, 2.5, 512.0**2) for index in range(12)]
+        assert len(list((tmp_path / "done").iterdir())) == 12
+        assert not list((tmp_path / "pending").iterdir())
+        assert not list((tmp_path / "claimed").iterdir())
+        # The shared arrays are removed once the batch is collected
+        assert not list((tmp_path / "data").iterdir())
+
+        (manifest_path,) = (tmp_path / "results").glob("*.manifest.json")
+        manifest = json.loads(manifest_path.read_text())
+
+        assert [job["name"] for job in manifest["jobs"]] == names
+        assert all(job["status"] == "done" for job in manifest["jobs"])
+        assert {pid for *_, pid in results} <= {worker.pid for worker in workers}
+
+    def test_moved_queue(self, formatter, tmp_path, monkeypatch):
+        """Test that shared arrays are found where another node mounts a relative queue."""
+        monkeypatch.chdir(tmp_path)
+        data = np.ones((64, 64))
+        names = farm.JobQueue("queue").enqueue(
+            formatter, render_job, [{"index": 0, "data": data}], min_shared_bytes=1000
+        )
+        os.rename(tmp_path / "queue", tmp_path / "mount")
+
+        queue = farm.JobQueue(tmp_path / "mount")
+        queue.work(idle_timeout=0)
+
+        assert queue.collect(names)[0][2] == 64.0**2
+
+    def test_failure(self, formatter, tmp_path):
+        """Test that failed jobs are reported."""
+        queue = farm.JobQueue(tmp_path)
+        names = queue.enqueue(formatter, render_job, [{"index": 0}, {"index": 1, "fail": True}])
+        queue.work(idle_timeout=0)
+
+        with pytest.raises(RuntimeError, match="(?s)1 of 2 jobs failed.*job 1 failed"):
+            queue.collect(names)
+
+        (manifest_path,) = (tmp_path / "results").glob("*.manifest.json")
+        statuses = [job["status"] for job in json.loads(manifest_path.read_text())["jobs"]]
+
+        assert statuses == ["done", "failed"]
+
+
+class TestRenderFarm:
+    """Test rendering via the formatter."""
+
+    def test_local_workers(self, formatter, tmp_path):
+        """Test that local workers stand in for the nodes."""
+        results = formatter.render_farm(
+            render_job,
+            [{"index": index} for index in range(4)],
+            tmp_path,
+            local_workers=2,
+            poll_interval=0.01,
+        )
+
+        assert [result[:2] for result in results] == [(index, 2.5) for index in range(4)]
+
+    def test_formatter_configuration(self, tmp_path):
+        """Test that workers render with the configuration of the enqueued formatter."""
+        queue = farm.JobQueue(tmp_path)
+        first = queue.enqueue(CustomFormatter(columnwidth=1.5), render_job, [{"index": 0}])
+        second = queue.enqueue(CustomFormatter(columnwidth=3.0), render_job, [{"index": 1}])
+        queue.work(idle_timeout=0)
+
+        assert queue.collect(first)[0][1] == 1.5
+        assert queue.collect(second)[0][1] == 3.0
+
+    def test_formatter_settings(self, tmp_path):
+        """Test that jobs render with their own formatter even if its configuration is equal."""
+        queue = farm.JobQueue(tmp_path)
+        precise = CustomFormatter(columnwidth=2.5)
+        precise.pgf_precision = 6
+        first = queue.enqueue(CustomFormatter(columnwidth=2.5), render_precision, [{}])
+        second = queue.enqueue(precise, render_precision, [{}])
+        queue.work(idle_timeout=0)
+
+        assert queue.collect(first)[0] != 6
+        assert queue.collect(second)[0] == 6
+
+    def test_isolated_jobs(self, formatter, tmp_path):
+        """Test that jobs get the rcParams of the caller and leave no state to the next job."""
+        queue = farm.JobQueue(tmp_path)
+        try:
+            plt.rcParams["lines.linewidth"] = 2.5
+            names = queue.enqueue(formatter, render_linewidth, [{"linewidth": 7.0}, {}])
+            plt.rcParams["lines.linewidth"] = 1.0
+            queue.work(idle_timeout=0)
+        finally:
+            formatter.activate()
+
+        assert queue.collect(names) == [2.5, 2.5]
+        assert not plt.get_fignums()
+
+    def test_command_line_worker(self, formatter, tmp_path, capsys):
+        """Test the worker started with python -m rsmf.farm."""
+        queue = farm.JobQueue(tmp_path)
+        names = queue.enqueue(formatter, render_job, [{"index": 0}, {"index": 1}])
+
+        assert farm.main([str(tmp_path), "--idle-timeout", "0", "--recover-after", "60"]) == 0
+        assert "Rendered 2 jobs." in capsys.readouterr().out
+        assert [result[0] for result in queue.collect(names)] == [0, 1]
@@ -0,0 +1,45 @@
+import pickle
+
+import pytest
+
+from rsmf.fontsizes import DEFAULT_FONTSIZES_10, DEFAULT_FONTSIZES_11, Fontsizes
+
+
+class TestFontsizes:
+    """Test that Fontsizes behave as immutable values."""
+
+    def test_equality_and_hash(self):
+        """Test that equal sizes compare equal and have the same hash."""
+        fontsizes = Fontsizes(*DEFAULT_FONTSIZES_11.astuple())
+
+        assert fontsizes == DEFAULT_FONTSIZES_11
+        assert fontsizes != DEFAULT_FONTSIZES_10
+        assert hash(fontsizes) == hash(DEFAULT_FONTSIZES_11)
+        assert len({fontsizes, DEFAULT_FONTSIZES_11, DEFAULT_FONTSIZES_10}) == 2
+
+    def test_immutable(self):
+        """Test that sizes can neither be changed nor added."""
+        fontsizes = Fontsizes()
+
+        with pytest.raises(AttributeError, match="immutable"):
+            fontsizes.small = 3
+
+        with pytest.raises(AttributeError, match="immutable"):
+            del fontsizes.small
+
+        with pytest.raises(AttributeError):
+            fontsizes.__dict__  # pylint: disable=pointless-statement
+
+    def test_astuple(self):
+        """Test that the sizes are ordered from tiny to Huge."""
+        assert DEFAULT_FONTSIZES_10.astuple() == (5, 7, 8, 9, 10, 12, 14, 17, 20, 25)
+
+    def test_pickle(self):
+        """Test that fontsizes survive pickling."""
+        fontsizes = Fontsizes(normalsize=10.95)
+
+        assert pickle.loads(pickle.dumps(fontsizes)) == fontsizes
+
+    def test_repr(self):
+        """Test that the representation recreates the object."""
+        assert eval(repr(DEFAULT_FONTSIZES_11)) == DEFAULT_FONTSIZES_11  # pylint: disable=eval-used
@@ -0,0 +1,90 @@
+import io
+from unittest import mock
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from rsmf import frames
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture
+def formatter():
+    """A formatter with usetex switched off, to render text without LaTeX."""
+    formatter = CustomFormatter(columnwidth=2.0)
+    plt.rcParams["text.usetex"] = False
+
+    yield formatter
+
+    formatter.activate()
+
+
+def full_render(fig, dpi):
+    """Render a figure completely with the Agg backend."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, backend="agg")
+    buffer.seek(0)
+
+    return plt.imread(buffer)
+
+
+class TestRenderFrames:
+    """Test rendering frame series."""
+
+    def test_frames_match_full_render(self, formatter, tmp_path):
+        """Test that the frames equal a complete rendering of every state."""
+        x = np.linspace(0, 2 * np.pi, 50)
+        fig = formatter.figure()
+        plt.plot(x, np.cos(x), color="C1")
+        line = plt.plot(x, np.sin(x), color="C0")[0]
+        plt.xlabel("x")
+
+        def update(phase):
+            line.set_ydata(np.sin(x + phase))
+            return [line]
+
+        phases = [0.0, 1.0, 2.0]
+        paths = formatter.render_frames(fig, update, phases, str(tmp_path / "f{:02d}.png"), dpi=50)
+
+        assert paths == [tmp_path / f"f{index:02d}.png" for index in range(3)]
+        for phase, path in zip(phases, paths):
+            update(phase)
+            np.testing.assert_allclose(plt.imread(path), full_render(fig, 50), atol=1 / 255)
+
+        assert not line.get_animated()
+        assert isinstance(fig.canvas, mpl.backends.backend_pgf.FigureCanvasPgf)
+
+        plt.close(fig)
+
+    def test_static_parts_drawn_once(self, formatter, tmp_path):
+        """Test that the figure is only drawn completely for new changing artists."""
+        fig = formatter.figure()
+        line = plt.plot([0, 1])[0]
+        text = plt.text(0.5, 0.5, "")
+
+        def update(frame):
+            line.set_ydata([0, frame])
+            if frame < 3:
+                return [line]
+
+            text.set_text(str(frame))
+            return [line, text]
+
+        with mock.patch.object(fig, "draw", wraps=fig.draw) as draw:
+            formatter.render_frames(fig, update, range(6), str(tmp_path / "{}.png"), dpi=20)
+
+        assert draw.call_count == 2
+        assert len(list(tmp_path.glob("*.png"))) == 6
+
+        plt.close(fig)
+
+    def test_writer_errors(self, tmp_path):
+        """Test that errors of the background writer are raised."""
+        (tmp_path / "file").touch()
+        writer = frames.FrameWriter(dpi=10)
+        writer.write(tmp_path / "file" / "frame.png", np.zeros((2, 2, 4), dtype=np.uint8))
+
+        with pytest.raises(OSError):
+            writer.close()
@@ -0,0 +1,91 @@
+import pickle
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from rsmf import images
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture
+def formatter(tmp_path):
+    """A formatter that shares the images of its figures during the test."""
+    formatter = CustomFormatter(columnwidth=2.0)
+    formatter.share_images(tmp_path / "images")
+
+    yield formatter
+
+    images.uninstall()
+
+
+def save_image(formatter, image, path):
+    """Save a figure that only shows an image, which can be written as PGF without LaTeX."""
+    fig = formatter.figure()
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.axis("off")
+    ax.imshow(image)
+    formatter.savefig(fig, path)
+    plt.close(fig)
+
+    return path.read_text()
+
+
+class TestSharedImages:
+    """Test the deduplication of the raster images of PGF figures."""
+
+    def test_deduplicated(self, formatter, tmp_path):
+        """Test that an image shown by two figures is written once and referred to by both."""
+        image = np.random.default_rng(1).random((8, 8))
+        (tmp_path / "figures").mkdir()
+
+        first = save_image(formatter, image, tmp_path / "first.pgf")
+        second = save_image(formatter, image, tmp_path / "figures" / "second.pgf")
+
+        stored = list((tmp_path / "images").iterdir())
+        assert len(stored) == 1
+        assert f"{{images/{stored[0].name}}}" in first
+        assert f"{{../images/{stored[0].name}}}" in second
+        assert r"\pgfuseimage{rsmf-" + stored[0].stem in first
+        assert not list(tmp_path.glob("*-img*.png"))
+
+    def test_different_images(self, formatter, tmp_path):
+        """Test that different images are stored separately."""
+        rng = np.random.default_rng(2)
+        save_image(formatter, rng.random((8, 8)), tmp_path / "first.pgf")
+        save_image(formatter, rng.random((8, 8)), tmp_path / "second.pgf")
+
+        assert len(list((tmp_path / "images").iterdir())) == 2
+
+    def test_compressed_once(self, formatter, tmp_path, mocker):
+        """Test that a stored image is not compressed again."""
+        image = np.random.default_rng(3).random((8, 8))
+        save_image(formatter, image, tmp_path / "first.pgf")
+
+        fromarray = mocker.spy(images.Image, "fromarray")
+        images.uninstall()
+        images.install(tmp_path / "images")
+        save_image(formatter, image, tmp_path / "second.pgf")
+
+        fromarray.assert_not_called()
+
+    def test_uninstalled(self, formatter, tmp_path, mocker):
+        """Test that images are written next to the figure without a store."""
+        images.uninstall()
+        # matplotlib asks LaTeX whether graphicx is available
+        mocker.patch.object(
+            images.backend_pgf, "_get_image_inclusion_command", return_value=r"\includegraphics"
+        )
+
+        pgf = save_image(formatter, np.eye(4), tmp_path / "figure.pgf")
+
+        assert (tmp_path / "figure-img0.png").exists()
+        assert "figure-img0.png" in pgf
+
+    def test_activate(self, formatter, tmp_path):
+        """Test that a formatter activated in another process shares its images."""
+        images.uninstall()
+
+        pickle.loads(pickle.dumps(formatter)).activate()
+
+        assert images.install(tmp_path / "images") is images._ACTIVE
@@ -0,0 +1,112 @@
+import matplotlib.pyplot as plt
+import pytest
+
+from rsmf import setup
+from rsmf.custom_formatter import CustomFormatter
+from rsmf.journals import DATABASE_PATH, entries, lookup, parse_documentclass
+
+
+class TestDatabase:
+    """Test the bundled database."""
+
+    def test_sorted(self):
+        """The bisection requires the entries to be sorted by documentclass."""
+        lines = DATABASE_PATH.read_bytes().splitlines()
+        data = [line for line in lines if not line.startswith(b"#")]
+        keys = [line.split(b"\t")[0] for line in data]
+
+        assert lines[: len(lines) - len(data)] == [line for line in lines if line.startswith(b"#")]
+        assert keys == sorted(keys)
+        assert all(len(line.split(b"\t")) == 8 for line in data)
+
+    @pytest.mark.parametrize("documentclass", ["IEEEtran", "article", "llncs", "report"])
+    def test_entries(self, documentclass):
+        assert entries(documentclass)
+
+    @pytest.mark.parametrize("documentclass", ["", "aaa", "ZZZ", "articl", "articles", "zzz"])
+    def test_no_entries(self, documentclass):
+        assert entries(documentclass) == []
+
+    def test_custom_database(self, tmp_path):
+        path = tmp_path / "db.tsv"
+        lines = [
+            f"class{index:03d}\t\t\t{index}\t{index}\t1,2,3,4,5,6,7,8,9,10\t\t"
+            for index in range(200)
+        ]
+        path.write_text("\n".join(lines) + "\n")
+
+        for index in [0, 1, 99, 199]:
+            (entry,) = entries(f"class{index:03d}", path)
+            assert entry["columnwidth"] == index
+
+        assert entries("class200", path) == []
+
+
+class TestLookup:
+    """Test the lookup of formatters."""
+
+    @pytest.mark.parametrize(
+        "preamble,expected",
+        [
+            (r"\documentclass{article}", ("article", frozenset())),
+            (
+                r"\documentclass[ 11pt, twoside ]{report}",
+                ("report", frozenset(["11pt", "twoside"])),
+            ),
+            ("\\documentclass[\n  journal,\n]{IEEEtran}", ("IEEEtran", frozenset(["journal"]))),
+            (r"\usepackage{amsmath}", None),
+        ],
+    )
+    def test_parse_documentclass(self, preamble, expected):
+        assert parse_documentclass(preamble) == expected
+
+    @pytest.mark.parametrize(
+        "preamble,columnwidth,normalsize",
+        [
+            (r"\documentclass{article}", 345, 10),
+            (r"\documentclass[a4paper,11pt]{article}", 360, 10.95),
+            (r"\documentclass[12pt]{book}", 390, 12),
+            (r"\documentclass[journal]{IEEEtran}", 252, 10),
+            (r"\documentclass[10pt,onecolumn,draft]{article}", 345, 10),
+            (r"\documentclass[twocolumn]{article}", 229.5, 10),
+            (r"\documentclass[twocolumn,12pt,twoside]{article}", 229.5, 12),
+            (r"\documentclass[a4paper,twocolumn]{report}", 221, 10),
+        ],
+    )
+    def test_lookup(self, preamble, columnwidth, normalsize):
+        formatter = lookup(preamble)
+
+        assert isinstance(formatter, CustomFormatter)
+        assert formatter.columnwidth == pytest.approx(columnwidth / 72.27)
+        assert formatter.fontsizes.normalsize == normalsize
+
+    @pytest.mark.parametrize(
+        "preamble",
+        [
+            r"\documentclass{unknownclass}",
+            r"\documentclass[12pt]{IEEEtran}",
+            r"\documentclass[onecolumn]{IEEEtran}",
+            r"\documentclass[a5paper]{article}",
+        ],
+    )
+    def test_lookup_unknown(self, preamble):
+        """Test that layouts that are not in the database are not guessed from other entries."""
+        assert lookup(preamble) is None
+
+    def test_setup_unknown_options(self):
+        with pytest.raises(RuntimeError, match="rsmf.probe"):
+            setup(r"\documentclass[12pt]{IEEEtran}")
+
+    def test_setup(self):
+        formatter = setup(r"\documentclass[conference]{IEEEtran}")
+
+        assert formatter.wide_columnwidth == pytest.approx(516 / 72.27)
+        assert formatter.font_family == "serif"
+        assert plt.rcParams["font.family"] == ["serif"]
+        assert plt.rcParams["pgf.preamble"] == r"\usepackage{mathptmx}"
+
+    def test_setup_parser_precedence(self):
+        """Classes with a dedicated parser are not looked up in the database."""
+        formatter = setup(r"\documentclass{revtex4-2}")
+
+        assert not isinstance(formatter, CustomFormatter)
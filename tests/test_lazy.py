@@ -0,0 +1,210 @@
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import rsmf.pages
+from rsmf.custom_formatter import CustomFormatter
+from rsmf.lazy import LazyFigure, Recorded
+
+
+@pytest.fixture
+def formatter(tmp_path):
+    """A formatter whose lazy figures cache into a temporary directory."""
+    formatter = CustomFormatter(columnwidth=2.0)
+    formatter.figure_cache_dir = tmp_path / "cache"
+
+    return formatter
+
+
+def draw(fig, data):
+    """Draw a figure without text, which can be written as PGF without LaTeX."""
+    ax = fig.add_axes([0.1, 0.1, 0.8, 0.8])
+    ax.plot(data, color="C1")
+    ax.set_axis_off()
+
+
+class TestRecording:
+    """Test that calls are recorded without creating artists."""
+
+    def test_no_figure_created(self, formatter):
+        """Test that recording does not create a matplotlib figure."""
+        figures = plt.get_fignums()
+
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+
+        assert isinstance(fig, LazyFigure)
+        assert plt.get_fignums() == figures
+
+    def test_build(self, formatter):
+        """Test that placeholders, attributes and indexing are replayed."""
+        fig = formatter.figure(lazy=True)
+        axes = fig.subplots(1, 2)
+        line = axes[0].plot([1, 2, 3])[0]
+        line.set_color("red")
+        image = axes[1].imshow(np.eye(3))
+        fig.colorbar(image, ax=axes[1])
+        axes[1].xaxis.set_visible(False)
+
+        built = fig.build()
+
+        assert len(built.axes) == 3
+        assert built.axes[0].lines[0].get_color() == "red"
+        assert not built.axes[1].xaxis.get_visible()
+        assert built.get_size_inches() == pytest.approx((2.0, 2.0 / 1.62))
+        fig.close()
+
+    def test_subplots_shape(self, formatter):
+        """Test that subplots are shaped like matplotlib's."""
+        fig = formatter.figure(lazy=True)
+
+        assert isinstance(fig.subplots(), Recorded)
+        assert fig.subplots(2, 3).shape == (2, 3)
+        assert fig.subplots(1, 3).shape == (3,)
+        assert fig.subplots(1, 1, squeeze=False).shape == (1, 1)
+
+    def test_unpacking_fails(self, formatter):
+        """Test that placeholders can not be unpacked."""
+        ax = formatter.figure(lazy=True).add_subplot()
+
+        with pytest.raises(TypeError, match="index them instead"):
+            (line,) = ax.plot([1, 2])  # pylint: disable=unused-variable
+
+
+class TestCacheKey:
+    """Test the hash of lazy figures."""
+
+    def test_equal_recordings(self, formatter):
+        """Test that equal recordings have the same hash and differing ones do not."""
+        figs = [formatter.figure(lazy=True) for _ in range(3)]
+        draw(figs[0], np.arange(5.0))
+        draw(figs[1], np.arange(5.0))
+        draw(figs[2], np.arange(5.0) + 1e-9)
+
+        assert figs[0].cache_key() == figs[1].cache_key()
+        assert figs[0].cache_key() != figs[2].cache_key()
+
+    def test_formatter_configuration(self, formatter):
+        """Test that the configuration of the formatter changes the hash."""
+        other = CustomFormatter(columnwidth=2.0, pgf_preamble=r"\usepackage{times}")
+        fig = formatter.figure(lazy=True)
+        other_fig = other.figure(lazy=True)
+        draw(fig, np.arange(5))
+        draw(other_fig, np.arange(5))
+
+        assert fig.cache_key() != other_fig.cache_key()
+
+    def test_masked_arrays(self, formatter):
+        """Test that the mask of masked arrays changes the hash."""
+        figs = [formatter.figure(lazy=True) for _ in range(2)]
+        data = np.arange(5.0)
+        draw(figs[0], np.ma.masked_array(data, mask=[0, 1, 0, 0, 0]))
+        draw(figs[1], np.ma.masked_array(data, mask=[0, 0, 1, 0, 0]))
+
+        assert figs[0].cache_key() != figs[1].cache_key()
+
+    def test_unpicklable(self, formatter, tmp_path):
+        """Test that figures with unpicklable arguments have no hash and are drawn uncached."""
+        fig = formatter.figure(lazy=True)
+        ax = fig.add_axes([0.1, 0.1, 0.8, 0.8])
+        ax.plot(np.arange(5))
+        ax.xaxis.set_major_formatter(lambda x, pos: f"{x:.1f}")
+        ax.set_axis_off()
+
+        assert fig.cache_key() is None
+
+        path = formatter.savefig(fig, tmp_path / "figure.pgf")
+
+        assert r"\begin{pgfpicture}" in path.read_text()
+        assert not list((tmp_path / "cache").glob("*"))
+
+
+class TestSave:
+    """Test that lazy figures are only drawn when their output is not cached."""
+
+    def test_savefig_cached(self, formatter, tmp_path, mocker):
+        """Test that an unchanged figure is copied from the cache without building it."""
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+        first = formatter.savefig(fig, tmp_path / "first.pgf")
+        fig.close()
+
+        assert r"\begin{pgfpicture}" in first.read_text()
+
+        build = mocker.patch.object(LazyFigure, "build")
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+        second = formatter.savefig(fig, tmp_path / "second.pgf")
+
+        build.assert_not_called()
+        assert second.read_bytes() == first.read_bytes()
+
+    def test_snapshot_of_cached(self, formatter, tmp_path):
+        """Test that a snapshot is stored for outputs copied from the cache."""
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+        formatter.savefig(fig, tmp_path / "first.pgf")
+        fig.close()
+
+        formatter.snapshot_dir = tmp_path / "snapshots"
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+        formatter.savefig(fig, tmp_path / "second.pgf")
+        fig.close()
+
+        assert len(list(formatter.snapshot_dir.glob("*"))) == 1
+
+    def test_changed_figure_is_drawn(self, formatter, tmp_path):
+        """Test that a changed figure is drawn again."""
+        for data in (np.arange(5), np.arange(5)[::-1]):
+            fig = formatter.figure(lazy=True)
+            draw(fig, data)
+            path = formatter.savefig(fig, tmp_path / f"figure{data[0]}.pgf")
+            fig.close()
+
+        assert (tmp_path / "figure0.pgf").read_text() != path.read_text()
+
+    def test_export_cached(self, formatter, tmp_path, mocker):
+        """Test that all formats of an export are cached together."""
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+        paths = formatter.export(fig, tmp_path / "first", formats=["pgf", "svg"])
+        fig.close()
+
+        build = mocker.patch.object(LazyFigure, "build")
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+        cached = formatter.export(fig, tmp_path / "second", formats=["pgf", "svg"])
+
+        build.assert_not_called()
+        assert [path.name for path in cached] == ["second.pgf", "second.svg"]
+        assert [path.read_bytes() for path in cached] == [path.read_bytes() for path in paths]
+
+    def test_batch_cached(self, formatter, tmp_path, monkeypatch, mocker):
+        """Test that outputs of a batch are cached once the batch has written them."""
+        monkeypatch.setattr(
+            rsmf.pages.cbook,
+            "_check_and_log_subprocess",
+            lambda command, logger, cwd: Path(cwd, command[-1]).with_suffix(".pdf").touch(),
+        )
+        monkeypatch.setattr(
+            rsmf.pages,
+            "split_pdf",
+            lambda source, paths: [path.write_bytes(b"%PDF") for path in paths],
+        )
+
+        with formatter.batch_save():
+            fig = formatter.figure(lazy=True)
+            draw(fig, np.arange(5))
+            formatter.savefig(fig, tmp_path / "first.pdf")
+            fig.close()
+
+        build = mocker.patch.object(LazyFigure, "build")
+        fig = formatter.figure(lazy=True)
+        draw(fig, np.arange(5))
+        second = formatter.savefig(fig, tmp_path / "second.pdf")
+
+        build.assert_not_called()
+        assert second.read_bytes() == b"%PDF"
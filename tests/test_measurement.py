@@ -0,0 +1,112 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import rsmf.measurement
+from rsmf.measurement import measure, probe
+
+DUMMY_PATH = Path(__file__).parent / "dummy.tex"
+
+LOG = """This is pdfTeX, Version 3.141592653-2.6-1.40.25
+rsmf:columnwidth=246.0
+rsmf:textwidth=510.0
+rsmf:tiny=5
+rsmf:scriptsize=7
+rsmf:footnotesize=8
+rsmf:small=9
+rsmf:normalsize=10
+rsmf:large=10.95
+rsmf:Large=12
+rsmf:LARGE=14.4
+rsmf:huge=17.28
+rsmf:Huge=20.74
+"""
+
+
+@pytest.fixture(scope="function")
+def fake_latex(monkeypatch):
+    """Replace the LaTeX run by a function that returns a fixed log."""
+    calls = []
+
+    def run_latex(tex_source, texsystem, texinputs):
+        calls.append((tex_source.read_text(), texsystem, texinputs))
+        return LOG
+
+    monkeypatch.setattr(rsmf.measurement, "_run_latex", run_latex)
+
+    yield calls
+
+
+class TestMeasure:
+    """Test the measurement of documents."""
+
+    def test_measure(self, fake_latex, tmp_path):
+        result = measure(r"\documentclass[prl]{revtex4-2}", cache_dir=tmp_path)
+
+        assert result["columnwidth"] == 246.0
+        assert result["textwidth"] == 510.0
+        assert result["large"] == 10.95
+
+        source, texsystem, texinputs = fake_latex[0]
+        assert source.startswith("\\documentclass[prl]{revtex4-2}\n\\begin{document}")
+        assert r"{\footnotesize\typeout{rsmf:footnotesize=\f@size}}" in source
+        assert texsystem == "pdflatex"
+        assert texinputs is None
+
+    def test_cache(self, fake_latex, tmp_path):
+        first = measure(r"\documentclass{article}", cache_dir=tmp_path)
+        second = measure(r"\documentclass{article}", cache_dir=tmp_path)
+        measure(r"\documentclass[twocolumn]{article}", cache_dir=tmp_path)
+
+        assert first == second
+        assert len(fake_latex) == 2
+        assert len(list((tmp_path / "probe").glob("*.json"))) == 2
+
+    def test_path(self, fake_latex, tmp_path):
+        measure(DUMMY_PATH, cache_dir=tmp_path)
+
+        source, _, texinputs = fake_latex[0]
+        assert "\\hyphenation{awe-some}" in source
+        assert source.count("\\begin{document}") == 1
+        assert texinputs == DUMMY_PATH.parent.resolve()
+
+    def test_incomplete_log(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(rsmf.measurement, "_run_latex", lambda *args: "rsmf:textwidth=1.0")
+
+        with pytest.raises(RuntimeError, match="did not report .*columnwidth, footnotesize"):
+            measure(r"\documentclass{article}", cache_dir=tmp_path)
+
+        assert not list(tmp_path.glob("**/*.json"))
+
+
+class TestProbe:
+    """Test the creation of formatters from measurements."""
+
+    def test_probe(self, fake_latex, tmp_path):
+        formatter = probe(
+            r"\documentclass{revtex4-2}", pgf_preamble=r"\usepackage{times}", cache_dir=tmp_path
+        )
+
+        assert formatter.columnwidth == pytest.approx(246.0 / 72.27)
+        assert formatter.wide_columnwidth == pytest.approx(510.0 / 72.27)
+        assert formatter.fontsizes.footnotesize == 8
+        assert formatter.fontsizes.Huge == 20.74
+        assert formatter._pgf_preamble == r"\usepackage{times}"
+
+    def test_probe_from_cache(self, fake_latex, tmp_path):
+        cache = tmp_path / "probe"
+        cache.mkdir()
+        key = rsmf.measurement.hashlib.sha256(b"pdflatex\n\\documentclass{test}").hexdigest()
+        sizes = ["tiny", "scriptsize", "footnotesize", "small", "normalsize"]
+        sizes += ["large", "Large", "LARGE", "huge", "Huge"]
+        result = {name: index + 1 for index, name in enumerate(sizes)}
+        result.update(columnwidth=72.27, textwidth=144.54)
+        (cache / f"{key}.json").write_text(json.dumps(result))
+
+        formatter = probe(r"\documentclass{test}", cache_dir=tmp_path)
+
+        assert not fake_latex
+        assert formatter.columnwidth == pytest.approx(1.0)
+        assert formatter.wide_columnwidth == pytest.approx(2.0)
+        assert formatter.fontsizes.normalsize == 5
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from rsmf.custom_formatter import CustomFormatter
+from rsmf.metrics import TEX_POINTS_PER_INCH, font_metrics, text_extent
+from rsmf.revtex import RevtexFormatter
+
+
+class TestTextExtent:
+    """Test the estimation of text extents."""
+
+    def test_tex_widths(self):
+        """Compare to the widths of cmr10 as reported by TeX."""
+        width, height, _ = text_extent("Hello", 10)
+
+        assert np.isclose(width * TEX_POINTS_PER_INCH, 22.5, atol=0.05)
+        assert np.isclose(height * TEX_POINTS_PER_INCH, 6.94, atol=0.05)
+
+    def test_linear_in_size(self):
+        assert np.allclose(
+            np.array(text_extent("Test label", 20)), 2 * np.array(text_extent("Test label", 10))
+        )
+
+    def test_space(self):
+        width, _, _ = text_extent(" ", 10)
+
+        assert np.isclose(width * TEX_POINTS_PER_INCH, 10 / 3)
+
+    def test_math(self):
+        """Test that math and control words are measured."""
+        assert text_extent(r"$\alpha_1$", 10)[0] > text_extent("a", 10)[0]
+        assert text_extent(r"$\alpha_1$", 10)[0] == text_extent("$o1$", 10)[0]
+
+    def test_empty(self):
+        assert text_extent("", 10) == (0.0, 0.0, 0.0)
+
+    def test_cached(self):
+        assert font_metrics("sans-serif") is font_metrics("sans-serif")
+
+    def test_unknown_family(self):
+        with pytest.raises(ValueError, match="Unknown font family"):
+            font_metrics("fantasy")
+
+
+class TestFormatter:
+    """Test the formatter's text_extent method."""
+
+    def test_named_size(self):
+        formatter = CustomFormatter(columnwidth=3.0)
+
+        assert formatter.text_extent("Label", "footnotesize") == text_extent(
+            "Label", 8, family="sans-serif"
+        )
+
+    def test_default_size(self):
+        formatter = CustomFormatter(columnwidth=3.0)
+
+        assert formatter.text_extent("Label") == formatter.text_extent("Label", "footnotesize")
+
+    def test_point_size(self):
+        formatter = RevtexFormatter()
+
+        assert formatter.text_extent("Label", 9) == text_extent("Label", 9, family="serif")
@@ -0,0 +1,219 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+import rsmf.pages
+from rsmf.custom_formatter import CustomFormatter
+from rsmf.report import Report
+
+
+@pytest.fixture(scope="function")
+def fake_latex(monkeypatch):
+    """Replace the LaTeX run by a function that records the compiled document."""
+    documents = []
+
+    def run(command, logger, cwd):
+        tex_source = Path(cwd, command[-1])
+        documents.append(tex_source.read_text())
+        tex_source.with_suffix(".pdf").write_bytes(b"%PDF")
+
+    monkeypatch.setattr(rsmf.pages.cbook, "_check_and_log_subprocess", run)
+
+    yield documents
+
+
+class TestPages:
+    """Test the streaming multi-page output."""
+
+    def test_pages(self, fake_latex, tmp_path):
+        formatter = CustomFormatter(columnwidth=2.0, wide_columnwidth=4.0)
+        figures = []
+
+        with formatter.pages(tmp_path / "supp.pdf") as pages:
+            for wide in [False, True, False]:
+                fig = pages.figure(aspect_ratio=0.5, wide=wide)
+                fig.add_artist(Rectangle((0.1, 0.1), 0.5, 0.5))
+                pages.savefig(fig)
+                figures.append(fig)
+
+                assert not plt.fignum_exists(fig.number)
+
+            assert pages.pagecount == 3
+
+        assert (tmp_path / "supp.pdf").read_bytes() == b"%PDF"
+        assert len(fake_latex) == 1
+
+        document = fake_latex[0]
+        assert r"papersize={2.000000in,1.000000in}" in document
+        assert r"\pdfpagewidth\else\pagewidth\fi=4.000000in" in document
+        assert [line for line in document.splitlines() if line.startswith(r"\input")] == [
+            r"\input{page000000.pgf}%",
+            r"\input{page000001.pgf}%",
+            r"\input{page000002.pgf}%",
+        ]
+
+    def test_no_pages(self, fake_latex, tmp_path):
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        with formatter.pages(tmp_path / "supp.pdf"):
+            pass
+
+        assert not fake_latex
+        assert not (tmp_path / "supp.pdf").exists()
+
+
+@pytest.fixture
+def fake_split(monkeypatch):
+    """Replace the splitting of PDFs by writing the page numbers to the files."""
+    splits = []
+
+    def split_pdf(source, paths):
+        splits.append(paths)
+        for number, path in enumerate(paths):
+            Path(path).write_bytes(f"page {number}".encode())
+
+    monkeypatch.setattr(rsmf.pages, "split_pdf", split_pdf)
+
+    yield splits
+
+
+def textless_figure(formatter, **kwargs):
+    fig = formatter.figure(**kwargs)
+    fig.add_artist(Rectangle((0.1, 0.1), 0.5, 0.5))
+
+    return fig
+
+
+class TestBatchSave:
+    """Test typesetting the PDFs of many figures with one LaTeX run."""
+
+    def test_batch(self, fake_latex, fake_split, tmp_path):
+        formatter = CustomFormatter(columnwidth=2.0, wide_columnwidth=4.0)
+
+        with formatter.batch_save() as batch:
+            for name, wide in [("a", False), ("b", True)]:
+                fig = textless_figure(formatter, wide=wide)
+                assert formatter.savefig(fig, tmp_path / f"{name}.pdf") == tmp_path / f"{name}.pdf"
+                plt.close(fig)
+
+            assert batch.pagecount == 2
+            assert not (tmp_path / "a.pdf").exists()
+            assert not fake_latex
+
+        assert len(fake_latex) == 1
+        assert r"\pdfpagewidth\else\pagewidth\fi=4.000000in" in fake_latex[0]
+        assert fake_split == [[tmp_path / "a.pdf", tmp_path / "b.pdf"]]
+        assert (tmp_path / "b.pdf").read_bytes() == b"page 1"
+        assert rsmf.pages.active_batch() is None
+
+    def test_preambles(self, fake_latex, fake_split, tmp_path):
+        """Test that figures with different preambles are typeset separately."""
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        with formatter.batch_save():
+            for name, preamble in [("a", ""), ("b", r"\usepackage{amsmath}"), ("c", "")]:
+                with plt.rc_context({"pgf.preamble": preamble}):
+                    fig = textless_figure(formatter)
+                    formatter.savefig(fig, tmp_path / f"{name}.pdf")
+                    plt.close(fig)
+
+        assert len(fake_latex) == 2
+        assert r"\usepackage{amsmath}" in fake_latex[1]
+        assert fake_split == [[tmp_path / "a.pdf", tmp_path / "c.pdf"], [tmp_path / "b.pdf"]]
+
+    def test_other_formats(self, fake_latex, fake_split, tmp_path):
+        """Test that outputs other than PDF are written right away."""
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        with formatter.batch_save() as batch:
+            fig = textless_figure(formatter)
+            formatter.savefig(fig, tmp_path / "figure.pgf")
+            plt.close(fig)
+
+            assert (tmp_path / "figure.pgf").exists()
+            assert batch.pagecount == 0
+
+        assert not fake_latex
+
+    def test_report(self, fake_latex, fake_split, tmp_path):
+        """Test that figures of a batch are reported once their PDF is written."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        formatter.report = Report()
+
+        with formatter.batch_save():
+            fig = textless_figure(formatter)
+            formatter.savefig(fig, tmp_path / "figure.pdf")
+            plt.close(fig)
+
+            assert not formatter.report.entries
+
+        assert formatter.report.entries[0]["bytes"] == len(b"page 0")
+
+    def test_nested(self):
+        formatter = CustomFormatter(columnwidth=2.0)
+
+        with formatter.batch_save():
+            with pytest.raises(RuntimeError, match="Another batch"):
+                with formatter.batch_save():
+                    pass
+
+
+class TestSplitPdf:
+    """Test splitting a PDF into its pages."""
+
+    def test_ghostscript(self, monkeypatch, tmp_path):
+        commands = []
+        monkeypatch.setattr(rsmf.pages, "pypdf", None)
+        monkeypatch.setattr(
+            rsmf.pages.mpl,
+            "_get_executable_info",
+            lambda name: SimpleNamespace(executable="/usr/bin/gs"),
+        )
+        monkeypatch.setattr(
+            rsmf.pages.cbook,
+            "_check_and_log_subprocess",
+            lambda command, logger: commands.append(command),
+        )
+
+        rsmf.pages.split_pdf(tmp_path / "batch.pdf", [tmp_path / "a.pdf", tmp_path / "b.pdf"])
+
+        assert [command[0] for command in commands] == ["/usr/bin/gs"] * 2
+        assert "-dFirstPage=2" in commands[1] and "-dLastPage=2" in commands[1]
+        assert f"-sOutputFile={tmp_path / 'b.pdf'}" in commands[1]
+
+    def test_no_splitter(self, monkeypatch, tmp_path):
+        def missing(name):
+            raise rsmf.pages.mpl.ExecutableNotFoundError(name)
+
+        monkeypatch.setattr(rsmf.pages, "pypdf", None)
+        monkeypatch.setattr(rsmf.pages.mpl, "_get_executable_info", missing)
+
+        with pytest.raises(RuntimeError, match="pypdf or ghostscript"):
+            rsmf.pages.split_pdf(tmp_path / "batch.pdf", [tmp_path / "a.pdf"])
+
+    def test_pypdf(self, tmp_path):
+        """Test that the pages are split into identical files every time."""
+        pytest.importorskip("pypdf")
+
+        with PdfPages(tmp_path / "batch.pdf") as pdf:
+            for size in [(2, 1), (4, 1)]:
+                fig = Figure(figsize=size)
+                fig.add_artist(Rectangle((0.1, 0.1), 0.5, 0.5))
+                pdf.savefig(fig)
+
+        paths = [tmp_path / "a.pdf", tmp_path / "b.pdf"]
+        rsmf.pages.split_pdf(tmp_path / "batch.pdf", paths)
+        first = [path.read_bytes() for path in paths]
+        rsmf.pages.split_pdf(tmp_path / "batch.pdf", paths)
+
+        assert [path.read_bytes() for path in paths] == first
+        assert [len(rsmf.pages.pypdf.PdfReader(path).pages) for path in paths] == [1, 1]
+        assert rsmf.pages.pypdf.PdfReader(paths[1]).pages[0].mediabox.width == 4 * 72
+
+        with pytest.raises(RuntimeError, match="has 2 pages, expected 1"):
+            rsmf.pages.split_pdf(tmp_path / "batch.pdf", paths[:1])
@@ -0,0 +1,107 @@
+import re
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from rsmf import pgfplots
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture
+def formatter():
+    return CustomFormatter(columnwidth=3.0, fontsizes=11)
+
+
+class TestColumnFormat:
+    """Test the number of digits written to the tables."""
+
+    def test_linear(self):
+        # 0.01pt on a 100pt axis spanning 10 units is a step of 0.001
+        assert pgfplots.column_format((0, 10), 100) == "%.3f"
+        assert pgfplots.column_format((0, 10), 100, precision=0.1) == "%.2f"
+
+    def test_log(self):
+        assert pgfplots.column_format((1, 1000), 100, log=True) == "%.5g"
+
+    def test_all_digits(self):
+        assert pgfplots.column_format((0, 1), 100, precision=None) == "%.17g"
+        assert pgfplots.column_format((1, 1), 100) == "%.17g"
+
+
+class TestWriteTable:
+    """Test writing the tables."""
+
+    def test_roundtrip(self, tmp_path):
+        x = np.linspace(0, 1, 101)
+        y = np.where(x > 0.5, np.nan, x**2)
+        path = tmp_path / "table.dat"
+
+        pgfplots.write_table(path, (x, y), ("%.4f", "%.6g"))
+
+        data = np.loadtxt(path, skiprows=1)
+        assert path.read_text().startswith("c0 c1\n0.0000 0\n")
+        np.testing.assert_allclose(data[:, 0], x, atol=1e-4)
+        np.testing.assert_allclose(data[:, 1], y, rtol=1e-6)
+
+    def test_blocks(self, tmp_path, monkeypatch):
+        """Test that tables written in blocks equal those written at once."""
+        x = np.linspace(0, 1, 101)
+        pgfplots.write_table(tmp_path / "once.dat", (x, x**2), ("%.4f", "%.6g"))
+        monkeypatch.setattr(pgfplots, "_TABLE_BLOCK_ROWS", 7)
+        pgfplots.write_table(tmp_path / "blocks.dat", (x, x**2), ("%.4f", "%.6g"))
+
+        assert (tmp_path / "blocks.dat").read_text() == (tmp_path / "once.dat").read_text()
+
+
+class TestExport:
+    """Test the pgfplots code."""
+
+    def test_export(self, formatter, tmp_path):
+        """Test that every line is written to a table referenced by the code."""
+        fig = formatter.figure()
+        ax = fig.add_subplot()
+        ax.plot(np.arange(10), np.arange(10) ** 2, "o--", label="squares")
+        ax.plot(np.arange(10), np.arange(10), color="red")
+        ax.set_xlabel("$x$")
+        ax.legend()
+
+        paths = formatter.export_pgfplots(fig, tmp_path / "plot", data_path="figures")
+        plt.close(fig)
+
+        assert [path.name for path in paths] == ["plot.tex", "plot-0-0.dat", "plot-0-1.dat"]
+        code = paths[0].read_text()
+
+        assert code.count(r"\addplot") == 2
+        assert "{figures/plot-0-0.dat}" in code
+        assert r"\addlegendentry{squares}" in code
+        assert "dashed" in code and "mark=*" in code
+        assert "xlabel={$x$}" in code
+        assert r"tick label style={font=\fontsize{9}{10.8}\selectfont}" in code
+        assert r"rectangle (3.0000in," in code
+
+        width = float(re.search(r"width=([\d.]+)in", code).group(1))
+        assert width == pytest.approx(ax.get_position().width * 3.0, abs=1e-4)
+
+        np.testing.assert_allclose(np.loadtxt(paths[1], skiprows=1)[:, 1], np.arange(10) ** 2)
+
+    def test_log_axis(self, formatter, tmp_path):
+        fig = formatter.figure()
+        ax = fig.add_subplot()
+        ax.loglog([1, 10, 100], [1, 2, 3])
+
+        code = formatter.export_pgfplots(fig, tmp_path / "plot")[0].read_text()
+        plt.close(fig)
+
+        assert "xmode=log" in code and "ymode=log" in code
+
+    def test_unsupported(self, formatter, tmp_path):
+        """Test that figures with other artists than lines are rejected."""
+        fig = formatter.figure()
+        ax = fig.add_subplot()
+        ax.scatter([1, 2], [1, 2])
+
+        with pytest.raises(ValueError, match="PathCollection"):
+            formatter.export_pgfplots(fig, tmp_path / "plot")
+
+        plt.close(fig)
@@ -0,0 +1,153 @@
+from unittest import mock
+
+import matplotlib as mpl
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from rsmf import preview
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture
+def formatter(tmp_path):
+    """A formatter whose previews are cached into a temporary directory."""
+    formatter = CustomFormatter(columnwidth=3.0, font_family="serif")
+    formatter.preview_cache_dir = tmp_path / "previews"
+    formatter.figure_cache_dir = tmp_path / "figures"
+    formatter.preview_dpi = 50
+
+    return formatter
+
+
+def make_figure(formatter, color="C0"):
+    """A figure with LaTeX text and math, as created in a notebook cell."""
+    fig = formatter.figure()
+    plt.plot(np.arange(10), color=color)
+    plt.xlabel(r"time $\tau$")
+    plt.title("Title")
+
+    return fig
+
+
+class TestFigureHash:
+    """Test the hash by which previews are cached."""
+
+    def test_same_code_same_hash(self, formatter):
+        """Test that figures created by the same code have equal hashes."""
+        first = make_figure(formatter)
+        second = make_figure(formatter)
+
+        assert preview.figure_hash(first) == preview.figure_hash(second)
+
+        plt.close(first)
+        plt.close(second)
+
+    def test_changes(self, formatter):
+        """Test that changing the figure changes the hash."""
+        fig = make_figure(formatter)
+        original = preview.figure_hash(fig)
+
+        fig.axes[0].lines[0].set_linewidth(3)
+        changed = preview.figure_hash(fig)
+        fig.axes[0].set_xlim(0, 5)
+
+        assert len({original, changed, preview.figure_hash(fig)}) == 3
+
+        plt.close(fig)
+
+    def test_stable_after_drawing(self, formatter):
+        """Test that the hash does not change with every drawing."""
+        fig = make_figure(formatter)
+        rc = preview.preview_rc(formatter.font_family)
+
+        preview.render_png(fig, 50, rc)
+        drawn = preview.figure_hash(fig)
+        preview.render_png(fig, 50, rc)
+
+        assert preview.figure_hash(fig) == drawn
+
+        plt.close(fig)
+
+    def test_unpicklable(self, formatter):
+        """Test that figures with lambda functions can not be hashed."""
+        fig = make_figure(formatter)
+        fig.axes[0].xaxis.set_major_formatter(lambda value, _: f"{value}s")
+
+        assert preview.figure_hash(fig) is None
+
+        plt.close(fig)
+
+
+class TestPreview:
+    """Test rendering previews."""
+
+    def test_physical_size(self, formatter):
+        """Test that the preview is displayed at the size of the figure."""
+        fig = make_figure(formatter)
+        result = formatter.preview(fig)
+        plt.close(fig)
+
+        data, metadata = result._repr_png_()
+
+        assert data.startswith(b"\x89PNG")
+        assert metadata == {"width": 288, "height": round(3.0 / 1.62 * 96)}
+        assert result.size_inches == pytest.approx((3.0, 3.0 / 1.62))
+
+    def test_keeps_pgf(self, formatter):
+        """Test that previews do not change the backend or the texts of the figure."""
+        fig = make_figure(formatter)
+        formatter.preview(fig)
+
+        assert mpl.get_backend() == "pgf"
+        assert mpl.rcParams["text.usetex"]
+        assert all(text.get_usetex() for text in fig.findobj(mpl.text.Text))
+
+        plt.close(fig)
+
+    def test_cached(self, formatter):
+        """Test that the preview of an unchanged figure is read from the cache."""
+        fig = make_figure(formatter)
+        first = formatter.preview(fig)
+        plt.close(fig)
+
+        fig = make_figure(formatter)
+        with mock.patch.object(preview, "render_png") as render_png:
+            second = formatter.preview(fig)
+
+        render_png.assert_not_called()
+        assert second.data == first.data
+
+        fig.axes[0].lines[0].set_color("C1")
+        with mock.patch.object(preview, "render_png", return_value=b"changed") as render_png:
+            formatter.preview(fig)
+
+        render_png.assert_called_once()
+
+        plt.close(fig)
+
+    def test_dpi(self, formatter):
+        """Test that the resolution is part of the cache key."""
+        fig = make_figure(formatter)
+        low = formatter.preview(fig)
+        high = formatter.preview(fig, dpi=100)
+        plt.close(fig)
+
+        assert len(high.data) > len(low.data)
+        assert low._repr_png_()[1] == high._repr_png_()[1]
+
+    def test_lazy(self, formatter):
+        """Test that lazy figures are only built if the preview is not cached."""
+        fig = formatter.figure(lazy=True)
+        fig.add_subplot().plot(np.arange(10))
+        first = formatter.preview(fig)
+        fig.close()
+
+        fig = formatter.figure(lazy=True)
+        fig.add_subplot().plot(np.arange(10))
+        with mock.patch.object(type(fig), "build") as build:
+            second = formatter.preview(fig)
+
+        build.assert_not_called()
+        assert second.data == first.data
+        assert second.size_inches == pytest.approx((3.0, 3.0 / 1.62))
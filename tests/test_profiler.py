@@ -0,0 +1,92 @@
+import time
+
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.artist import Artist
+
+from rsmf import profiler
+from rsmf.custom_formatter import CustomFormatter
+
+
+class SlowArtist(Artist):
+    """Artist that takes a while to draw and draws nothing, so no LaTeX is needed."""
+
+    def draw(self, renderer):
+        time.sleep(0.1)
+
+
+def save_slow(formatter, path):
+    """Save a figure that is slow to draw."""
+    fig = formatter.figure()
+    fig.add_artist(SlowArtist())
+    formatter.savefig(fig, path)
+    plt.close(fig)
+
+
+class TestCategory:
+    """Test the attribution of functions to categories."""
+
+    @pytest.mark.parametrize(
+        "module, function, expected",
+        [
+            ("matplotlib.texmanager", "TexManager.make_dvi", "text"),
+            ("matplotlib.backends.backend_pgf", "LatexManager.get_width_height_descent", "text"),
+            ("matplotlib.backends.backend_pgf", "RendererPgf.draw_path", "backend"),
+            ("matplotlib._constrained_layout", "do_constrained_layout", "layout"),
+            ("matplotlib.backend_bases", "FigureCanvasBase.print_figure", "backend"),
+            ("rsmf.raster", "downsample", "rsmf"),
+            ("rsmf.texcache", "_get_width_height_descent", "text"),
+            ("numpy", "sum", None),
+            ("matplotlib.textbox", "draw", None),
+        ],
+    )
+    def test_category(self, module, function, expected):
+        assert profiler.category(module, function) == expected
+
+
+class TestProfiler:
+    """Test the sampling of slow figures."""
+
+    def test_slow_figure(self, tmp_path):
+        """Test that a slow figure is sampled and written as a flamegraph."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        formatter.profiler = profiler.Profiler(tmp_path / "profiles", threshold=0.0)
+
+        save_slow(formatter, tmp_path / "figure.pgf")
+
+        (entry,) = formatter.profiler.entries
+        assert entry["name"] == "figure.pgf"
+        assert entry["seconds"] >= 0.1
+        assert entry["sampled"]["backend"] > 0
+
+        lines = (tmp_path / "profiles" / "figure.pgf.folded").read_text().splitlines()
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            frames = stack.split(";")
+            assert frames[0] in profiler.CATEGORIES
+            assert frames[1] == "rsmf.abstract_formatter:AbstractFormatter.savefig"
+            assert int(count) > 0
+        assert any("test_profiler:SlowArtist.draw" in line for line in lines)
+
+    def test_fast_figure(self, tmp_path):
+        """Test that figures faster than the threshold are not sampled."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        formatter.profiler = profiler.Profiler(tmp_path / "profiles", threshold=60.0)
+
+        save_slow(formatter, tmp_path / "figure.pgf")
+
+        assert not formatter.profiler.entries
+        assert not (tmp_path / "profiles").exists()
+
+    def test_export(self, tmp_path):
+        """Test that the formats of an export are sampled as one figure."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        formatter.profiler = profiler.Profiler(tmp_path / "profiles", threshold=0.0)
+        fig = formatter.figure()
+        fig.add_artist(SlowArtist())
+
+        formatter.export(fig, tmp_path / "figure", formats=["pgf", "svg"])
+        plt.close(fig)
+
+        assert [entry["name"] for entry in formatter.profiler.entries] == ["figure"]
+        assert [path.name for path in (tmp_path / "profiles").iterdir()] == ["figure.folded"]
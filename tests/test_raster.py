@@ -0,0 +1,152 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from rsmf.custom_formatter import CustomFormatter
+from rsmf.raster import downsample
+
+
+class TestDownsample:
+    """Test the block averaging."""
+
+    def test_no_reduction(self):
+        data = np.ones((10, 20))
+        reduced, factors = downsample(data, (10, 20))
+
+        assert reduced is data
+        assert factors == (1, 1)
+
+    def test_reduction(self):
+        data = np.arange(7 * 9, dtype=float).reshape(7, 9)
+        reduced, factors = downsample(data, (3, 4))
+
+        assert reduced.shape == (3, 3)
+        assert factors == (3, 3)
+        assert reduced[0, 0] == np.mean(data[:3, :3])
+        assert reduced[1, 2] == np.mean(data[3:6, 6:9])
+        # The last row does not fill a block and is averaged on its own
+        assert np.allclose(reduced[2], [np.mean(data[6:, i : i + 3]) for i in (0, 3, 6)])
+
+    def test_ragged_memmap(self, tmp_path):
+        """Test that no rows are lost when the blocks do not divide a memory-mapped array."""
+        np.save(tmp_path / "data.npy", np.arange(8000, dtype=np.float64)[:, None] * np.ones(4))
+        data = np.load(tmp_path / "data.npy", mmap_mode="r")
+
+        reduced, _ = downsample(data, (2667, 4))
+
+        assert reduced.shape == (2667, 4)
+        assert np.all(reduced[-1] == 7998.5)
+        assert np.isclose(reduced.mean(), data.mean(), rtol=1e-3)
+
+    def test_rgb_integer(self):
+        data = np.full((8, 8, 3), 200, dtype=np.uint8)
+        reduced, _ = downsample(data, (2, 2))
+
+        assert reduced.shape == (2, 2, 3)
+        assert reduced.dtype == np.uint8
+        assert np.all(reduced == 200)
+
+    def test_memmap(self, tmp_path):
+        np.save(tmp_path / "data.npy", np.ones((100, 100), dtype=np.float32))
+        data = np.load(tmp_path / "data.npy", mmap_mode="r")
+
+        reduced, _ = downsample(data, (10, 10))
+
+        assert reduced.shape == (10, 10)
+        assert np.allclose(reduced, 1.0)
+
+    def test_masked(self):
+        """Test that masked entries are left out and fully masked blocks stay masked."""
+        data = np.ma.masked_less(np.arange(36.0).reshape(6, 6), 10)
+        reduced, _ = downsample(data, (3, 3))
+
+        assert isinstance(reduced, np.ma.MaskedArray)
+        assert reduced.mask.tolist() == [[True, True, False]] + [[False] * 3] * 2
+        assert reduced[0, 2] == np.mean([10, 11])
+
+    def test_nan(self):
+        """Test that NaN are left out and only blocks of NaN stay NaN."""
+        data = np.arange(36.0).reshape(6, 6)
+        data[0, 0] = np.nan
+        data[4:, 4:] = np.nan
+        reduced, _ = downsample(data, (3, 3))
+
+        assert reduced[0, 0] == np.mean([1, 6, 7])
+        assert np.isnan(reduced[2, 2])
+        assert np.isfinite(reduced[:2]).all()
+
+
+class TestFormatterMethods:
+    """Test the formatter methods that downsample to the printed resolution."""
+
+    @pytest.fixture(scope="function")
+    def formatter(self):
+        formatter = CustomFormatter(columnwidth=1.0)
+        formatter.print_dpi = 10
+
+        yield formatter
+
+        plt.close("all")
+
+    def test_imshow(self, formatter):
+        fig = formatter.figure(aspect_ratio=1.0)
+        image = formatter.imshow(np.zeros((109, 50)), ax=fig.gca())
+
+        assert image.get_array().shape == (10, 10)
+        assert np.allclose(image.get_extent(), (-0.5, 49.5, 108.5, -0.5))
+
+    def test_imshow_extent_lower(self, formatter):
+        fig = formatter.figure(aspect_ratio=1.0)
+        image = formatter.imshow(
+            np.zeros((109, 50)), ax=fig.gca(), origin="lower", extent=(0, 1, 0, 1.09)
+        )
+
+        assert np.allclose(image.get_extent(), (0, 1, 0, 1.09))
+
+    def test_imshow_small(self, formatter):
+        fig = formatter.figure(aspect_ratio=1.0)
+        data = np.zeros((5, 5))
+
+        image = formatter.imshow(data, ax=fig.gca())
+
+        assert image.get_array().shape == (5, 5)
+        assert np.allclose(image.get_extent(), (-0.5, 4.5, 4.5, -0.5))
+
+    def test_pcolormesh(self, formatter):
+        fig = formatter.figure(aspect_ratio=1.0)
+        x = np.linspace(0, 1, 41)
+        y = np.linspace(0, 2, 21)
+
+        mesh = formatter.pcolormesh(np.ones((20, 40)), x=x, y=y, ax=fig.gca())
+
+        assert mesh.get_array().shape == (10, 10)
+        assert np.allclose(mesh.get_coordinates()[0, :, 0], x[::4])
+        assert np.allclose(mesh.get_coordinates()[:, 0, 1], y[::2])
+
+    def test_pcolormesh_centers(self, formatter):
+        fig = formatter.figure(aspect_ratio=1.0)
+        x = np.arange(40.0)
+        y = np.arange(20.0)
+
+        mesh = formatter.pcolormesh(np.ones((20, 40)), x=x, y=y, ax=fig.gca(), shading="nearest")
+
+        assert mesh.get_array().shape == (10, 10)
+        assert np.allclose(mesh.get_coordinates()[0, :, 0], np.arange(-0.5, 40, 4))
+
+    def test_pcolormesh_ragged(self, formatter):
+        fig = formatter.figure(aspect_ratio=1.0)
+        x = np.linspace(0, 1, 44)
+        y = np.arange(21.0)
+
+        mesh = formatter.pcolormesh(np.ones((20, 43)), x=x, y=y, ax=fig.gca())
+
+        assert mesh.get_array().shape == (10, 9)
+        # The last column of edges ends at the last edge of the data
+        edges = mesh.get_coordinates()[0, :, 0]
+        assert np.allclose(edges, np.append(x[::5], x[-1]))
+
+    def test_pcolormesh_wrong_coordinates(self, formatter):
+        fig = formatter.figure(aspect_ratio=1.0)
+
+        with pytest.raises(ValueError, match="do not match"):
+            formatter.pcolormesh(np.ones((20, 40)), x=np.arange(5), ax=fig.gca())
@@ -0,0 +1,93 @@
+import json
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from rsmf import report
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture
+def formatter():
+    """A formatter with an attached report and usetex switched off, to save without LaTeX."""
+    formatter = CustomFormatter(columnwidth=3.0)
+    formatter.report = report.Report(max_bytes=10**6, max_seconds=60)
+    plt.rcParams["text.usetex"] = False
+
+    yield formatter
+
+    formatter.activate()
+
+
+class TestStatistics:
+    """Test the counts of a figure."""
+
+    def test_figure_statistics(self):
+        fig = plt.figure()
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        ax.plot(np.arange(100))
+        ax.scatter(np.arange(10), np.arange(10))
+        ax.imshow(np.zeros((20, 30)))
+        ax.text(0, 0, "label")
+        ax.text(0, 0, "")
+
+        statistics = report.figure_statistics(fig)
+        plt.close(fig)
+
+        assert statistics["texts"] == 1
+        assert statistics["pixels"] == 600
+        # The line, ten markers of a circle path and the background patches
+        assert statistics["vertices"] >= 100 + 10
+        assert statistics["artists"] >= 5
+
+
+class TestReport:
+    """Test recording saved figures."""
+
+    def test_savefig_recorded(self, formatter, tmp_path):
+        fig = formatter.figure()
+        plt.plot(np.arange(10))
+        plt.xlabel("time")
+        path = formatter.savefig(fig, tmp_path / "figure.svg")
+        plt.close(fig)
+
+        (entry,) = formatter.report.entries
+        assert entry["path"] == str(path)
+        assert entry["format"] == "svg"
+        assert entry["bytes"] == path.stat().st_size
+        assert entry["seconds"] > 0
+        assert entry["texts"] >= 1
+        assert entry["over_budget"] == []
+
+    def test_budgets(self, formatter, tmp_path):
+        formatter.report.max_bytes = 100
+        fig = formatter.figure()
+        formatter.export(fig, tmp_path / "figure", formats=["svg", "pgf"])
+        plt.close(fig)
+
+        assert len(formatter.report.failures) == 2
+        assert all(entry["over_budget"] == ["bytes"] for entry in formatter.report.failures)
+
+    def test_write_and_check(self, formatter, tmp_path, capsys):
+        fig = formatter.figure()
+        formatter.savefig(fig, tmp_path / "figure.svg")
+        plt.close(fig)
+
+        formatter.report.write(tmp_path / "report.json")
+        written = json.loads((tmp_path / "report.json").read_text())
+
+        assert written["over_budget"] == 0
+        assert written["budget"] == {"max_bytes": 10**6, "max_seconds": 60}
+        assert report.main([str(tmp_path / "report.json")]) == 0
+
+        formatter.report.max_seconds = 0
+        formatter.report.entries.clear()
+        fig = formatter.figure()
+        formatter.savefig(fig, tmp_path / "slow.svg")
+        plt.close(fig)
+        formatter.report.write(tmp_path / "report.json")
+
+        assert report.main([str(tmp_path / "report.json")]) == 1
+        assert "slow.svg" in capsys.readouterr().out
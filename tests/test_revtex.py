@@ -3,6 +3,7 @@ import numpy as np
 import pytest
 
 from rsmf import setup
+from rsmf.quantumarticle import QuantumarticleFormatter
 from rsmf.revtex import RevtexFormatter, revtex_parser
 
 
@@ -121,3 +122,22 @@ class TestFigure:
         formatter = RevtexFormatter(**paper_kwargs)
         fig = formatter.figure(**figure_kwargs)
         assert np.allclose(fig.get_size_inches(), np.array(expected_format))
+
+
+class TestComparison:
+    """Test comparison and hashing of formatters."""
+
+    def test_equality_and_hash(self):
+        """Test that equal configurations compare equal and other document classes do not."""
+        formatter = RevtexFormatter(columns="onecolumn", fontsize=11)
+
+        assert formatter == RevtexFormatter(columns="onecolumn", fontsize=11)
+        assert hash(formatter) == hash(RevtexFormatter(columns="onecolumn", fontsize=11))
+        assert formatter != RevtexFormatter(columns="twocolumn", fontsize=11)
+        assert formatter != QuantumarticleFormatter(columns="onecolumn", fontsize=11)
+
+    def test_interned(self):
+        """Test that equal configurations share one instance."""
+        formatter = RevtexFormatter.interned(columns="onecolumn")
+
+        assert RevtexFormatter.interned("onecolumn", 10) is formatter
@@ -1,8 +1,20 @@
+import importlib.metadata
+import subprocess
+import sys
 from pathlib import Path
 
 import pytest
 
-from rsmf.setup import _clean_preamble, _extract_preamble, setup
+from rsmf.setup import (
+    ENTRY_POINT_GROUP,
+    _clean_preamble,
+    _extract_preamble,
+    register_parser,
+    setup,
+    setup_many,
+)
+
+rsmf_setup = sys.modules["rsmf.setup"]
 
 DUMMY_PATH = Path(__file__).parent / "dummy.tex"
 
@@ -103,3 +115,175 @@ class TestSetup:
         result2 = setup(DUMMY_PATH)
 
         assert result1 == result2
+
+
+class TestSetupMany:
+    """Test setting up many documents at once."""
+
+    def test_same_as_setup(self, tmp_path):
+        """Test that the formatters equal those of setup, in the order of the arguments."""
+        preambles = [
+            r"\documentclass[twoside,a4paper,headsepline]{quantumarticle}",
+            r"\documentclass[onecolumn,11pt]{revtex4-2}",
+            r"\documentclass[12pt]{article}",
+        ]
+        paths = []
+        for index, preamble in enumerate(preambles):
+            paths.append(tmp_path / f"paper{index}.tex")
+            paths[-1].write_text(preamble + "\n\\begin{document}\n\\end{document}\n")
+
+        results = setup_many(paths + [DUMMY_PATH])
+
+        assert results == [setup(preamble) for preamble in preambles] + [setup(DUMMY_PATH)]
+
+    def test_deduplication(self, monkeypatch):
+        """Test that formatters of equal configurations are only created once."""
+        quantumarticle = pytest.importorskip("rsmf.quantumarticle")
+        created = []
+        original_init = quantumarticle.QuantumarticleFormatter.__init__
+
+        def init(self, *args, **kwargs):
+            created.append(self)
+            original_init(self, *args, **kwargs)
+
+        monkeypatch.setattr(quantumarticle.QuantumarticleFormatter, "__init__", init)
+
+        results = setup_many(
+            [
+                r"\documentclass[onecolumn,letterpaper,12pt]{quantumarticle}",
+                r"\documentclass[12pt,letterpaper,onecolumn]{quantumarticle}",
+                r"\documentclass[onecolumn,letterpaper,12pt]{quantumarticle}",
+                r"\documentclass[onecolumn,letterpaper,12pt,noarxiv]{quantumarticle}",
+                r"\documentclass[twocolumn,letterpaper,12pt]{quantumarticle}",
+            ]
+        )
+
+        assert all(result is results[0] for result in results[:4])
+        assert results[4] is not results[0]
+        assert len(created) <= 2
+
+    def test_database_deduplication(self):
+        """Test that document classes from the database share formatters as well."""
+        first, second = setup_many(
+            [r"\documentclass[11pt]{report}", r"\documentclass[11pt]{report} "]
+        )
+
+        assert first is second
+        assert first == setup(r"\documentclass[11pt]{report}")
+
+    def test_bounded_threads(self, monkeypatch):
+        """Test that the files are read by at most max_threads threads."""
+        executors = []
+        original = rsmf_setup.ThreadPoolExecutor
+
+        def executor(max_workers):
+            executors.append(max_workers)
+            return original(max_workers=max_workers)
+
+        monkeypatch.setattr(rsmf_setup, "ThreadPoolExecutor", executor)
+        setup_many([DUMMY_PATH] * 10, max_threads=3)
+
+        assert executors == [3]
+
+    def test_missing(self):
+        """Test that all arguments without formatter are reported."""
+        with pytest.raises(RuntimeError, match="unknownclass.*anotherclass"):
+            setup_many(
+                [
+                    r"\documentclass{unknownclass}",
+                    r"\documentclass{quantumarticle}",
+                    r"\documentclass{anotherclass}",
+                ]
+            )
+
+
+PLUGIN_SOURCE = '''
+from rsmf.custom_formatter import CustomFormatter
+
+
+def myjournal_parser(preamble):
+    if "{myjournal}" in preamble:
+        return CustomFormatter(columnwidth=3.0, wide_columnwidth=6.0, fontsizes=10)
+
+    return None
+'''
+
+
+@pytest.fixture
+def plugin_module(tmp_path, monkeypatch):
+    """A module providing a parser that is not imported yet."""
+    (tmp_path / "rsmf_test_plugin.py").write_text(PLUGIN_SOURCE, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "rsmf_test_plugin", raising=False)
+
+    yield "rsmf_test_plugin"
+
+    sys.modules.pop("rsmf_test_plugin", None)
+
+
+class TestParserRegistry:
+    """Test that parsers are found in the registry and loaded lazily."""
+
+    def test_import_does_not_load_parsers(self):
+        """Test that importing rsmf does not import the built-in parsers."""
+        code = (
+            "import sys, rsmf;"
+            "print('rsmf.quantumarticle' in sys.modules, 'rsmf.revtex' in sys.modules)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, check=True, text=True
+        ).stdout
+
+        assert output.split() == ["False", "False"]
+
+    def test_import_does_not_load_features(self):
+        """Test that importing rsmf neither imports the PGF backend nor the feature modules."""
+        modules = [
+            "matplotlib.backends.backend_pgf",
+            "rsmf.batch",
+            "rsmf.density",
+            "rsmf.journals",
+            "rsmf.lazy",
+            "rsmf.measurement",
+            "rsmf.metrics",
+            "rsmf.pages",
+            "rsmf.texcache",
+        ]
+        code = f"import sys, rsmf; print(*[module in sys.modules for module in {modules}])"
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, check=True, text=True
+        ).stdout
+
+        assert output.split() == ["False"] * len(modules)
+
+    def test_entry_point_loaded_on_match(self, plugin_module, monkeypatch):
+        """Test that a parser registered via an entry point is only imported when needed."""
+        entry_point = importlib.metadata.EntryPoint(
+            name="myjournal", value=f"{plugin_module}:myjournal_parser", group=ENTRY_POINT_GROUP
+        )
+        monkeypatch.setattr(rsmf_setup, "_entry_point_parsers", lambda: {"myjournal": entry_point})
+
+        setup(r"\documentclass{quantumarticle}")
+        assert plugin_module not in sys.modules
+
+        formatter = setup(r"\documentclass{myjournal}")
+        assert plugin_module in sys.modules
+        assert formatter.columnwidth == 3.0
+
+    def test_register_parser_string(self, plugin_module, monkeypatch):
+        """Test that a parser registered by name is only imported when needed."""
+        monkeypatch.setattr(rsmf_setup, "_REGISTERED_PARSERS", {})
+        register_parser("myjournal", f"{plugin_module}:myjournal_parser")
+
+        assert plugin_module not in sys.modules
+
+        formatter = setup(r"\documentclass{myjournal}")
+        assert formatter.wide_columnwidth == 6.0
+
+    def test_register_parser_overrides_builtin(self, monkeypatch):
+        """Test that registered parsers take precedence over built-in parsers."""
+        monkeypatch.setattr(rsmf_setup, "_REGISTERED_PARSERS", {})
+        sentinel = object()
+        register_parser("quantumarticle", lambda preamble: sentinel)
+
+        assert setup(r"\documentclass{quantumarticle}") is sentinel
@@ -0,0 +1,132 @@
+import re
+
+import matplotlib.pyplot as plt
+import pytest
+from matplotlib.patches import Rectangle
+from matplotlib.ticker import FuncFormatter
+
+from rsmf.custom_formatter import CustomFormatter
+from rsmf.snapshot import SnapshotStore, restyle
+
+
+def save_textless(formatter, path, **figure_kwargs):
+    """Save a figure without text, which can be written as PGF without LaTeX."""
+    fig = formatter.figure(**figure_kwargs)
+    fig.add_artist(Rectangle((0.1, 0.1), 0.5, 0.5))
+    formatter.savefig(fig, path)
+    plt.close(fig)
+
+
+def pgf_size(path):
+    """Width and height of the figure in a PGF file in inches."""
+    match = re.search(
+        r"\\pgfpathrectangle\{\\pgfpointorigin\}\{\\pgfqpoint\{([\d.]+)in\}\{([\d.]+)in\}\}",
+        path.read_text(),
+    )
+
+    return float(match.group(1)), float(match.group(2))
+
+
+class TestSnapshot:
+    """Test re-rendering figures from snapshots."""
+
+    def test_rerender(self, tmp_path):
+        """Test that a saved figure is rendered again at the width of another document."""
+        old = CustomFormatter(columnwidth=2.0)
+        old.snapshot_dir = tmp_path / "snapshots"
+        save_textless(old, tmp_path / "figure.pgf", aspect_ratio=0.5)
+
+        new = CustomFormatter(columnwidth=3.0)
+        figures = plt.get_fignums()
+        paths = new.rerender(tmp_path / "snapshots", output_dir=tmp_path / "new")
+
+        assert paths == [tmp_path / "new" / "figure.pgf"]
+        assert pgf_size(tmp_path / "figure.pgf") == (2.0, 1.0)
+        assert pgf_size(paths[0]) == (3.0, 1.5)
+        assert plt.get_fignums() == figures
+
+    def test_replaced(self, tmp_path):
+        """Test that saving an output again replaces its snapshot."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        formatter.snapshot_dir = tmp_path / "snapshots"
+        save_textless(formatter, tmp_path / "figure.pgf")
+        save_textless(formatter, tmp_path / "figure.pgf")
+        save_textless(formatter, tmp_path / "other.pgf")
+
+        assert len(SnapshotStore(tmp_path / "snapshots").paths()) == 2
+
+    def test_wide(self, tmp_path):
+        """Test that wide figures keep their width relative to the wide column."""
+        old = CustomFormatter(columnwidth=2.0, wide_columnwidth=4.0)
+        old.snapshot_dir = tmp_path / "snapshots"
+        save_textless(old, tmp_path / "figure.pgf", wide=True, width_ratio=0.75)
+
+        new = CustomFormatter(columnwidth=2.5, wide_columnwidth=6.0)
+        paths = new.rerender(tmp_path / "snapshots", output_dir=tmp_path / "new")
+
+        assert pgf_size(paths[0])[0] == 4.5
+
+    def test_unpicklable(self, tmp_path):
+        """Test that figures that can not be pickled are saved without a snapshot."""
+        formatter = CustomFormatter(columnwidth=2.0)
+        formatter.snapshot_dir = tmp_path / "snapshots"
+        fig = formatter.figure()
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.axis("off")
+        ax.xaxis.set_major_formatter(FuncFormatter(lambda value, _: f"{value}"))
+
+        with pytest.warns(UserWarning, match="No snapshot of figure.pgf"):
+            formatter.savefig(fig, tmp_path / "figure.pgf")
+        plt.close(fig)
+
+        assert (tmp_path / "figure.pgf").exists()
+        assert not SnapshotStore(tmp_path / "snapshots").paths()
+
+
+class TestRestyle:
+    """Test changing the style of a figure to another document."""
+
+    def test_fontsizes(self):
+        """Test that named sizes are mapped by name and other sizes are scaled."""
+        old = CustomFormatter(columnwidth=2.0, fontsizes=10)
+        fig = old.figure()
+        ax = fig.add_subplot()
+        label = ax.set_xlabel("x")
+        title = ax.set_title("title", fontsize=13)
+        ax.tick_params(labelsize=old.fontsizes.scriptsize)
+        snapshot = {
+            "columnwidth": 2.0,
+            "wide_columnwidth": None,
+            "fontsizes": old.fontsizes,
+            "font_family": old.font_family,
+        }
+
+        new = CustomFormatter(columnwidth=2.0, fontsizes=11, font_family="serif")
+        restyle(fig, snapshot, new)
+
+        assert label.get_fontsize() == new.fontsizes.small
+        assert title.get_fontsize() == pytest.approx(13 * 1.1)
+        assert label.get_fontfamily() == ["serif"]
+        for axis in (ax.xaxis, ax.yaxis):
+            ticks = axis.get_major_ticks()
+            assert ticks[0].label1.get_fontsize() == new.fontsizes.scriptsize
+            # Ticks created later get the new size too
+            assert axis.get_tick_params()["labelsize"] == new.fontsizes.scriptsize
+
+        plt.close(fig)
+
+    def test_no_wide_columnwidth(self):
+        """Test that wide figures need a wide column width in the new document."""
+        old = CustomFormatter(columnwidth=2.0, wide_columnwidth=4.0)
+        fig = old.figure(wide=True)
+        snapshot = {
+            "columnwidth": 2.0,
+            "wide_columnwidth": 4.0,
+            "fontsizes": old.fontsizes,
+            "font_family": old.font_family,
+        }
+
+        with pytest.raises(ValueError, match="wide_columnwidth"):
+            restyle(fig, snapshot, CustomFormatter(columnwidth=2.0))
+
+        plt.close(fig)
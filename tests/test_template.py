@@ -0,0 +1,101 @@
+from unittest import mock
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from matplotlib.backends.backend_pgf import FigureCanvasPgf
+
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture
+def formatter():
+    return CustomFormatter(columnwidth=3.0)
+
+
+def build(fig):
+    """A skeleton without text, which can be laid out without LaTeX."""
+    fig.set_layout_engine("constrained")
+    axes = fig.subplots(1, 2)
+    for ax in axes:
+        ax.set_xlim(0, 1)
+        ax.set_ylim(-1, 1)
+        ax.set_xticks([])
+        ax.set_yticks([])
+
+    image = axes[1].imshow(np.zeros((2, 2)), extent=(0, 1, -1, 1), aspect="auto")
+    fig.colorbar(image, ax=axes[1], ticks=[])
+
+    return axes
+
+
+class TestTemplate:
+    """Test building figures from templates."""
+
+    def test_built_once(self, formatter):
+        """Test that the skeleton is built once and the template figure is closed."""
+        figures = plt.get_fignums()
+        skeleton = mock.Mock(wraps=build)
+
+        template = formatter.template(skeleton)
+        for _ in range(3):
+            fig, _ = template.figure()
+            plt.close(fig)
+
+        skeleton.assert_called_once()
+        assert plt.get_fignums() == figures
+
+    def test_clone(self, formatter):
+        """Test that clones have the size and skeleton of the template."""
+        template = formatter.template(build, aspect_ratio=0.5)
+
+        fig, axes = template.figure()
+
+        assert fig.get_size_inches() == pytest.approx((3.0, 1.5))
+        assert len(fig.axes) == 3
+        assert all(ax in fig.axes for ax in axes)
+        assert isinstance(fig.canvas, FigureCanvasPgf)
+        assert plt.gcf() is fig
+
+        plt.close(fig)
+
+    def test_independent(self, formatter):
+        """Test that clones do not share artists."""
+        template = formatter.template(build)
+
+        first, first_axes = template.figure()
+        second, second_axes = template.figure()
+        first_axes[0].plot([0, 1], [0, 1])
+
+        assert first_axes[0] is not second_axes[0]
+        assert len(first_axes[0].lines) == 1
+        assert not second_axes[0].lines
+
+        plt.close(first)
+        plt.close(second)
+
+    def test_frozen_layout(self, formatter):
+        """Test that the layout is computed for the template and kept in the clones."""
+        template = formatter.template(build)
+
+        fig, axes = template.figure()
+        position = axes[1].get_position().bounds
+        axes[1].plot([0, 1], [0, 1])
+        fig.draw_without_rendering()
+
+        assert fig.get_layout_engine().__class__.__name__ == "PlaceHolderLayoutEngine"
+        assert axes[1].get_position().bounds == pytest.approx(position)
+        # The constrained layout moved the axes away from the default subplot positions
+        assert position != pytest.approx(fig.subplotpars.left)
+
+        plt.close(fig)
+
+    def test_not_frozen(self, formatter):
+        """Test that the layout engine can be kept."""
+        template = formatter.template(build, freeze_layout=False)
+
+        fig, _ = template.figure()
+
+        assert fig.get_layout_engine().__class__.__name__ == "ConstrainedLayoutEngine"
+
+        plt.close(fig)
@@ -0,0 +1,181 @@
+import os
+from pathlib import Path
+
+import pytest
+from matplotlib.backends import backend_pgf
+from matplotlib.font_manager import FontProperties
+from matplotlib.texmanager import TexManager
+
+from rsmf import texcache
+from rsmf.custom_formatter import CustomFormatter
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """A shared cache that is active during the test."""
+    yield texcache.install(tmp_path / "cache")
+
+    texcache.uninstall()
+
+
+class FakeLatexManager:
+    """Counts the measurements instead of running LaTeX."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_width_height_descent(self, text, prop):
+        self.calls += 1
+
+        return 10.0 * len(text), 7.0, 2.0
+
+
+class FakeRenderer:
+    """Renderer with the resolution of the PGF renderer."""
+
+    dpi = 72
+
+
+class TestHelpers:
+    """Test locking and atomic writing."""
+
+    def test_lock_is_exclusive(self, tmp_path):
+        """Test that a held lock can not be acquired a second time."""
+        with texcache.file_lock(tmp_path / "test.lock") as acquired:
+            assert acquired
+
+            with texcache.file_lock(tmp_path / "test.lock", blocking=False) as second:
+                assert not second
+
+        with texcache.file_lock(tmp_path / "test.lock", blocking=False) as acquired:
+            assert acquired
+
+    def test_atomic_write(self, tmp_path):
+        """Test that the content is written without leaving temporary files behind."""
+        path = tmp_path / "sub" / "file"
+        texcache.atomic_write(path, b"first")
+        texcache.atomic_write(path, b"second")
+
+        assert path.read_bytes() == b"second"
+        assert os.listdir(path.parent) == ["file"]
+
+
+class TestTexCache:
+    """Test the cache directory."""
+
+    def test_metrics_roundtrip(self, tmp_path):
+        """Test that metrics are read back exactly."""
+        cache = texcache.TexCache(tmp_path)
+        cache.put_metrics("ab12", (1.5, 2.25, 1 / 3))
+
+        assert cache.get_metrics("ab12") == (1.5, 2.25, 1 / 3)
+        assert cache.get_metrics("cd34") is None
+
+    def test_cleanup_removes_least_recently_used(self, tmp_path):
+        """Test that the oldest files are removed until the cache fits."""
+        cache = texcache.TexCache(tmp_path, max_bytes=25)
+        for age, key in enumerate(["aa1", "aa2", "aa3"]):
+            cache.put_metrics(key, (1.0, 2.0, 3.0))
+            os.utime(cache._metrics_path(key), (1000 + age, 1000 + age))
+
+        # Reading marks an entry as recently used
+        cache.get_metrics("aa1")
+
+        assert cache.cleanup() > 0
+        assert cache.get_metrics("aa1") is not None
+        assert cache.get_metrics("aa2") is None
+        assert sum(path.stat().st_size for path in Path(tmp_path, "pgf").rglob("aa?")) <= 25
+
+    def test_bounded_lock_files(self, tmp_path):
+        """Test that locking many entries uses a fixed number of lock files per group."""
+        cache = texcache.TexCache(tmp_path)
+        for index in range(1000):
+            with cache.lock(f"entry{index}", "make_dvi"):
+                pass
+
+        assert len(list((tmp_path / "locks").iterdir())) <= texcache._LOCK_STRIPES
+
+    def test_lock_groups(self, tmp_path):
+        """Test that a lock of one group does not block the same entry in another group."""
+        cache = texcache.TexCache(tmp_path)
+
+        with cache.lock("entry", "make_png"):
+            with cache.lock("entry", "make_dvi", blocking=False) as acquired:
+                assert acquired
+
+
+class TestInstall:
+    """Test that matplotlib's typesetting goes through the active cache."""
+
+    def test_pgf_metrics_are_shared(self, cache, monkeypatch):
+        """Test that text is only measured by LaTeX if no process measured it before."""
+        manager = FakeLatexManager()
+        monkeypatch.setattr(backend_pgf.LatexManager, "_get_cached_or_new", lambda: manager)
+        prop = FontProperties(size=10)
+        factor = backend_pgf.mpl_pt_to_in * FakeRenderer.dpi
+
+        first = backend_pgf.RendererPgf.get_text_width_height_descent(
+            FakeRenderer(), "abc", prop, False
+        )
+        assert manager.calls == 1
+        assert first == pytest.approx((30 * factor, 7 * factor, 2 * factor))
+
+        # A new process only sees the files of the cache
+        texcache.uninstall()
+        texcache.install(cache.directory)
+
+        second = backend_pgf.RendererPgf.get_text_width_height_descent(
+            FakeRenderer(), "abc", prop, False
+        )
+        assert manager.calls == 1
+        assert second == first
+
+    def test_uninstalled(self, tmp_path, monkeypatch):
+        """Test that nothing is cached without an active cache."""
+        texcache.install(tmp_path)
+        texcache.uninstall()
+
+        manager = FakeLatexManager()
+        monkeypatch.setattr(backend_pgf.LatexManager, "_get_cached_or_new", lambda: manager)
+
+        for _ in range(2):
+            backend_pgf.RendererPgf.get_text_width_height_descent(
+                FakeRenderer(), "abc", FontProperties(), False
+            )
+
+        assert manager.calls == 2
+        assert not list(Path(tmp_path, "pgf").rglob("*"))
+
+    def test_usetex_files_in_shared_directory(self, cache, monkeypatch):
+        """Test that usetex typesets into the shared directory."""
+        runs = []
+
+        def run(command, tex, cwd=None):
+            runs.append(tex)
+            Path(cwd, "file.dvi").write_bytes(b"dvi")
+
+        monkeypatch.setattr(TexManager, "_run_checked_subprocess", run)
+
+        path = TexManager.make_dvi("shared text", 10)
+        assert Path(path).is_relative_to(cache.directory / "tex")
+        assert Path(path).read_bytes() == b"dvi"
+
+        assert TexManager.make_dvi("shared text", 10) == path
+        assert runs == ["shared text"]
+
+
+class TestFormatter:
+    """Test the formatter option."""
+
+    def test_share_tex_cache(self, tmp_path):
+        """Test that the cache is installed again when the formatter is activated."""
+        formatter = CustomFormatter(columnwidth=3.0)
+        formatter.share_tex_cache(tmp_path, max_bytes=1000)
+
+        assert texcache._ACTIVE.directory == tmp_path.resolve()
+
+        texcache.uninstall()
+        formatter.activate()
+
+        assert texcache._ACTIVE.max_bytes == 1000
+        texcache.uninstall()